@@ -0,0 +1,307 @@
+# batch_recognition.py
+"""Bulk recognition of uploaded clips and image batches for POST /recognize.
+
+The upload is spooled to a temporary file as it arrives (a multipart batch is
+reduced to the bytes of its file parts), so memory use doesn't depend on its
+length. Frames are then decoded lazily, one at a time: each chunk of frames
+goes through MediaPipe in the server's frame pool (workers.extract_batch: a
+video on a tracker leased from the worker's TrackerPool, images on its
+detection graphs), the hands found in it are classified in a single
+ASLModel.predict_batch call, and the chunk's results are streamed back as
+NDJSON lines before the next chunk is read.
+"""
+import itertools
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from preprocess import decode_frame
+from recognition import get_model, landmarks_to_dicts
+
+try:
+    try:
+        import python_multipart as multipart
+        from python_multipart.multipart import parse_options_header
+    except ModuleNotFoundError:  # python-multipart < 0.0.13
+        import multipart
+        from multipart.multipart import parse_options_header
+except ModuleNotFoundError:
+    multipart = None
+    parse_options_header = None
+
+
+class UploadError(ValueError):
+    """An upload that can't be recognized; status is the HTTP status to answer with"""
+    
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class SpooledUpload:
+    """An upload on disk: a video, or the concatenated file parts of an image batch"""
+    
+    def __init__(self, kind: str, path: str, parts: Optional[List[tuple[str, int, int]]] = None):
+        self.kind = kind  # "video" or "images"
+        self.path = path
+        self.parts = parts or []  # (file name, offset, length) per image
+    
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class _PartCollector:
+    """python-multipart callbacks that write file parts to the spool and remember where each one is"""
+    
+    def __init__(self, spool):
+        self.spool = spool
+        self.parts: List[tuple[str, int, int]] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+        self._start = 0
+    
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+    
+    def on_part_begin(self):
+        self._headers = {}
+        self._start = self.spool.tell()
+    
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._field += data[start:end]
+    
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+    
+    def on_header_end(self):
+        self._headers[self._field.lower()] = self._value
+        self._field, self._value = b"", b""
+    
+    def on_part_data(self, data: bytes, start: int, end: int):
+        self.spool.write(data[start:end])
+    
+    def on_part_end(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if b"filename" in options:
+            name = options[b"filename"].decode("utf-8", "replace")
+            self.parts.append((name, self._start, self.spool.tell() - self._start))
+        else:
+            # Plain form fields carry no frames
+            self.spool.seek(self._start)
+            self.spool.truncate()
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], content_type: str, max_bytes: int) -> SpooledUpload:
+    """Write a request body to a temporary file while it arrives.
+    
+    multipart/form-data is a batch of images (one per file part), a single
+    image/* body is a batch of one, and anything else is read as a video.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    kind = "images" if media_type == "multipart/form-data" or media_type.startswith("image/") else "video"
+    parser = collector = None
+    if media_type == "multipart/form-data":
+        if multipart is None:
+            raise UploadError("Multipart uploads need the python-multipart package", 415)
+        _, options = parse_options_header(content_type)
+        if b"boundary" not in options:
+            raise UploadError("Multipart upload without a boundary")
+    
+    fd, path = tempfile.mkstemp(prefix="asl-upload-")
+    received = 0
+    try:
+        with os.fdopen(fd, "w+b") as spool:
+            if media_type == "multipart/form-data":
+                collector = _PartCollector(spool)
+                parser = multipart.MultipartParser(options[b"boundary"], collector.callbacks())
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > max_bytes:
+                    raise UploadError(f"Upload exceeds {max_bytes >> 20} MB", 413)
+                if parser is not None:
+                    parser.write(chunk)
+                else:
+                    spool.write(chunk)
+            if parser is not None:
+                parser.finalize()
+    except BaseException:
+        # Cancellation (a client disconnect mid-upload) must not leave the spool file behind either
+        os.remove(path)
+        raise
+    
+    if received == 0:
+        os.remove(path)
+        raise UploadError("Empty upload")
+    if kind == "images":
+        parts = collector.parts if collector is not None else [("image", 0, received)]
+        if not parts:
+            os.remove(path)
+            raise UploadError("No files in the multipart upload")
+        return SpooledUpload(kind, path, parts)
+    return SpooledUpload(kind, path)
+
+
+class BatchRecognizer:
+    """Recognizes a spooled upload chunk by chunk.
+    
+    open(), read_chunk() and recognize() block and run in a worker thread;
+    the MediaPipe pass between reading and recognizing a chunk is the caller's
+    (on the frame pool, keyed by job_id). close() may be called from the event
+    loop at any time (e.g. when the client goes away) and releases everything
+    once the chunk being read is done.
+    """
+    
+    def __init__(self, upload: SpooledUpload, every: int = 1, chunk_size: int = 32,
+                 include_landmarks: bool = False, max_side: int = 640):
+        self.upload = upload
+        self.every = every
+        self.chunk_size = chunk_size
+        self.include_landmarks = include_landmarks
+        self.max_side = max_side
+        self.frames = 0
+        self.hands_detected = 0
+        self.errors = 0
+        self.gestures: Dict[str, int] = {}
+        # A video is tracked from frame to frame under this key; every image is a separate detection
+        self.job_id = f"recognize-{uuid.uuid4().hex[:12]}"
+        self.tracking = upload.kind == "video"
+        self._capture = None
+        self._source: Optional[Iterator] = None
+        self._state = threading.Lock()
+        self._busy = False
+        self._closed = False
+        self._released = False
+        self._started = time.perf_counter()
+    
+    def open(self) -> Dict:
+        """Prepare decoding and MediaPipe; returns the stream's first line"""
+        if self.upload.kind == "video":
+            self._capture = cv2.VideoCapture(self.upload.path)
+            if not self._capture.isOpened():
+                raise UploadError("Cannot decode the uploaded video", 415)
+            self._source = self._video_frames()
+            start = {
+                "type": "start",
+                "source": "video",
+                "frames": int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+                "fps": round(self._capture.get(cv2.CAP_PROP_FPS), 3),
+                "every": self.every,
+            }
+        else:
+            self._source = self._image_frames()
+            start = {"type": "start", "source": "images", "files": len(self.upload.parts)}
+        return start
+    
+    def _video_frames(self) -> Iterator[tuple[Dict, Optional[np.ndarray]]]:
+        index = 0
+        # grab() skips frames without decoding them
+        while self._capture.grab():
+            if index % self.every == 0:
+                ok, frame = self._capture.retrieve()
+                info = {"index": index, "time_s": round(self._capture.get(cv2.CAP_PROP_POS_MSEC) / 1000, 3)}
+                yield info, (self._fit(frame) if ok else None)
+            index += 1
+    
+    def _image_frames(self) -> Iterator[tuple[Dict, Optional[np.ndarray]]]:
+        with open(self.upload.path, "rb") as f:
+            for index, (name, offset, length) in enumerate(self.upload.parts):
+                f.seek(offset)
+                data = np.frombuffer(f.read(length), np.uint8)
+                image = decode_frame(data, self.max_side)[0] if length else None
+                yield {"index": index, "name": name}, image
+    
+    def _fit(self, frame: np.ndarray) -> np.ndarray:
+        """Shrink video frames the same way large JPEGs are decoded at reduced scale"""
+        longest = max(frame.shape[:2])
+        if self.max_side <= 0 or longest <= self.max_side:
+            return frame
+        scale = self.max_side / longest
+        return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    def read_chunk(self) -> List[tuple[Dict, Optional[np.ndarray]]]:
+        """Up to chunk_size more decoded frames (None where decoding failed); empty when the upload is done"""
+        with self._state:
+            if self._closed:
+                return []
+            self._busy = True
+        try:
+            return list(itertools.islice(self._source, self.chunk_size))
+        finally:
+            with self._state:
+                self._busy = False
+                closed = self._closed
+            if closed:
+                self._release()
+    
+    def recognize(self, frames: List[tuple[Dict, Optional[np.ndarray]]],
+                  found: List[Optional[np.ndarray]]) -> List[Dict]:
+        """Results of a chunk from read_chunk(), given the landmarks extract_batch found in its frames"""
+        results, features, with_hand = [], [], []
+        for (info, image), hand in zip(frames, found):
+            self.frames += 1
+            if image is None:
+                self.errors += 1
+                results.append({"type": "frame", **info, "error": "Failed to decode frame"})
+                continue
+            result = {"type": "frame", **info, "hand_detected": hand is not None}
+            if hand is not None:
+                features.append(hand)
+                with_hand.append(result)
+                if self.include_landmarks:
+                    result["landmarks"] = landmarks_to_dicts(hand)
+            results.append(result)
+        
+        if features:
+            # One forward pass for every hand in the chunk
+            for result, (gesture, confidence) in zip(with_hand, get_model().predict_batch(np.array(features))):
+                result["gesture"], result["confidence"] = gesture, confidence
+                self.gestures[gesture] = self.gestures.get(gesture, 0) + 1
+            self.hands_detected += len(features)
+        return results
+    
+    def summary(self) -> Dict:
+        seconds = time.perf_counter() - self._started
+        return {
+            "type": "summary",
+            "frames": self.frames,
+            "hands_detected": self.hands_detected,
+            "errors": self.errors,
+            "gestures": self.gestures,
+            "seconds": round(seconds, 3),
+            "fps": round(self.frames / seconds, 2) if seconds > 0 else None,
+        }
+    
+    def close(self):
+        with self._state:
+            self._closed = True
+            if self._busy:
+                return  # read_chunk releases on its way out
+        self._release()
+    
+    def _release(self):
+        with self._state:
+            if self._released:
+                return
+            self._released = True
+        if self._source is not None:
+            self._source.close()
+        if self._capture is not None:
+            self._capture.release()
+        self.upload.remove()
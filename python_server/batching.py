@@ -0,0 +1,170 @@
+# batching.py
+"""Dynamic micro-batching of gesture predictions across all WebSocket sessions"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Batch sizes are reported in power-of-two buckets: 1, 2-3, 4-7, ...
+_BUCKET_LIMITS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+def _bucket_label(index: int) -> str:
+    low = _BUCKET_LIMITS[index]
+    if index + 1 < len(_BUCKET_LIMITS):
+        high = _BUCKET_LIMITS[index + 1] - 1
+        return str(low) if low == high else f"{low}-{high}"
+    return f"{low}+"
+
+
+class BatchStats:
+    """Running distribution of the batch sizes the scheduler achieves"""
+    
+    def __init__(self):
+        self.batches = 0
+        self.items = 0
+        self.max_size = 0
+        self.flush_on_size = 0
+        self.flush_on_timeout = 0
+        self.total_forward_s = 0.0
+        self.bucket_counts = [0] * len(_BUCKET_LIMITS)
+    
+    def record(self, size: int, full: bool, forward_s: float):
+        self.batches += 1
+        self.items += size
+        self.max_size = max(self.max_size, size)
+        self.total_forward_s += forward_s
+        if full:
+            self.flush_on_size += 1
+        else:
+            self.flush_on_timeout += 1
+        index = 0
+        while index + 1 < len(_BUCKET_LIMITS) and size >= _BUCKET_LIMITS[index + 1]:
+            index += 1
+        self.bucket_counts[index] += 1
+    
+    def to_dict(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "predictions": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_size,
+            "flushed_full": self.flush_on_size,
+            "flushed_on_timeout": self.flush_on_timeout,
+            "mean_forward_ms": round(1000 * self.total_forward_s / self.batches, 3) if self.batches else 0.0,
+            "batch_size_histogram": {
+                _bucket_label(i): count for i, count in enumerate(self.bucket_counts) if count
+            },
+        }
+
+
+class PredictionBatcher:
+    """Collects feature vectors from concurrent callers and runs one batched forward pass.
+    
+    A batch is flushed as soon as it holds max_batch_size vectors, or max_wait_ms
+    after its first vector arrived, whichever comes first. predict_batch returns
+    the version of the model it used with the predictions, and every caller gets
+    that version back with its own prediction.
+    """
+    
+    def __init__(self, predict_batch: Callable[[np.ndarray], tuple[Optional[str], List[tuple[str, float]]]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.stats = BatchStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # One dedicated thread keeps the model off the event loop and never called concurrently
+        self._forward_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asl-batch")
+    
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"📦 Prediction batching: max {self.max_batch_size} per batch, "
+                    f"max wait {self.max_wait * 1000:.1f} ms")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._forward_executor.shutdown(wait=False, cancel_futures=True)
+    
+    @property
+    def queue_depth(self) -> int:
+        """Feature vectors waiting for the next batch"""
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    async def predict(self, features: np.ndarray) -> tuple[Optional[str], tuple[str, float]]:
+        """Queue one feature vector and wait for (model version, (gesture, confidence))"""
+        if self._queue is None:
+            raise RuntimeError("PredictionBatcher.start() has not been called")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future))
+        return await future
+    
+    async def predict_many(self, features: np.ndarray) -> List[tuple[Optional[str], tuple[str, float]]]:
+        """Queue the (N, 63) rows of one frame back to back, so they share a forward pass unless it fills up.
+        
+        Each row comes back with the version that classified it: rows split over two batches may straddle a swap.
+        """
+        if self._queue is None:
+            raise RuntimeError("PredictionBatcher.start() has not been called")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for row in features:
+            future = loop.create_future()
+            # put_nowait never yields, so no other caller's vector lands between the rows
+            self._queue.put_nowait((row, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+    
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Callers that went away (disconnects) don't need a prediction
+            batch = [(features, future) for features, future in batch if not future.done()]
+            if not batch:
+                continue
+            
+            features = np.stack([np.asarray(f, dtype=np.float32).reshape(-1) for f, _ in batch])
+            start = time.perf_counter()
+            try:
+                version, results = await loop.run_in_executor(self._forward_executor, self.predict_batch, features)
+            except Exception as e:
+                logger.error(f"Batched prediction error: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats.record(len(batch), len(batch) >= self.max_batch_size, time.perf_counter() - start)
+            
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result((version, result))
@@ -0,0 +1,380 @@
+# benchmark.py
+"""Load generation and latency benchmarks for the ASL server.
+
+    python benchmark.py stages                      # per-stage micro-benchmarks
+    python benchmark.py load --clients 16 --fps 10  # N WebSocket clients against /asl-ws
+    python benchmark.py make-fixtures               # re-render benchmarks/fixtures/*.jpg
+
+'load' starts main.py on a free local port unless --url points at a running
+server. Clients send JPEG fixtures (binary or legacy JSON protocol) or
+jittered landmark vectors from the landmark dataset at a fixed rate. Both commands
+print machine-readable JSON (or write it with --out).
+"""
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+
+# MediaPipe hand topology, for rendering fixtures
+HAND_CONNECTIONS = [
+    (0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8), (5, 9), (9, 10), (10, 11),
+    (11, 12), (9, 13), (13, 14), (14, 15), (15, 16), (13, 17), (17, 18), (18, 19), (19, 20), (0, 17),
+]
+
+
+def percentiles(samples: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99/mean/max of samples in seconds, reported in milliseconds"""
+    if not samples:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(values.mean()), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def load_dataset():
+    from dataset import read_landmarks
+    features, labels = read_landmarks()
+    return np.asarray(features), np.asarray(labels)
+
+
+def load_fixtures() -> List[bytes]:
+    paths = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.jpg")))
+    if not paths:
+        raise SystemExit(f"No JPEG fixtures in {FIXTURES_DIR} - run 'python benchmark.py make-fixtures'")
+    fixtures = []
+    for path in paths:
+        with open(path, "rb") as f:
+            fixtures.append(f.read())
+    return fixtures
+
+
+def synthetic_landmarks(count: int, jitter: float = 0.002, seed: int = 0) -> np.ndarray:
+    """Dataset landmark vectors with small noise, like a hand holding a sign"""
+    features, _ = load_dataset()
+    rng = np.random.default_rng(seed)
+    rows = features[rng.integers(0, len(features), size=count)]
+    return (rows + rng.normal(0.0, jitter, size=rows.shape)).astype(np.float32)
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+
+def render_hand(features: np.ndarray, size=(640, 480)) -> np.ndarray:
+    """Draw a flat-shaded hand from 21 landmarks, good enough for MediaPipe to detect"""
+    import cv2
+    width, height = size
+    image = np.full((height, width, 3), (90, 110, 130), np.uint8)
+    points = (features.reshape(21, 3)[:, :2] * [width, height]).astype(np.int32)
+    skin, joints = (140, 170, 215), (120, 150, 200)
+    cv2.fillConvexPoly(image, cv2.convexHull(points[[0, 1, 5, 9, 13, 17]]), skin)
+    for a, b in HAND_CONNECTIONS:
+        cv2.line(image, tuple(map(int, points[a])), tuple(map(int, points[b])), skin, 18, cv2.LINE_AA)
+    for point in points:
+        cv2.circle(image, tuple(map(int, point)), 9, joints, -1, cv2.LINE_AA)
+    return cv2.GaussianBlur(image, (5, 5), 0)
+
+
+def make_fixtures(per_label: int = 1) -> List[str]:
+    """Render one detectable JPEG per label (plus an empty frame) into benchmarks/fixtures"""
+    import cv2
+    from recognition import LABELS, create_hands, extract_hand_landmarks
+    
+    features, labels = load_dataset()
+    hands = create_hands(static_image_mode=True)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    written = []
+    for label_index, label in enumerate(LABELS):
+        kept = 0
+        for row in features[labels == label_index]:
+            image = render_hand(row)
+            if not extract_hand_landmarks(image, hands)[2]:
+                continue
+            path = os.path.join(FIXTURES_DIR, f"{label.lower().replace(' ', '_')}_{kept}.jpg")
+            cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            written.append(path)
+            kept += 1
+            if kept >= per_label:
+                break
+    empty = os.path.join(FIXTURES_DIR, "no_hand.jpg")
+    cv2.imwrite(empty, np.full((480, 640, 3), (90, 110, 130), np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 80])
+    written.append(empty)
+    hands.close()
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Stage micro-benchmarks
+
+def time_stage(fn: Callable, inputs: list, iterations: int, warmup: int = 5) -> Dict:
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+    samples = []
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run_stages(iterations: int, batch_size: int) -> Dict:
+    import cv2
+    from gating import frame_signature
+    from prediction_cache import quantize_landmarks
+    from recognition import ASLModel, create_hands, extract_hand_landmarks
+    
+    jpegs = [np.frombuffer(data, np.uint8) for data in load_fixtures()]
+    images = [cv2.imdecode(jpeg, cv2.IMREAD_COLOR) for jpeg in jpegs]
+    landmarks = list(synthetic_landmarks(max(iterations, batch_size)))
+    batches = [np.stack(landmarks[i:i + batch_size]) for i in range(0, len(landmarks) - batch_size + 1, batch_size)]
+    
+    model = ASLModel()
+    tracking = create_hands()
+    detection = create_hands(static_image_mode=True)
+    
+    stages = {
+        "jpeg_decode": time_stage(lambda jpeg: cv2.imdecode(jpeg, cv2.IMREAD_COLOR), jpegs, iterations),
+        "frame_signature": time_stage(frame_signature, jpegs, iterations),
+        "extract_hand_landmarks_tracking": time_stage(lambda image: extract_hand_landmarks(image, tracking), images, iterations),
+        "extract_hand_landmarks_detection": time_stage(lambda image: extract_hand_landmarks(image, detection), images, iterations),
+        "asl_model_predict": time_stage(model.predict, landmarks, iterations),
+        f"asl_model_predict_batch_{batch_size}": time_stage(model.predict_batch, batches, max(1, iterations // 10)),
+        "rule_based_prediction": time_stage(model.rule_based_prediction, landmarks, iterations),
+        "cache_key": time_stage(lambda f: quantize_landmarks(f, 0.25), landmarks, iterations),
+    }
+    return {
+        "benchmark": "stages",
+        "iterations": iterations,
+        "model_backend": model.backend,
+        "fixtures": len(jpegs),
+        "stages": stages,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Load test
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, env_overrides: Dict[str, str], timeout: float) -> subprocess.Popen:
+    # Through main.py so --server-env ASL_SERVER_WORKERS=N benchmarks the multi-worker mode
+    env = {**os.environ, "ASL_HOST": "127.0.0.1", "ASL_PORT": str(port), **env_overrides}
+    process = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Server did not become ready within {timeout:.0f} s")
+
+
+class ClientResult:
+    def __init__(self):
+        self.sent = 0
+        self.responses = 0
+        self.errors = 0
+        self.latencies: List[float] = []
+        self.last_stats: Dict = {}
+        self.stage_timings: Dict[str, List[float]] = {}
+        self.reused = 0
+        self.hands = 0
+        self.failure: Optional[str] = None
+
+
+async def run_client(url: str, mode: str, payloads: list, fps: float, duration: float,
+                     client_id: int) -> ClientResult:
+    import websockets
+    from protocol import BINARY_SUBPROTOCOL, JSON_SUBPROTOCOL, encode_binary_frame, encode_landmarks_frame
+    
+    result = ClientResult()
+    subprotocol = JSON_SUBPROTOCOL if mode == "json" else BINARY_SUBPROTOCOL
+    sent_at: Dict[int, float] = {}
+    
+    def encode(frame_id: int, payload):
+        now_ms = time.time() * 1000
+        if mode == "landmarks":
+            return encode_landmarks_frame(payload, frame_id, now_ms)
+        if mode == "jpeg":
+            return encode_binary_frame(payload, frame_id, now_ms)
+        return json.dumps({"frame": payload, "frame_id": frame_id, "timestamp": now_ms})
+    
+    async def receive(ws):
+        async for raw in ws:
+            message = json.loads(raw)
+            if message.get("type"):
+                continue
+            result.responses += 1
+            if "error" in message:
+                result.errors += 1
+            frame_id = message.get("frame_id")
+            if frame_id in sent_at:
+                result.latencies.append(time.perf_counter() - sent_at.pop(frame_id))
+            if message.get("reused"):
+                result.reused += 1
+            if message.get("hand_detected"):
+                result.hands += 1
+            for stage, ms in (message.get("timings_ms") or {}).items():
+                result.stage_timings.setdefault(stage, []).append(ms / 1000)
+            result.last_stats = message.get("stats") or result.last_stats
+    
+    try:
+        async with websockets.connect(url, subprotocols=[subprotocol], max_size=None) as ws:
+            receiver = asyncio.create_task(receive(ws))
+            # Ask for the server's per-stage breakdown with every response
+            await ws.send(json.dumps({"type": "config", "timings": True}))
+            interval = 1.0 / fps
+            start = time.perf_counter()
+            frame_id = client_id * 1_000_000
+            while time.perf_counter() - start < duration:
+                payload = payloads[(frame_id + client_id) % len(payloads)]
+                sent_at[frame_id] = time.perf_counter()
+                await ws.send(encode(frame_id, payload))
+                result.sent += 1
+                frame_id += 1
+                # Fixed schedule, so slow responses don't lower the offered load
+                next_send = start + result.sent * interval
+                await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+            # Give in-flight frames a moment to come back
+            await asyncio.sleep(min(2.0, 10 * interval))
+            receiver.cancel()
+    except Exception as e:
+        result.failure = f"{type(e).__name__}: {e}"
+    return result
+
+
+async def run_load(url: str, mode: str, clients: int, fps: float, duration: float) -> Dict:
+    if mode == "landmarks":
+        payloads = list(synthetic_landmarks(512))
+    elif mode == "json":
+        payloads = ["data:image/jpeg;base64," + base64.b64encode(data).decode() for data in load_fixtures()]
+    else:
+        payloads = load_fixtures()
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        run_client(url, mode, payloads, fps, duration, client_id) for client_id in range(clients)
+    ])
+    elapsed = time.perf_counter() - start
+    
+    sent = sum(r.sent for r in results)
+    responses = sum(r.responses for r in results)
+    errors = sum(r.errors for r in results)
+    dropped = sum(r.last_stats.get("dropped", 0) for r in results)
+    latencies = [latency for r in results for latency in r.latencies]
+    stage_timings: Dict[str, List[float]] = {}
+    for r in results:
+        for stage, samples in r.stage_timings.items():
+            stage_timings.setdefault(stage, []).extend(samples)
+    return {
+        "benchmark": "load",
+        "mode": mode,
+        "clients": clients,
+        "target_fps_per_client": fps,
+        "duration_s": duration,
+        "elapsed_s": round(elapsed, 3),
+        "frames_sent": sent,
+        "responses": responses,
+        "offered_fps": round(sent / duration, 2),
+        "achieved_fps": round(responses / duration, 2),
+        "achieved_fps_per_client": round(responses / duration / clients, 2),
+        "frames_dropped_by_server": dropped,
+        "drop_rate": round(dropped / sent, 4) if sent else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / responses, 4) if responses else 0.0,
+        "reused_results": sum(r.reused for r in results),
+        "hands_detected": sum(r.hands for r in results),
+        "failed_clients": [r.failure for r in results if r.failure],
+        "end_to_end": percentiles(latencies),
+        "server_stages": {stage: percentiles(samples) for stage, samples in stage_timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ASL server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    stages = sub.add_parser("stages", help="Micro-benchmark individual pipeline stages")
+    stages.add_argument("--iterations", type=int, default=200)
+    stages.add_argument("--batch-size", type=int, default=32)
+    stages.add_argument("--out")
+    
+    load = sub.add_parser("load", help="Drive concurrent WebSocket clients against /asl-ws")
+    load.add_argument("--url", help="ws:// URL of a running server (default: start one locally)")
+    load.add_argument("--mode", choices=["jpeg", "json", "landmarks"], default="jpeg")
+    load.add_argument("--clients", type=int, default=8)
+    load.add_argument("--fps", type=float, default=10.0, help="Target frames per second per client")
+    load.add_argument("--duration", type=float, default=20.0, help="Seconds of sending per client")
+    load.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                      help="Environment for the locally started server, e.g. ASL_EXECUTOR_BACKEND=process")
+    load.add_argument("--startup-timeout", type=float, default=180.0)
+    load.add_argument("--out")
+    
+    fixtures = sub.add_parser("make-fixtures", help="Render JPEG fixtures from the landmark dataset")
+    fixtures.add_argument("--per-label", type=int, default=1)
+    
+    args = parser.parse_args()
+    
+    if args.command == "make-fixtures":
+        for path in make_fixtures(args.per_label):
+            print(f"🖼️ {os.path.relpath(path, BASE_DIR)}")
+        return
+    
+    if args.command == "stages":
+        report = run_stages(args.iterations, args.batch_size)
+    else:
+        server = None
+        url = args.url
+        if url is None:
+            env = dict(item.split("=", 1) for item in args.server_env)
+            port = free_port()
+            server = start_server(port, env, args.startup_timeout)
+            url = f"ws://127.0.0.1:{port}/asl-ws"
+        try:
+            report = asyncio.run(run_load(url, args.mode, args.clients, args.fps, args.duration))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+        report["url"] = url
+    
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
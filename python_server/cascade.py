@@ -0,0 +1,185 @@
+# cascade.py
+"""Confidence cascade: cheap classifiers answer first, costlier ones only when unsure.
+
+Tiers run in order over a batch. Rows a tier classifies with at least its
+threshold confidence are resolved there; the rest escalate. The last tier
+always answers. Available tiers:
+
+* rules  - vectorized version of ASLModel.rule_based_prediction
+* forest - the RandomForest from models/asl_model.pkl, optionally pruned
+* nn     - the neural network (NumPy engine or Keras)
+
+Measure tier shares and accuracy for a set of thresholds with:
+    python cascade.py evaluate --rules-threshold 0.9 --forest-threshold 0.95
+
+Without flags, evaluate uses the server's settings (ASL_CASCADE_* in config.py).
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Same label order as recognition.LABELS
+_YES, _NO, _I_LOVE_YOU, _HELLO, _THANK_YOU = range(5)
+UNKNOWN = -1
+
+
+def rule_based_batch(features: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Finger-count rules for a (N, 63) batch: (label indices, -1 for Unknown; confidences)"""
+    y = np.asarray(features, dtype=np.float32).reshape(-1, 21, 3)[:, :, 1]
+    thumb = y[:, 4] < y[:, 3]
+    index = y[:, 8] < y[:, 6]
+    middle = y[:, 12] < y[:, 10]
+    ring = y[:, 16] < y[:, 14]
+    pinky = y[:, 20] < y[:, 18]
+    count = thumb.astype(np.int8) + index + middle + ring + pinky
+    
+    # Same precedence as the if/elif chain in ASLModel.rule_based_prediction
+    conditions = [
+        count == 5,
+        (count == 2) & index & pinky,
+        (count == 1) & thumb,
+        (count == 2) & index & middle,
+        count == 0,
+    ]
+    labels = np.select(conditions, [_HELLO, _I_LOVE_YOU, _YES, _NO, _THANK_YOU], default=UNKNOWN)
+    confidences = np.select(conditions, [0.8, 0.8, 0.7, 0.7, 0.6], default=0.3)
+    return labels, confidences.astype(np.float32)
+
+
+def load_forest(path: str, max_trees: int = 0):
+    """Load the trained RandomForest for single-threaded serving, keeping at most max_trees trees"""
+    with open(path, "rb") as f:
+        forest = pickle.load(f)
+    if 0 < max_trees < len(forest.estimators_):
+        forest.estimators_ = forest.estimators_[:max_trees]
+        forest.n_estimators = max_trees
+    # Joblib's process fan-out costs far more than a per-frame prediction
+    forest.n_jobs = 1
+    return forest
+
+
+class CascadeClassifier:
+    """Runs tiers in order and reports how many rows each tier resolved"""
+    
+    def __init__(self, labels: Sequence[str], tiers: Sequence[str], thresholds: Dict[str, float],
+                 forest=None, nn_predict: Optional[Callable[[np.ndarray], np.ndarray]] = None):
+        available = {"rules": True, "forest": forest is not None, "nn": nn_predict is not None}
+        unknown = [tier for tier in tiers if tier not in available]
+        if unknown:
+            raise ValueError(f"Unknown cascade tiers: {unknown}")
+        self.tiers = [tier for tier in tiers if available[tier]]
+        if not self.tiers:
+            self.tiers = ["rules"]
+        self.labels = list(labels)
+        self.thresholds = thresholds
+        self.forest = forest
+        self.nn_predict = nn_predict
+        self._lock = threading.Lock()
+        self.resolved = {tier: 0 for tier in self.tiers}
+        self.evaluated = {tier: 0 for tier in self.tiers}
+        self.seconds = {tier: 0.0 for tier in self.tiers}
+    
+    def _run_tier(self, tier: str, features: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        if tier == "rules":
+            return rule_based_batch(features)
+        if tier == "forest":
+            probabilities = self.forest.predict_proba(features)
+            classes = self.forest.classes_[probabilities.argmax(axis=1)]
+            return classes.astype(np.int64), probabilities.max(axis=1)
+        probabilities = np.asarray(self.nn_predict(features))
+        return probabilities.argmax(axis=1), probabilities.max(axis=1)
+    
+    def predict_batch(self, features: np.ndarray) -> List[tuple[str, float]]:
+        features = np.asarray(features, dtype=np.float32).reshape(len(features), -1)
+        labels = np.full(len(features), UNKNOWN, dtype=np.int64)
+        confidences = np.zeros(len(features), dtype=np.float32)
+        pending = np.arange(len(features))
+        
+        for position, tier in enumerate(self.tiers):
+            if len(pending) == 0:
+                break
+            start = time.perf_counter()
+            tier_labels, tier_confidences = self._run_tier(tier, features[pending])
+            elapsed = time.perf_counter() - start
+            
+            last = position == len(self.tiers) - 1
+            accept = np.ones(len(pending), dtype=bool) if last else (
+                (tier_labels != UNKNOWN) & (tier_confidences >= self.thresholds.get(tier, 1.0))
+            )
+            labels[pending[accept]] = tier_labels[accept]
+            confidences[pending[accept]] = tier_confidences[accept]
+            with self._lock:
+                self.evaluated[tier] += len(pending)
+                self.resolved[tier] += int(accept.sum())
+                self.seconds[tier] += elapsed
+            pending = pending[~accept]
+        
+        return [
+            (self.labels[label] if 0 <= label < len(self.labels) else "Unknown", float(confidence))
+            for label, confidence in zip(labels, confidences)
+        ]
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            total = sum(self.resolved.values())
+            return {
+                "tiers": self.tiers,
+                "thresholds": {tier: self.thresholds.get(tier) for tier in self.tiers[:-1]},
+                "resolved": dict(self.resolved),
+                "resolved_share": {
+                    tier: round(count / total, 4) if total else 0.0 for tier, count in self.resolved.items()
+                },
+                "mean_tier_ms": {
+                    tier: round(1000 * self.seconds[tier] / self.evaluated[tier], 4) if self.evaluated[tier] else 0.0
+                    for tier in self.tiers
+                },
+            }
+
+
+def evaluate(data_path: Optional[str], tiers: List[str], thresholds: Dict[str, float], forest_trees: int) -> Dict:
+    """Replay a dataset through a cascade built from the current models"""
+    from dataset import read_landmarks
+    from recognition import LABELS, MODELS_DIR, ASLModel
+    
+    features, truth = read_landmarks(data_path)
+    
+    nn = ASLModel()
+    forest_path = os.path.join(MODELS_DIR, "asl_model.pkl")
+    forest = load_forest(forest_path, forest_trees) if os.path.exists(forest_path) else None
+    cascade = CascadeClassifier(LABELS, tiers, thresholds, forest,
+                                nn.model.predict_on_batch if nn.model_loaded else None)
+    
+    # Frame by frame, like live traffic without batching
+    answers = [cascade.predict_batch(row.reshape(1, -1))[0][0] for row in features]
+    accuracy = float(np.mean([answer == LABELS[label] for answer, label in zip(answers, truth)]))
+    return {"samples": len(features), "accuracy": round(accuracy, 4), **cascade.stats()}
+
+
+def main():
+    import config
+    
+    parser = argparse.ArgumentParser(description="Evaluate cascade thresholds on a dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ev = sub.add_parser("evaluate")
+    ev.add_argument("--data", help="Dataset directory or CSV (default: asl_dataset, else asl_data.csv)")
+    ev.add_argument("--tiers", default=",".join(config.CASCADE_TIERS))
+    ev.add_argument("--rules-threshold", type=float, default=config.CASCADE_THRESHOLDS["rules"])
+    ev.add_argument("--forest-threshold", type=float, default=config.CASCADE_THRESHOLDS["forest"])
+    ev.add_argument("--forest-trees", type=int, default=config.CASCADE_FOREST_TREES)
+    args = parser.parse_args()
+    
+    thresholds = {"rules": args.rules_threshold, "forest": args.forest_threshold}
+    print(json.dumps(evaluate(args.data, args.tiers.split(","), thresholds, args.forest_trees), indent=2))
+
+
+if __name__ == "__main__":
+    main()
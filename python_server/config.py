@@ -0,0 +1,122 @@
+# config.py
+"""Runtime settings for the ASL server, read from the environment (or a .env file)."""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def available_cores() -> int:
+    """Number of CPU cores this process is allowed to run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Windows / macOS
+        return os.cpu_count() or 1
+
+
+# Server processes started by `python main.py` (pre-forked uvicorn workers)
+SERVER_WORKERS = max(1, _env_int("ASL_SERVER_WORKERS", 1))
+HOST = os.getenv("ASL_HOST", "0.0.0.0")
+PORT = _env_int("ASL_PORT", 8000)
+# New WebSocket sessions beyond this many per worker are closed with code 1013; 0 disables
+MAX_CONNECTIONS_PER_WORKER = _env_int("ASL_MAX_CONNECTIONS_PER_WORKER", 0)
+# Name of the shared-memory metrics segment; set by main.py for its workers
+SHARED_STATS_NAME = os.getenv("ASL_SHARED_STATS", "")
+
+# Frame pipeline execution backend: "thread" or "process"
+EXECUTOR_BACKEND = os.getenv("ASL_EXECUTOR_BACKEND", "thread").strip().lower()
+# Server workers split the cores between their pools
+EXECUTOR_WORKERS = _env_int("ASL_EXECUTOR_WORKERS", max(1, available_cores() // SERVER_WORKERS))
+
+# Classifier engine: "numpy" (exported weights), "keras", or "auto" (numpy when exported)
+MODEL_BACKEND = os.getenv("ASL_MODEL_BACKEND", "auto").strip().lower()
+
+# "single" (the network alone) or "cascade" (rules -> RandomForest -> network by confidence)
+CLASSIFIER_MODE = os.getenv("ASL_CLASSIFIER_MODE", "single").strip().lower()
+CASCADE_TIERS = [t.strip() for t in os.getenv("ASL_CASCADE_TIERS", "rules,forest,nn").split(",") if t.strip()]
+CASCADE_THRESHOLDS = {
+    # The rules top out at 0.8 confidence, so by default they never answer alone
+    "rules": _env_float("ASL_CASCADE_RULES_THRESHOLD", 0.9),
+    "forest": _env_float("ASL_CASCADE_FOREST_THRESHOLD", 0.95),
+}
+CASCADE_FOREST_TREES = _env_int("ASL_CASCADE_FOREST_TREES", 50)  # 0 keeps every tree
+
+# Seconds between checks of models/versions for a new active version; 0 disables
+MODEL_WATCH_INTERVAL_S = _env_float("ASL_MODEL_WATCH_INTERVAL_S", 10.0)
+# Token required by the /admin endpoints; without it they only answer localhost
+ADMIN_TOKEN = os.getenv("ASL_ADMIN_TOKEN", "")
+
+# Cross-session micro-batching in front of ASLModel
+BATCHING_ENABLED = _env_bool("ASL_BATCHING", True)
+BATCH_MAX_SIZE = _env_int("ASL_BATCH_MAX_SIZE", 32)
+BATCH_MAX_WAIT_MS = _env_float("ASL_BATCH_MAX_WAIT_MS", 5.0)
+
+# Per-session hand trackers (per worker process with the process backend)
+TRACKER_POOL_SIZE = _env_int("ASL_TRACKER_POOL_SIZE", 16)
+TRACKER_IDLE_TIMEOUT_S = _env_float("ASL_TRACKER_IDLE_TIMEOUT_S", 60.0)
+
+# Frames waiting longer than this (ms) are dropped instead of processed; 0 disables
+MAX_FRAME_AGE_MS = _env_float("ASL_MAX_FRAME_AGE_MS", 500.0)
+
+# Quantized-landmark prediction cache: "global", "session" or "off" (opt-in)
+CACHE_SCOPE = os.getenv("ASL_CACHE_SCOPE", "off").strip().lower()
+CACHE_STEP = _env_float("ASL_CACHE_STEP", 0.25)
+CACHE_MAX_ENTRIES = _env_int("ASL_CACHE_MAX_ENTRIES", 4096)
+CACHE_SESSION_ENTRIES = _env_int("ASL_CACHE_SESSION_ENTRIES", 256)
+
+# Motion gating defaults (clients can override them per connection). Off unless configured: a gated
+# session gets earlier results back ("reused") for frames that barely changed; 1.0 / 0.003 are good starts
+GATE_FRAME_THRESHOLD = _env_float("ASL_GATE_FRAME_THRESHOLD", 0.0)  # mean gray-level difference; 0 disables
+GATE_LANDMARK_THRESHOLD = _env_float("ASL_GATE_LANDMARK_THRESHOLD", 0.0)  # mean landmark shift; 0 disables
+GATE_MAX_REUSE = _env_int("ASL_GATE_MAX_REUSE", 15)  # force a full pass after this many reused results
+
+# Synthetic frames every frame worker runs through decode, MediaPipe and predict before /ready turns 200
+WARMUP_FRAMES = max(0, _env_int("ASL_WARMUP_FRAMES", 2))
+
+# Add a per-stage "timings_ms" breakdown to every WebSocket response (clients can opt in with ?timings=1)
+RESPONSE_TIMINGS = _env_bool("ASL_RESPONSE_TIMINGS", False)
+
+# Frame preprocessing before MediaPipe
+DECODE_MAX_SIDE = _env_int("ASL_DECODE_MAX_SIDE", 640)  # decode larger JPEGs at 1/2, 1/4 or 1/8 scale; 0 disables
+ROI_CROP = _env_bool("ASL_ROI_CROP", True)  # detect only around the session's last hand, full frame on a miss
+ROI_MARGIN = _env_float("ASL_ROI_MARGIN", 0.5)  # crop margin on each side, as a fraction of the hand's size
+
+# Hands detected and classified per frame (clients can choose up to MAX_HANDS_LIMIT per connection)
+MAX_HANDS_LIMIT = max(1, _env_int("ASL_MAX_HANDS_LIMIT", 2))
+MAX_HANDS = min(max(1, _env_int("ASL_MAX_HANDS", 1)), MAX_HANDS_LIMIT)
+
+# Sequence mode: sliding-window recognition of motion signs (clients opt in with ?sequence=1)
+SEQUENCE_MODE = _env_bool("ASL_SEQUENCE", False)  # on for every new connection
+SEQUENCE_WINDOW = _env_int("ASL_SEQUENCE_WINDOW", 30)  # frames per window when the model doesn't say
+SEQUENCE_STRIDE = _env_int("ASL_SEQUENCE_STRIDE", 5)  # classify the window every k-th frame
+SEQUENCE_MIN_CONFIDENCE = _env_float("ASL_SEQUENCE_MIN_CONFIDENCE", 0.8)
+SEQUENCE_CONFIRMATIONS = _env_int("ASL_SEQUENCE_CONFIRMATIONS", 2)  # windows in a row before an event fires
+
+# POST /recognize: bulk recognition of uploaded videos and image batches
+RECOGNIZE_MAX_JOBS = _env_int("ASL_RECOGNIZE_MAX_JOBS", 1)  # concurrent jobs per worker; more get a 503
+RECOGNIZE_MAX_UPLOAD_MB = _env_int("ASL_RECOGNIZE_MAX_UPLOAD_MB", 512)
+RECOGNIZE_CHUNK_SIZE = _env_int("ASL_RECOGNIZE_CHUNK_SIZE", 32)  # frames per MediaPipe + predict_batch round
+
+# /asl-ws session recording for replay.py: "off", "opt-in" (clients ask with ?record=1) or "all"
+RECORDING = os.getenv("ASL_RECORDING", "off").strip().lower()
+RECORD_DIR = os.getenv("ASL_RECORD_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "session_recordings"))
+RECORD_SIZE_MB = _env_int("ASL_RECORD_SIZE_MB", 64)  # per session ring file; the oldest records are overwritten
+RECORD_MAX_TOTAL_MB = _env_int("ASL_RECORD_MAX_TOTAL_MB", 2048)  # all ring files in RECORD_DIR; 0 = no cap
@@ -0,0 +1,273 @@
+# dataset.py
+"""Columnar binary store for recorded hand landmarks.
+
+A dataset is a directory of raw little-endian column files plus a small JSON
+manifest:
+
+    asl_dataset/
+        meta.json          labels, committed row count, recording sessions
+        features.f32       (rows, 63) float32 landmark matrix
+        labels.i16         (rows,) int16 index into meta["labels"]
+        sessions.i32       (rows,) int32 recording session of each row
+        timestamps.f64     (rows,) float64 capture time (unix seconds)
+
+Appending a session only appends to the column files and then atomically
+replaces meta.json, so earlier samples are never rewritten and a crash
+mid-append leaves the previous row count in force. Columns open as read-only
+np.memmap views, so they go straight into train_test_split / fit without a
+parse or copy.
+
+Usage:
+    python dataset.py import asl_data.csv     # one-time import of the legacy CSV
+    python dataset.py export out.csv
+    python dataset.py info
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(BASE_DIR, "asl_dataset")
+# Recorded clips for the sequence model: one session per clip, frames in order, NaN rows without a hand
+SEQUENCE_DATASET_DIR = os.path.join(BASE_DIR, "asl_sequences")
+LEGACY_CSV = os.path.join(BASE_DIR, "asl_data.csv")
+
+FORMAT_VERSION = 1
+FEATURE_DIMS = 63
+CSV_COLUMNS = [f"landmark_{i}_{dim}" for i in range(21) for dim in ["x", "y", "z"]]
+
+# Column name -> (file name, dtype, values per row)
+COLUMNS = {
+    "features": ("features.f32", np.dtype("<f4"), FEATURE_DIMS),
+    "labels": ("labels.i16", np.dtype("<i2"), 1),
+    "sessions": ("sessions.i32", np.dtype("<i4"), 1),
+    "timestamps": ("timestamps.f64", np.dtype("<f8"), 1),
+}
+
+
+class LandmarkDataset:
+    """Append-only landmark dataset directory"""
+    
+    def __init__(self, path: str = DATASET_DIR):
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No landmark dataset at {path}")
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset format {self.meta.get('format_version')!r} in {path}")
+    
+    @classmethod
+    def create(cls, labels: Sequence[str], path: str = DATASET_DIR) -> "LandmarkDataset":
+        """Start an empty dataset whose label indices refer to labels"""
+        if os.path.exists(os.path.join(path, "meta.json")):
+            raise FileExistsError(f"A dataset already exists at {path}")
+        os.makedirs(path, exist_ok=True)
+        for file_name, _, _ in COLUMNS.values():
+            open(os.path.join(path, file_name), "wb").close()
+        _write_meta(path, {
+            "format_version": FORMAT_VERSION,
+            "feature_dims": FEATURE_DIMS,
+            "labels": list(labels),
+            "rows": 0,
+            "sessions": [],
+        })
+        return cls(path)
+    
+    @classmethod
+    def open_or_create(cls, labels: Sequence[str], path: str = DATASET_DIR,
+                       legacy_csv: Optional[str] = LEGACY_CSV) -> "LandmarkDataset":
+        """Open the dataset, creating it on first use (from the legacy CSV when there is one)"""
+        if os.path.exists(os.path.join(path, "meta.json")):
+            return cls(path)
+        dataset = cls.create(labels, path)
+        if legacy_csv and os.path.exists(legacy_csv):
+            dataset.import_csv(legacy_csv)
+        return dataset
+    
+    @property
+    def labels(self) -> List[str]:
+        return self.meta["labels"]
+    
+    @property
+    def sessions(self) -> List[Dict]:
+        return self.meta["sessions"]
+    
+    def __len__(self) -> int:
+        return self.meta["rows"]
+    
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memory map of one column (committed rows only)"""
+        file_name, dtype, width = COLUMNS[name]
+        rows = len(self)
+        shape = (rows, width) if width > 1 else (rows,)
+        if rows == 0:
+            return np.empty(shape, dtype)
+        return np.memmap(os.path.join(self.path, file_name), dtype=dtype, mode="r", shape=shape)
+    
+    @property
+    def features(self) -> np.ndarray:
+        return self.column("features")
+    
+    @property
+    def targets(self) -> np.ndarray:
+        return self.column("labels")
+    
+    def load(self, labels: Optional[Sequence[str]] = None) -> tuple[np.ndarray, np.ndarray]:
+        """(features, label indices), optionally only the rows of some labels.
+        
+        Without a label filter both are zero-copy memory maps.
+        """
+        features, targets = self.features, self.targets
+        if labels is None:
+            return features, targets
+        wanted = [self.labels.index(label) for label in labels]
+        mask = np.isin(targets, wanted)
+        return features[mask], targets[mask]
+    
+    def append(self, features: np.ndarray, labels: Sequence[int], source: str = "camera",
+               timestamps: Optional[Sequence[float]] = None, note: Optional[str] = None,
+               details: Optional[Dict] = None) -> int:
+        """Append one recording session of samples; returns its session id.
+        
+        details is stored with the session in meta.json (e.g. the files it came from).
+        """
+        features = np.ascontiguousarray(features, dtype=COLUMNS["features"][1]).reshape(-1, FEATURE_DIMS)
+        count = len(features)
+        labels = np.asarray(labels, dtype=COLUMNS["labels"][1]).reshape(-1)
+        if len(labels) != count:
+            raise ValueError(f"{count} feature rows but {len(labels)} labels")
+        if count and (labels.min() < 0 or labels.max() >= len(self.labels)):
+            raise ValueError(f"Label indices must be in 0..{len(self.labels) - 1}")
+        now = time.time()
+        timestamps = np.full(count, now) if timestamps is None else np.asarray(timestamps, dtype=np.float64)
+        
+        session_id = self.sessions[-1]["id"] + 1 if self.sessions else 0
+        rows = len(self)
+        values = {
+            "features": features,
+            "labels": labels,
+            "sessions": np.full(count, session_id),
+            "timestamps": timestamps,
+        }
+        for name, (file_name, dtype, width) in COLUMNS.items():
+            with open(os.path.join(self.path, file_name), "r+b") as f:
+                # Drop bytes of an append that crashed before its meta.json was written
+                f.truncate(rows * width * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(values[name], dtype=dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        
+        meta = dict(self.meta)
+        meta["rows"] = rows + count
+        meta["sessions"] = self.sessions + [{
+            "id": session_id,
+            "source": source,
+            "created_at": now,
+            "first_row": rows,
+            "rows": count,
+            "label_counts": {self.labels[i]: int(n) for i, n in zip(*np.unique(labels, return_counts=True))},
+            **({"note": note} if note else {}),
+            **(details or {}),
+        }]
+        _write_meta(self.path, meta)
+        self.meta = meta
+        return session_id
+    
+    def import_csv(self, csv_path: str) -> int:
+        """Append the rows of an asl_data.csv-style file as one session"""
+        features, labels = read_csv(csv_path)
+        return self.append(features, labels, source="csv", note=os.path.basename(csv_path))
+    
+    def export_csv(self, csv_path: str, labels: Optional[Sequence[str]] = None):
+        """Write the dataset in the legacy asl_data.csv layout"""
+        import pandas as pd
+        features, targets = self.load(labels)
+        df = pd.DataFrame(np.asarray(features), columns=CSV_COLUMNS)
+        df["label"] = np.asarray(targets)
+        df.to_csv(csv_path, index=False)
+    
+    def info(self) -> Dict:
+        targets = self.targets
+        return {
+            "path": self.path,
+            "rows": len(self),
+            "labels": {label: int((targets == i).sum()) for i, label in enumerate(self.labels)},
+            "sessions": len(self.sessions),
+            "bytes": sum(
+                os.path.getsize(os.path.join(self.path, file_name)) for file_name, _, _ in COLUMNS.values()
+            ),
+        }
+
+
+def read_csv(csv_path: str) -> tuple[np.ndarray, np.ndarray]:
+    """(features, labels) from a CSV with 63 landmark columns and a "label" column"""
+    import pandas as pd
+    data = pd.read_csv(csv_path)
+    labels = data.pop("label").to_numpy()
+    return data.to_numpy(dtype=np.float32), labels
+
+
+def default_data_path() -> str:
+    """The binary dataset when there is one, otherwise the legacy CSV"""
+    return DATASET_DIR if os.path.exists(os.path.join(DATASET_DIR, "meta.json")) else LEGACY_CSV
+
+
+def read_landmarks(path: Optional[str] = None) -> tuple[np.ndarray, np.ndarray]:
+    """(features, label indices) from a dataset directory or a CSV file"""
+    path = path or default_data_path()
+    if os.path.isdir(path):
+        return LandmarkDataset(path).load()
+    return read_csv(path)
+
+
+def _write_meta(path: str, meta: Dict):
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the binary landmark dataset")
+    parser.add_argument("--dataset", default=DATASET_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    imp = sub.add_parser("import", help="Append a CSV (e.g. the legacy asl_data.csv) as a new session")
+    imp.add_argument("csv", nargs="?", default=LEGACY_CSV)
+    imp.add_argument("--labels", nargs="+", help="Label names when creating the dataset (default: the server's)")
+    
+    exp = sub.add_parser("export", help="Write the dataset as CSV")
+    exp.add_argument("csv")
+    exp.add_argument("--labels", nargs="+", help="Only these labels")
+    
+    sub.add_parser("info", help="Row, label and session counts")
+    args = parser.parse_args()
+    
+    if args.command == "import":
+        if os.path.exists(os.path.join(args.dataset, "meta.json")):
+            dataset = LandmarkDataset(args.dataset)
+        else:
+            if args.labels is None:
+                from recognition import LABELS
+                args.labels = LABELS
+            dataset = LandmarkDataset.create(args.labels, args.dataset)
+        session = dataset.import_csv(args.csv)
+        print(f"📥 Imported {dataset.sessions[-1]['rows']} rows from {args.csv} as session {session}")
+    elif args.command == "export":
+        LandmarkDataset(args.dataset).export_csv(args.csv, args.labels)
+        print(f"📤 Exported to {args.csv}")
+    else:
+        print(json.dumps(LandmarkDataset(args.dataset).info(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
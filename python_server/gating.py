@@ -0,0 +1,120 @@
+# gating.py
+"""Motion gating: reuse the previous result when a session's hand hasn't moved.
+
+Two levels, both per connection:
+
+1. Before the full decode, a grayscale thumbnail of the JPEG (decoded at 1/8
+   scale) is compared with the thumbnail of the last fully processed frame.
+   If the mean absolute pixel difference is below frame_threshold, decode,
+   MediaPipe and classification are all skipped.
+2. After landmark extraction, if the mean landmark displacement from the last
+   classified frame is below landmark_threshold, classification is skipped.
+
+At most max_reuse results in a row are reused, so slow drift is still caught.
+"""
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+import config
+
+SIGNATURE_SIZE = (32, 24)  # width, height
+
+
+def frame_signature(jpeg: np.ndarray) -> Optional[np.ndarray]:
+    """Tiny grayscale thumbnail of a JPEG, decoded at reduced scale"""
+    thumbnail = cv2.imdecode(jpeg, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if thumbnail is None:
+        return None
+    return cv2.resize(thumbnail, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def signature_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute difference between two thumbnails, in gray levels"""
+    return float(cv2.absdiff(a, b).mean())
+
+
+def landmark_displacement(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean per-landmark distance (normalized image units) between two feature vectors"""
+    return float(np.linalg.norm((a - b).reshape(-1, 3), axis=1).mean())
+
+
+class MotionGate:
+    """Per-session gating state and thresholds"""
+    
+    SETTINGS = ("frame_threshold", "landmark_threshold", "max_reuse")
+    
+    def __init__(self):
+        self.frame_threshold = config.GATE_FRAME_THRESHOLD
+        self.landmark_threshold = config.GATE_LANDMARK_THRESHOLD
+        self.max_reuse = config.GATE_MAX_REUSE
+        self.reference_signature: Optional[np.ndarray] = None
+        self.last_features: Optional[np.ndarray] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.reused_in_row = 0
+        self.frames_reused = 0
+        self.classifications_skipped = 0
+    
+    def configure(self, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply per-connection overrides, rejecting unknown keys and bad values"""
+        unknown = set(settings) - set(self.SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown gating settings: {sorted(unknown)}")
+        values = {}
+        for name, value in settings.items():
+            value = int(value) if name == "max_reuse" else float(value)
+            if value < 0:
+                raise ValueError(f"Gating setting '{name}' must be >= 0")
+            values[name] = value
+        for name, value in values.items():
+            setattr(self, name, value)
+        return self.settings()
+    
+    def settings(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.SETTINGS}
+    
+    @property
+    def can_reuse(self) -> bool:
+        return self.last_result is not None and self.reused_in_row < self.max_reuse
+    
+    def frame_gate(self) -> tuple[Optional[np.ndarray], float]:
+        """Reference thumbnail (None when reuse isn't allowed) and threshold to hand to the worker"""
+        if self.frame_threshold <= 0:
+            return None, 0.0
+        return (self.reference_signature if self.can_reuse else None), self.frame_threshold
+    
+    def landmarks_unchanged(self, features: np.ndarray) -> bool:
+        """True when the frame's hands (same count) barely moved since the last classified frame"""
+        return (
+            self.landmark_threshold > 0
+            and self.can_reuse
+            and self.last_features is not None
+            and self.last_features.shape == features.shape
+            and self.last_result.get("gesture") not in (None, "None")
+            and landmark_displacement(features, self.last_features) < self.landmark_threshold
+        )
+    
+    def reuse_frame(self) -> Dict[str, Any]:
+        """Result for a frame skipped at the thumbnail stage"""
+        self.reused_in_row += 1
+        self.frames_reused += 1
+        return {**self.last_result, "reused": "frame"}
+    
+    def reuse_classification(self) -> List[tuple[str, float]]:
+        """Gesture of every hand for a frame whose landmarks barely moved"""
+        self.reused_in_row += 1
+        self.classifications_skipped += 1
+        if "hands" in self.last_result:
+            return [(hand["gesture"], hand["confidence"]) for hand in self.last_result["hands"]]
+        return [(self.last_result["gesture"], self.last_result["confidence"])]
+    
+    def remember(self, result: Dict[str, Any], signature: Optional[np.ndarray],
+                 features: Optional[np.ndarray], reused: bool):
+        """Record a processed frame; only fresh results reset the reuse budget"""
+        if signature is not None:
+            self.reference_signature = signature
+        if not reused:
+            self.reused_in_row = 0
+            self.last_features = features
+        self.last_result = result
@@ -0,0 +1,292 @@
+# ingest.py
+"""Offline landmark extraction from directories of labeled videos and images.
+
+Sources are laid out one directory per label (the name is matched loosely,
+so "i_love_you/" or "I Love You/" both mean "I Love You"):
+
+    recordings/
+        hello/clip1.mp4, clip2.mov, ...
+        thank_you/img_001.jpg, ...
+
+Every file is processed by a worker of a process pool that owns its own
+MediaPipe instances; videos are read and tracked frame by frame, images are
+run through static detection. Each file's landmarks are cached under the
+SHA-256 of its contents (and the extraction settings), so a re-run only
+extracts new or changed files, and files already in the dataset are never
+appended twice. New samples go straight into the binary training dataset as
+one session.
+
+With --sequences every video becomes one clip of the sequence model's dataset
+instead (its own session, frames in order, NaN rows where no hand was found).
+
+Usage:
+    python ingest.py recordings/ [--every 2] [--mirror] [--workers 4]
+    python ingest.py clips/ --label Hello
+    python ingest.py motion_clips/ --sequences
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import available_cores
+from dataset import DATASET_DIR, FEATURE_DIMS, LEGACY_CSV, SEQUENCE_DATASET_DIR, LandmarkDataset
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+# Bump when extraction changes in a way that invalidates cached landmarks
+EXTRACTOR_VERSION = 1
+# Same thresholds train_model.py records with
+MIN_DETECTION_CONFIDENCE = 0.7
+MIN_TRACKING_CONFIDENCE = 0.7
+
+_HASH_CHUNK = 1 << 20
+
+# Per worker process: one tracking instance for videos, one static instance for images
+_worker_hands: Dict[bool, object] = {}
+
+
+def _hands(static_image_mode: bool):
+    hands = _worker_hands.get(static_image_mode)
+    if hands is None:
+        import mediapipe as mp
+        hands = mp.solutions.hands.Hands(
+            static_image_mode=static_image_mode,
+            max_num_hands=1,
+            min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=MIN_TRACKING_CONFIDENCE
+        )
+        _worker_hands[static_image_mode] = hands
+    return hands
+
+
+def _landmarks(image: np.ndarray, hands, mirror: bool) -> Optional[np.ndarray]:
+    import cv2
+    if mirror:
+        image = cv2.flip(image, 1)
+    results = hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    if not results.multi_hand_landmarks:
+        return None
+    return np.array([[lm.x, lm.y, lm.z] for lm in results.multi_hand_landmarks[0].landmark],
+                    dtype=np.float32).reshape(-1)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_key(every: int, mirror: bool) -> str:
+    settings = {
+        "version": EXTRACTOR_VERSION, "every": every, "mirror": mirror,
+        "detection": MIN_DETECTION_CONFIDENCE, "tracking": MIN_TRACKING_CONFIDENCE,
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:10]
+
+
+def extract_video(path: str, every: int, mirror: bool) -> tuple[np.ndarray, np.ndarray]:
+    """Landmarks of every `every`-th frame with a hand, read one frame at a time"""
+    import cv2
+    hands = _hands(static_image_mode=False)
+    # A new clip must not continue tracking the previous clip's hand
+    hands.reset()
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video {path}")
+    features, frames = [], []
+    index = 0
+    try:
+        # grab() skips frames without converting them
+        while capture.grab():
+            if index % every == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    landmarks = _landmarks(frame, hands, mirror)
+                    if landmarks is not None:
+                        features.append(landmarks)
+                        frames.append(index)
+            index += 1
+    finally:
+        capture.release()
+    return np.array(features, dtype=np.float32).reshape(-1, FEATURE_DIMS), np.array(frames, dtype=np.int32)
+
+
+def extract_image(path: str, mirror: bool) -> tuple[np.ndarray, np.ndarray]:
+    import cv2
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Cannot read image {path}")
+    landmarks = _landmarks(image, _hands(static_image_mode=True), mirror)
+    if landmarks is None:
+        return np.empty((0, FEATURE_DIMS), np.float32), np.empty(0, np.int32)
+    return landmarks.reshape(1, -1), np.zeros(1, np.int32)
+
+
+def process_file(path: str, cache_dir: str, every: int, mirror: bool) -> Dict:
+    """Worker task: hash a file, then load its landmarks from the cache or extract and cache them"""
+    started = time.perf_counter()
+    content_hash = file_hash(path)
+    cache_path = os.path.join(cache_dir, f"{content_hash}-{settings_key(every, mirror)}.npz")
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            features, frames = cached["features"], cached["frames"]
+        cached = True
+    else:
+        if os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS:
+            features, frames = extract_video(path, every, mirror)
+        else:
+            features, frames = extract_image(path, mirror)
+        # Written under a temporary name so an interrupted run never leaves a truncated entry
+        tmp_path = f"{cache_path[:-4]}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, features=features, frames=frames)
+        os.replace(tmp_path, cache_path)
+        cached = False
+    return {
+        "path": path,
+        "hash": content_hash,
+        "features": features,
+        "frames": frames,
+        "cached": cached,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def to_clip(features: np.ndarray, frames: np.ndarray, every: int) -> np.ndarray:
+    """A video's landmarks as consecutive sampled frames, NaN where no hand was found"""
+    clip = np.full((frames[-1] // every + 1, FEATURE_DIMS), np.nan, dtype=np.float32)
+    clip[frames // every] = features
+    return clip
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.replace("_", " ").replace("-", " ").lower().split())
+
+
+def find_sources(root: str, labels: List[str], label: Optional[str] = None) -> List[tuple[str, int]]:
+    """(path, label index) of every video and image under root"""
+    by_name = {_normalize(name): i for i, name in enumerate(labels)}
+    if label is not None and _normalize(label) not in by_name:
+        raise ValueError(f"Unknown label '{label}' (expected one of {labels})")
+    sources = []
+    for directory, _, files in sorted(os.walk(root)):
+        if label is not None:
+            index = by_name[_normalize(label)]
+        else:
+            relative = os.path.relpath(directory, root)
+            top = relative.split(os.sep)[0]
+            index = by_name.get(_normalize(top)) if relative != "." else None
+            if index is None:
+                if files and relative != ".":
+                    logger.warning(f"⚠️ Skipping {directory}: '{top}' is not a label")
+                continue
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS | IMAGE_EXTENSIONS:
+                sources.append((os.path.join(directory, name), index))
+    return sources
+
+
+def ingest(root: str, dataset_path: Optional[str] = None, label: Optional[str] = None, every: int = 1,
+           mirror: bool = False, workers: int = 0, dry_run: bool = False, sequences: bool = False) -> Dict:
+    from recognition import LABELS
+    
+    dataset_path = dataset_path or (SEQUENCE_DATASET_DIR if sequences else DATASET_DIR)
+    dataset = LandmarkDataset.open_or_create(LABELS, dataset_path, legacy_csv=None if sequences else LEGACY_CSV)
+    sources = find_sources(root, dataset.labels, label)
+    if sequences:
+        # Only videos have an order to learn from
+        sources = [(path, index) for path, index in sources
+                   if os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS]
+    already = {h for session in dataset.sessions for h in session.get("files", {})}
+    cache_dir = os.path.join(dataset.path, "ingest_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    
+    workers = workers or available_cores()
+    features, targets, files = [], [], {}
+    clips = []  # (clip, label index, hash) with --sequences
+    report = {"files": len(sources), "extracted": 0, "cached": 0, "already_in_dataset": 0,
+              "failed": 0, "samples": 0, "frames_per_label": {}}
+    started = time.perf_counter()
+    # spawn: MediaPipe is not fork-safe; every worker builds its own graphs on first use
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(process_file, path, cache_dir, every, mirror): (path, index)
+                   for path, index in sources}
+        for future in as_completed(futures):
+            path, index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                report["failed"] += 1
+                logger.error(f"❌ {path}: {e}")
+                continue
+            report["cached" if result["cached"] else "extracted"] += 1
+            if result["hash"] in already or result["hash"] in files:
+                report["already_in_dataset"] += 1
+                continue
+            count = len(result["features"])
+            print(f"{'♻️' if result['cached'] else '🎞️'} {os.path.relpath(path, root)}: "
+                  f"{count} samples ({result['seconds']:.1f} s)")
+            files[result["hash"]] = os.path.relpath(path, root)
+            if sequences:
+                if count:
+                    clips.append((to_clip(result["features"], result["frames"], every), index, result["hash"]))
+            else:
+                features.append(result["features"])
+                targets.append(np.full(count, index, dtype=np.int16))
+            name = dataset.labels[index]
+            report["frames_per_label"][name] = report["frames_per_label"].get(name, 0) + count
+    
+    report["samples"] = int(sum(len(f) for f in features))
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    if sequences:
+        report["clips"] = len(clips)
+        report["samples"] = int(sum(len(clip) for clip, _, _ in clips))
+        if not dry_run:
+            for clip, index, content_hash in clips:
+                dataset.append(clip, np.full(len(clip), index, dtype=np.int16), source="ingest-sequence",
+                               note=files[content_hash], details={"files": {content_hash: files[content_hash]},
+                                                                  "every": every, "mirror": mirror})
+    elif files and not dry_run:
+        session = dataset.append(
+            np.concatenate(features), np.concatenate(targets), source="ingest", note=os.path.abspath(root),
+            details={"files": files, "every": every, "mirror": mirror}
+        )
+        report["session"] = session
+    report["dataset_rows"] = len(dataset)
+    return report
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Extract hand landmarks from labeled videos and images")
+    parser.add_argument("root", help="Directory with one sub-directory per label (or any layout with --label)")
+    parser.add_argument("--label", help="Use this label for every file under root")
+    parser.add_argument("--every", type=int, default=1, help="Use every N-th video frame")
+    parser.add_argument("--mirror", action="store_true",
+                        help="Flip frames horizontally, like train_model.py's webcam capture")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: available cores)")
+    parser.add_argument("--dataset", help="Dataset directory (default: asl_dataset, or asl_sequences with --sequences)")
+    parser.add_argument("--sequences", action="store_true",
+                        help="Add every video as one clip for the sequence model instead of loose samples")
+    parser.add_argument("--dry-run", action="store_true", help="Extract and cache, but don't append")
+    args = parser.parse_args()
+    
+    report = ingest(args.root, args.dataset, args.label, max(1, args.every), args.mirror, args.workers, args.dry_run,
+                    args.sequences)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
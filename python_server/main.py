@@ -1,256 +1,791 @@
 # enhanced_main.py
+import asyncio
 import base64
-import cv2
-import numpy as np
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-import mediapipe as mp
-import asyncio
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import importlib
 import json
 import logging
+import numpy as np
 import os
-import tensorflow as tf
 from typing import Dict, List, Optional
 import time
 
+import config
+from batch_recognition import BatchRecognizer, UploadError, spool_upload
+from batching import PredictionBatcher
+from protocol import BINARY_SUBPROTOCOL, KIND_LANDMARKS, decode_binary_frame, negotiate_protocol
+from gating import MotionGate
+from metrics import FrameTimer, PipelineMetrics
+from model_registry import registry
+from prediction_cache import CacheCounters, PredictionCache
+from recording import SessionRecorder
+from recognition import LABELS, active_model, get_model, landmarks_to_dicts, predict_batch_versioned
+from sequences import SequenceRecognizer
+from session import ASLSession
+from shared_stats import SharedStats
+from startup import StartupTracker
+from workers import (
+    FrameExecutor, activate_model_version, apply_predictions, classify_batch, classify_features, classify_sequence,
+    close_session, extract_batch, process_frame, tracker_stats, warm_up_pipeline
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="ASL Translation Server")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_server()
+    if batcher is not None:
+        batcher.start()
+    watcher = asyncio.create_task(watch_model_versions()) if config.MODEL_WATCH_INTERVAL_S > 0 else None
+    publisher = asyncio.create_task(publish_gauges()) if shared_stats is not None else None
+    # Heavy imports, model loading and warm-up run behind /ready instead of blocking the import
+    starter = asyncio.create_task(start_up())
+    yield
+    for task in (starter, watcher, publisher):
+        if task is not None:
+            task.cancel()
+    if batcher is not None:
+        await batcher.stop()
+    frame_executor.shutdown()
+    if shared_stats is not None:
+        shared_stats.close()
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Routes are collected here and mounted by create_app()
+router = APIRouter()
 
-# Initialize MediaPipe Hands with optimized settings
-mp_hands = mp.solutions.hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.5,
-    model_complexity=1  # 0=lite, 1=full, 2=heavy
-)
+def create_app() -> FastAPI:
+    """The server app; uvicorn builds it in every server worker (main:create_app with factory=True)"""
+    app = FastAPI(title="ASL Translation Server", lifespan=lifespan)
+    
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+    return app
 
-mp_drawing = mp.solutions.drawing_utils
+# Loading the model and warming up the pipeline are phases of start_up(), run once the app is serving
+startup = StartupTracker()
 
-# ASL Labels
-LABELS = ["Yes", "No", "I Love You", "Hello", "Thank You"]
+# Built by start_server() once the app is served, never at import: spawned frame-pool
+# processes re-import this module and must not build pools or claim stats rows of their own
+frame_executor: Optional[FrameExecutor] = None
+batcher: Optional[PredictionBatcher] = None
+shared_stats: Optional[SharedStats] = None
 
-class ASLModel:
-    def __init__(self):
-        self.model = None
-        self.model_loaded = False
-        self.load_model()
-    
-    def load_model(self):
-        """Load TensorFlow model with fallback to rule-based"""
-        try:
-            model_path = os.path.join(os.path.dirname(__file__), 'models', 'asl_model_tf')
-            if os.path.exists(model_path):
-                self.model = tf.keras.models.load_model(model_path)
-                self.model_loaded = True
-                logger.info("✅ TensorFlow model loaded successfully")
-            else:
-                logger.warning("⚠️ Model not found, using rule-based classification")
-        except Exception as e:
-            logger.error(f"❌ Failed to load model: {e}")
-            self.model_loaded = False
-    
-    def predict(self, features: np.ndarray) -> tuple[str, float]:
-        """Predict ASL gesture from hand landmarks"""
-        if self.model_loaded and self.model is not None:
+# Quantized-landmark prediction cache: one shared cache, or one per session
+cache_counters = CacheCounters()
+global_cache = PredictionCache(
+    config.CACHE_MAX_ENTRIES, config.CACHE_STEP, cache_counters
+) if config.CACHE_SCOPE == "global" else None
+
+def create_session_cache() -> Optional[PredictionCache]:
+    if config.CACHE_SCOPE == "session":
+        return PredictionCache(config.CACHE_SESSION_ENTRIES, config.CACHE_STEP, cache_counters)
+    return global_cache
+
+# Stage histograms and counters behind /metrics; with several server workers they
+# live in this worker's row of a shared-memory table so any worker can report totals
+SHARED_STATS_ROWS = 2 * config.SERVER_WORKERS  # spare rows for restarted workers
+pipeline_metrics = PipelineMetrics(LABELS)
+
+# Workers classify frames themselves only when nothing in this process needs the features
+CLASSIFY_IN_WORKER = not config.BATCHING_ENABLED and config.CACHE_SCOPE not in ("global", "session")
+
+# Bulk /recognize jobs run next to the WebSocket pipeline; beyond this many they are turned away
+recognize_slots = asyncio.Semaphore(max(1, config.RECOGNIZE_MAX_JOBS))
+
+def start_server():
+    """Build this server worker's frame pool, batcher and shared metrics row (from the lifespan)"""
+    global frame_executor, batcher, shared_stats, pipeline_metrics
+    # Decode, MediaPipe and classification run in a worker pool, off the event loop
+    frame_executor = FrameExecutor(config.EXECUTOR_BACKEND, config.EXECUTOR_WORKERS)
+    # Predictions from all sessions share batched forward passes
+    batcher = PredictionBatcher(
+        predict_batch_versioned, config.BATCH_MAX_SIZE, config.BATCH_MAX_WAIT_MS
+    ) if config.BATCHING_ENABLED else None
+    if config.SHARED_STATS_NAME:
+        shared_stats = SharedStats.attach(config.SHARED_STATS_NAME, SHARED_STATS_ROWS, pipeline_metrics.layout.size)
+        pipeline_metrics = PipelineMetrics(LABELS, shared_stats.claim(pipeline_metrics.layout.gauge_columns))
+
+async def reload_model(version: Optional[str] = None) -> dict:
+    """Load and warm up a model version in the background, then swap it in"""
+    info = await asyncio.to_thread(registry.activate, version)
+    # Worker processes classify in-worker frames and every sequence window; they swap on their own threads
+    if frame_executor.backend == "process":
+        await frame_executor.run_on_all(activate_model_version, info["version"])
+    return info
+
+async def watch_model_versions():
+    """Pick up newly published model versions without a restart"""
+    while True:
+        await asyncio.sleep(config.MODEL_WATCH_INTERVAL_S)
+        if registry.has_pending_change():
             try:
-                features_reshaped = features.reshape(1, -1)
-                predictions = self.model.predict(features_reshaped, verbose=0)
-                confidence = float(np.max(predictions))
-                predicted_class = int(np.argmax(predictions))
-                gesture = LABELS[predicted_class] if predicted_class < len(LABELS) else "Unknown"
-                return gesture, confidence
+                await reload_model()
             except Exception as e:
-                logger.error(f"Model prediction error: {e}")
-                return self.rule_based_prediction(features)
-        else:
-            return self.rule_based_prediction(features)
-    
-    def rule_based_prediction(self, features: np.ndarray) -> tuple[str, float]:
-        """Fallback rule-based gesture recognition"""
-        # Convert flattened features back to landmarks
-        landmarks = features.reshape(21, 3)
-        
-        # Extract key points
-        wrist = landmarks[0]
-        thumb_tip = landmarks[4]
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        ring_tip = landmarks[16]
-        pinky_tip = landmarks[20]
-        
-        # Simple rule-based classification
-        fingers_up = []
-        fingers_up.append(thumb_tip[1] < landmarks[3][1])  # Thumb
-        fingers_up.append(index_tip[1] < landmarks[6][1])  # Index
-        fingers_up.append(middle_tip[1] < landmarks[10][1])  # Middle
-        fingers_up.append(ring_tip[1] < landmarks[14][1])  # Ring
-        fingers_up.append(pinky_tip[1] < landmarks[18][1])  # Pinky
-        
-        fingers_up_count = sum(fingers_up)
-        
-        if fingers_up_count == 5:
-            return "Hello", 0.8
-        elif fingers_up_count == 2 and fingers_up[1] and fingers_up[4]:
-            return "I Love You", 0.8
-        elif fingers_up_count == 1 and fingers_up[0]:
-            return "Yes", 0.7
-        elif fingers_up_count == 2 and fingers_up[1] and fingers_up[2]:
-            return "No", 0.7
-        elif fingers_up_count == 0:
-            return "Thank You", 0.6
-        else:
-            return "Unknown", 0.3
+                logger.error(f"Model reload failed: {e}")
 
-# Initialize model
-asl_model = ASLModel()
+async def start_up():
+    """Import MediaPipe, load the active model version and warm up every frame worker, then report ready"""
+    try:
+        with startup.track("imports"):
+            await asyncio.to_thread(importlib.import_module, "mediapipe")
+        with startup.track("model"):
+            # get_model() holds the lock a concurrent first use would wait on
+            model = await asyncio.to_thread(get_model)
+        startup.details["model"] = {
+            "version": model.version, "backend": model.backend,
+            **{key: registry.active_info.get(key) for key in ("load_ms", "warmup_ms")}
+        }
+        with startup.track("warmup"):
+            # Detection graphs are per thread, so every pool thread warms up its own
+            stages = await frame_executor.run_on_every_thread(warm_up_pipeline, config.WARMUP_FRAMES)
+        # The slowest worker per stage; with process workers each one loaded its own model
+        startup.details["warmup_stages_ms"] = {
+            stage: max(worker.get(stage, 0.0) for worker in stages) for stage in stages[0]
+        }
+        startup.mark_ready()
+    except Exception as e:
+        # A failed phase has already logged and recorded itself; anything else fails the startup here
+        if startup.state != "failed":
+            logger.exception(f"❌ Startup failed: {e}")
+            startup.fail(str(e))
+
+def update_local_gauges():
+    pipeline_metrics.set("pending_frames", sum(session.slot.pending for session in manager.sessions.values()))
+    pipeline_metrics.set("batch_queue_depth", batcher.queue_depth if batcher is not None else 0)
+
+async def publish_gauges():
+    """Keep this worker's gauges in the shared table fresh for scrapes served by other workers"""
+    while True:
+        update_local_gauges()
+        await asyncio.sleep(1.0)
+
+def metrics_totals():
+    """This worker's metric values, or the sum over all workers in multi-worker mode"""
+    update_local_gauges()
+    if shared_stats is None:
+        return pipeline_metrics.values
+    return shared_stats.totals(pipeline_metrics.layout.gauge_columns)
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, max_connections: int = 0):
         self.active_connections: List[WebSocket] = []
+        self.sessions: Dict[WebSocket, ASLSession] = {}
+        self.max_connections = max_connections
     
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, session: ASLSession) -> bool:
+        """Accept a session, or close it with 1013 (try again later) when this worker is full"""
+        if self.max_connections and len(self.active_connections) >= self.max_connections:
+            await websocket.accept(subprotocol=session.protocol)
+            await websocket.send_json({"error": "Server is at capacity, try again later"})
+            await websocket.close(code=1013, reason="Server at capacity")
+            pipeline_metrics.add("connections_rejected")
+            logger.warning(f"⚠️ Connection rejected: {len(self.active_connections)} of {self.max_connections} in use")
+            return False
+        # Counted before the accept so concurrent handshakes can't overshoot the cap
         self.active_connections.append(websocket)
-        logger.info(f"📱 Client connected. Total connections: {len(self.active_connections)}")
+        self.sessions[websocket] = session
+        pipeline_metrics.add("active_connections")
+        try:
+            await websocket.accept(subprotocol=session.protocol)
+        except Exception:
+            self.disconnect(websocket)
+            raise
+        logger.info(f"📱 Client connected ({session.protocol or 'legacy json'}). Total connections: {len(self.active_connections)}")
+        return True
     
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+            pipeline_metrics.add("active_connections", -1)
+        self.sessions.pop(websocket, None)
         logger.info(f"📱 Client disconnected. Total connections: {len(self.active_connections)}")
 
-manager = ConnectionManager()
+manager = ConnectionManager(config.MAX_CONNECTIONS_PER_WORKER)
 
-def extract_hand_landmarks(image: np.ndarray) -> tuple[Optional[np.ndarray], List[Dict], bool]:
-    """Extract hand landmarks from image using MediaPipe"""
-    try:
-        # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = mp_hands.process(rgb_image)
+# Frames are base64 JPEGs; anything this short is a control message candidate
+CONTROL_MESSAGE_MAX_LENGTH = 4096
+
+async def classify(session: ASLSession, features) -> tuple[str, float]:
+    """Predict a gesture through the cache, then the batcher or the worker pool"""
+    return (await classify_hands(session, [features]))[0]
+
+async def classify_hands(session: ASLSession, features) -> List[tuple[str, float]]:
+    """Predict the gestures of every hand of a frame; cache misses share one batched forward pass"""
+    cache = session.cache
+    # Read once per frame; cache keys are namespaced by model version so a hot-swap never serves stale answers
+    version = get_model().version if cache is not None else None
+    predictions: List[Optional[tuple[str, float]]] = [None] * len(features)
+    keys = [None] * len(features)
+    missing = []
+    for i, hand in enumerate(features):
+        if cache is not None:
+            keys[i] = cache.key(hand, version)
+            predictions[i] = cache.get(keys[i])
+        if predictions[i] is None:
+            missing.append(i)
+    if not missing:
+        return predictions
+    
+    # Every prediction comes back with the version of the model that made it
+    if batcher is not None:
+        fresh = await batcher.predict_many(np.stack([features[i] for i in missing]))
+    elif len(missing) == 1:
+        fresh = [await frame_executor.run(classify_features, features[missing[0]])]
+    else:
+        used, batch = await frame_executor.run(classify_batch, np.stack([features[i] for i in missing]))
+        fresh = [(used, prediction) for prediction in batch]
+    
+    for i, (used, prediction) in zip(missing, fresh):
+        predictions[i] = prediction
+        if cache is not None:
+            # A model swapped in since the lookup made this one: it belongs under that version's key
+            cache.put(keys[i] if used == version else cache.key(features[i], used), prediction)
+    return predictions
+
+async def run_frame_pipeline(jpeg, session: ASLSession, timer: FrameTimer) -> dict:
+    """Decode, extract hand landmarks and predict gesture in the worker pool"""
+    gate = session.gate
+    reference_signature, frame_threshold = gate.frame_gate()
+    # Landmark gating and sequence mode need the features back in this process
+    classify_in_worker = CLASSIFY_IN_WORKER and gate.landmark_threshold <= 0 and session.sequence is None
+    result = await frame_executor.run(
+        process_frame, jpeg, classify_in_worker, session.session_id, reference_signature, frame_threshold,
+        session.roi, session.max_hands, key=session.session_id
+    )
+    timer.add_remote(result.pop("timings", None))
+    if result.get("reused") == "frame":
+        result = gate.reuse_frame()
+        await observe_sequence(session, result, None, timer, repeat=True)
+        return result
+    if "error" in result:
+        return result
+    
+    session.roi = result.pop("roi", None)
+    signature = result.pop("signature", None)
+    features = result.pop("features", None)
+    reused = False
+    if features is not None:
+        if gate.landmarks_unchanged(features):
+            apply_predictions(result, gate.reuse_classification())
+            reused = True
+        else:
+            apply_predictions(result, await classify_hands(session, features))
+            timer.lap("predict")
+    
+    result["reused"] = "landmarks" if reused else False
+    gate.remember(result, signature, features, reused)
+    await observe_sequence(session, result, features[0] if features is not None else None, timer)
+    return result
+
+async def run_landmarks_pipeline(features, session: ASLSession, timer: FrameTimer) -> dict:
+    """Classify client-side landmarks, skipping image decode and MediaPipe"""
+    gate = session.gate
+    reused = gate.landmarks_unchanged(features)
+    if reused:
+        gesture, confidence = gate.reuse_classification()[0]
+    else:
+        gesture, confidence = await classify(session, features)
+        timer.lap("predict")
+    result = {
+        "hand_detected": True,
+        "landmarks": landmarks_to_dicts(features),
+        "gesture": gesture,
+        "confidence": confidence,
+        "reused": "landmarks" if reused else False
+    }
+    gate.remember(result, None, features, reused)
+    await observe_sequence(session, result, features, timer)
+    return result
+
+async def observe_sequence(session: ASLSession, result: dict, features, timer: FrameTimer, repeat: bool = False):
+    """Feed a frame's (first) hand to the session's sequence window and attach any gesture event"""
+    # A result reused from the previous frame must not repeat its event
+    result.pop("sequence_event", None)
+    recognizer = session.sequence
+    if recognizer is None or not recognizer.observe(features, repeat):
+        return
+    timer.reset()
+    prediction = await frame_executor.run(classify_sequence, recognizer.window.ordered(), key=session.session_id)
+    event = recognizer.decide(prediction)
+    timer.lap("sequence")
+    if event is not None:
+        result["sequence_event"] = event
+        pipeline_metrics.add("sequence_events")
+        logger.info(f"🎬 Sequence: {event['gesture']} (confidence: {event['confidence']:.2f})")
+
+def error_response(stage: str, message: str, echo: Optional[dict] = None) -> dict:
+    pipeline_metrics.record_error(stage)
+    return {"error": message, **(echo or {})}
+
+async def handle_message(session: ASLSession, message: dict, timer: FrameTimer) -> dict:
+    """Turn one received WebSocket message into its response"""
+    echo = {}
+    frame = None
+    if message.get("bytes") is not None:
+        if session.protocol != BINARY_SUBPROTOCOL:
+            return error_response("protocol", f"Binary frames require the '{BINARY_SUBPROTOCOL}' subprotocol")
         
-        if results.multi_hand_landmarks:
-            # Get first hand landmarks
-            hand_landmarks = results.multi_hand_landmarks[0]
-            
-            # Extract landmark coordinates
-            landmarks = []
-            features = []
-            
-            for landmark in hand_landmarks.landmark:
-                landmarks.append({
-                    "x": landmark.x,
-                    "y": landmark.y, 
-                    "z": landmark.z
-                })
-                features.extend([landmark.x, landmark.y, landmark.z])
-            
-            return np.array(features), landmarks, True
+        # Raw JPEG or packed landmarks straight from the received buffer
+        try:
+            frame = decode_binary_frame(message["bytes"])
+        except ValueError as e:
+            return error_response("parse", str(e))
+        
+        jpeg = frame.payload
+        if frame.frame_id is not None:
+            echo = {"frame_id": frame.frame_id, "client_timestamp": frame.timestamp_ms}
+    else:
+        try:
+            frame_data = json.loads(message["text"])
+        except ValueError:
+            return error_response("parse", "Invalid JSON message")
+        
+        if "frame" not in frame_data:
+            return error_response("parse", "No frame data received")
         
-        return None, [], False
+        if "frame_id" in frame_data:
+            echo = {"frame_id": frame_data["frame_id"], "client_timestamp": frame_data.get("timestamp")}
         
+        # Decode base64 image
+        try:
+            img_data = frame_data["frame"]
+            if "," in img_data:
+                img_data = img_data.split(",")[1]
+            
+            jpeg = base64.b64decode(img_data)
+            
+        except Exception as e:
+            logger.error(f"Image decoding error: {e}")
+            return error_response("parse", f"Image decoding failed: {str(e)}", echo)
+    timer.lap("parse")
+    
+    try:
+        if frame is not None and frame.kind == KIND_LANDMARKS:
+            result = await run_landmarks_pipeline(frame.payload, session, timer)
+        else:
+            result = await run_frame_pipeline(jpeg, session, timer)
+    except Exception as e:
+        logger.error(f"Frame processing error: {e}")
+        return error_response("pipeline", f"Frame processing failed: {str(e)}", echo)
+    
+    if "error" in result:
+        return error_response(result.pop("error_stage", "pipeline"), result.pop("error"), {**result, **echo})
+    
+    pipeline_metrics.record_result(result)
+    if result["hand_detected"]:
+        logger.info(f"🤟 Detected: {result['gesture']} (confidence: {result['confidence']:.2f})")
+    
+    return {"timestamp": time.time(), **echo, **result}
+
+def parse_control_message(message: dict) -> Optional[dict]:
+    """Small JSON text messages with a "type" are control messages, not frames"""
+    text = message.get("text")
+    if text is None or len(text) > CONTROL_MESSAGE_MAX_LENGTH:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) and "type" in data else None
+
+def set_recording(session: ASLSession, enabled: bool):
+    """Start or stop recording a session's frames and results for replay.py"""
+    if enabled and session.recorder is None:
+        if config.RECORDING not in ("opt-in", "all"):
+            raise ValueError("Recording is disabled on this server (ASL_RECORDING=off)")
+        if session.recorded:
+            raise ValueError("This session has already been recorded; reconnect to record again")
+        session.recorder = SessionRecorder(config.RECORD_DIR, session.session_id, config.RECORD_SIZE_MB << 20, {
+            "session_id": session.session_id,
+            "protocol": session.protocol,
+            "model_version": get_model().version,
+            "started_at": time.time(),
+            "decode_max_side": config.DECODE_MAX_SIDE,
+            "roi_crop": config.ROI_CROP,
+            "max_hands": session.max_hands,
+            "gating": session.gate.settings(),
+        }, config.RECORD_MAX_TOTAL_MB << 20)
+        session.recorded = True
+        logger.info(f"⏺️ Recording session to {session.recorder.path}")
+    elif not enabled and session.recorder is not None:
+        logger.info(f"⏹️ Recorded {session.recorder.writer.count} frames to {session.recorder.path}")
+        session.recorder.close()
+        session.recorder = None
+
+def set_sequence_mode(session: ASLSession, enabled: bool):
+    """Start or stop sliding-window recognition of motion signs for a session"""
+    if enabled and session.sequence is None:
+        model = get_model()
+        if model.sequence_model is None:
+            raise ValueError("No sequence model is loaded (train one with: python train_model.py train --models seq)")
+        session.sequence = SequenceRecognizer(
+            model.sequence_window or config.SEQUENCE_WINDOW, config.SEQUENCE_STRIDE,
+            config.SEQUENCE_MIN_CONFIDENCE, config.SEQUENCE_CONFIRMATIONS
+        )
+    elif not enabled:
+        session.sequence = None
+
+def set_max_hands(session: ASLSession, value) -> int:
+    """Change how many hands a session's frames are searched for"""
+    max_hands = int(value)
+    if not 1 <= max_hands <= config.MAX_HANDS_LIMIT:
+        raise ValueError(f"max_hands must be between 1 and {config.MAX_HANDS_LIMIT}")
+    if max_hands != session.max_hands:
+        session.max_hands = max_hands
+        # The ROI only follows a single hand
+        session.roi = None
+    return max_hands
+
+def record_frame(session: ASLSession, message: dict, received_at: float, response: dict, timer: FrameTimer):
+    try:
+        session.recorder.record(message, received_at, response, timer.to_ms())
     except Exception as e:
-        logger.error(f"Landmark extraction error: {e}")
-        return None, [], False
+        # A failing recording never takes the connection down with it
+        logger.error(f"Recording error, recording stopped: {e}")
+        set_recording(session, False)
 
-@app.websocket("/asl-ws")
+async def handle_control_message(websocket: WebSocket, session: ASLSession, control: dict):
+    if control["type"] == "config":
+        try:
+            response = {"type": "config", "gating": session.gate.configure(control.get("gating", {}))}
+            if "timings" in control:
+                session.include_timings = bool(control["timings"])
+            response["timings"] = session.include_timings
+            if "max_hands" in control:
+                set_max_hands(session, control["max_hands"])
+            response["max_hands"] = session.max_hands
+            if "sequence" in control:
+                set_sequence_mode(session, bool(control["sequence"]))
+            response["sequence"] = session.sequence.settings() if session.sequence is not None else None
+            if "record" in control:
+                set_recording(session, bool(control["record"]))
+            response["recording"] = session.recorder.stats() if session.recorder is not None else None
+        except (TypeError, ValueError, OSError) as e:
+            response = {"type": "config", "error": str(e)}
+    else:
+        response = {"type": control["type"], "error": f"Unknown control message type '{control['type']}'"}
+    async with session.send_lock:
+        await websocket.send_json(response)
+
+async def receive_messages(websocket: WebSocket, session: ASLSession):
+    """Read messages as fast as they arrive, keeping only the newest frame pending"""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            # Control messages apply immediately and are never dropped like frames
+            control = parse_control_message(message)
+            if control is not None:
+                await handle_control_message(websocket, session, control)
+                continue
+            pipeline_metrics.add("frames_received")
+            if session.on_message(message):
+                pipeline_metrics.add("dropped:superseded")
+    finally:
+        session.slot.close()
+
+@router.websocket("/asl-ws")
 async def asl_websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    session = ASLSession(negotiate_protocol(websocket), config.MAX_FRAME_AGE_MS, config.RESPONSE_TIMINGS,
+                         config.MAX_HANDS)
+    session.cache = create_session_cache()
+    if not startup.ready:
+        # Load balancers should wait for /ready; anyone connecting earlier is told to come back
+        await websocket.accept(subprotocol=session.protocol)
+        await websocket.send_json({"error": "Server is starting up, try again later", "startup": startup.status()})
+        await websocket.close(code=1013, reason="Server starting up")
+        pipeline_metrics.add("connections_rejected")
+        return
+    if not await manager.connect(websocket, session):
+        return
+    
+    # Gating thresholds can also be set when connecting: /asl-ws?frame_threshold=2&max_reuse=10
+    gating = {key: value for key, value in websocket.query_params.items() if key in MotionGate.SETTINGS}
+    if gating:
+        try:
+            session.gate.configure(gating)
+        except ValueError as e:
+            await websocket.send_json({"type": "config", "error": str(e)})
+    if "timings" in websocket.query_params:
+        session.include_timings = websocket.query_params["timings"].lower() in ("1", "true", "yes", "on")
+    if "max_hands" in websocket.query_params:
+        try:
+            set_max_hands(session, websocket.query_params["max_hands"])
+        except ValueError as e:
+            await websocket.send_json({"type": "config", "error": str(e)})
+    sequence = websocket.query_params.get("sequence")
+    if sequence is not None or config.SEQUENCE_MODE:
+        try:
+            set_sequence_mode(session, sequence.lower() in ("1", "true", "yes", "on") if sequence is not None else True)
+        except ValueError as e:
+            await websocket.send_json({"type": "config", "error": str(e)})
+    if config.RECORDING == "all" or websocket.query_params.get("record", "").lower() in ("1", "true", "yes", "on"):
+        try:
+            set_recording(session, True)
+        except (ValueError, OSError) as e:
+            await websocket.send_json({"type": "config", "error": str(e)})
+    
+    reader = asyncio.create_task(receive_messages(websocket, session))
     
     try:
         while True:
-            # Receive frame data
-            data = await websocket.receive_text()
-            frame_data = json.loads(data)
-            
-            if "frame" not in frame_data:
-                await websocket.send_json({"error": "No frame data received"})
+            # Newest pending frame; older ones were dropped while we were busy
+            item = await session.slot.get()
+            if item is None:
+                break
+            received_at, message = item
+            if session.is_stale(received_at):
+                pipeline_metrics.add("dropped:stale")
                 continue
             
-            # Decode base64 image
+            timer = FrameTimer()
+            timer.record("queue_wait", time.monotonic() - received_at)
+            pipeline_metrics.add("frames_in_flight")
             try:
-                img_data = frame_data["frame"]
-                if "," in img_data:
-                    img_data = img_data.split(",")[1]
-                
-                img_bytes = base64.b64decode(img_data)
-                np_arr = np.frombuffer(img_bytes, np.uint8)
-                image = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-                
-                if image is None:
-                    await websocket.send_json({"error": "Failed to decode image"})
-                    continue
-                
-            except Exception as e:
-                logger.error(f"Image decoding error: {e}")
-                await websocket.send_json({"error": f"Image decoding failed: {str(e)}"})
-                continue
-            
-            # Extract hand landmarks
-            features, landmarks, hand_detected = extract_hand_landmarks(image)
-            
-            # Prepare response
-            response = {
-                "timestamp": time.time(),
-                "hand_detected": hand_detected,
-                "landmarks": landmarks,
-                "gesture": "None",
-                "confidence": 0.0
-            }
-            
-            # Predict gesture if hand detected
-            if hand_detected and features is not None:
-                gesture, confidence = asl_model.predict(features)
-                response["gesture"] = gesture
-                response["confidence"] = confidence
-                
-                logger.info(f"🤟 Detected: {gesture} (confidence: {confidence:.2f})")
+                response = await handle_message(session, message, timer)
+            finally:
+                pipeline_metrics.add("frames_in_flight", -1)
+            session.on_processed(received_at)
+            response["stats"] = session.stats()
+            response["rate_hint"] = session.rate_hint()
+            if session.include_timings:
+                # Everything up to the send; the send itself only reaches /metrics
+                response["timings_ms"] = timer.to_ms()
             
             # Send response
-            await websocket.send_json(response)
+            timer.reset()
+            async with session.send_lock:
+                await websocket.send_json(response)
+            timer.lap("send")
+            timer.record("total", time.monotonic() - received_at)
+            pipeline_metrics.observe_frame(timer)
+            if session.recorder is not None:
+                record_frame(session, message, received_at, response, timer)
             
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
+    finally:
+        reader.cancel()
+        set_recording(session, False)
         manager.disconnect(websocket)
+        await frame_executor.run(close_session, session.session_id, key=session.session_id)
+
+def require_admin(request: Request):
+    if config.ADMIN_TOKEN:
+        if request.headers.get("x-admin-token") != config.ADMIN_TOKEN:
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif request.client is None or request.client.host not in ("127.0.0.1", "::1", "localhost"):
+        raise HTTPException(status_code=403, detail="Admin endpoints are local-only without ASL_ADMIN_TOKEN")
 
-@app.get("/health")
+@router.get("/admin/models")
+async def list_models(request: Request):
+    require_admin(request)
+    return registry.status()
+
+@router.post("/admin/models/reload")
+async def reload_models(request: Request, version: Optional[str] = None):
+    require_admin(request)
+    try:
+        info = await reload_model(version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {e}")
+    return {"status": "reloaded", **info}
+
+@router.get("/live")
+async def liveness_probe():
+    """200 while this worker's event loop is responsive; 503 only when its startup failed for good"""
+    if startup.state == "failed":
+        return JSONResponse({"status": "failed", "startup": startup.status()}, status_code=503)
+    return {"status": "alive", "startup": startup.state}
+
+@router.get("/ready")
+async def readiness_probe():
+    """200 once the model is loaded and every frame worker is warmed up, 503 until then"""
+    if not startup.ready:
+        return JSONResponse({"status": startup.state, "startup": startup.status()}, status_code=503,
+                            headers={"Retry-After": "1"})
+    return {"status": "ready", "startup": startup.status()}
+
+@router.get("/health")
 async def health_check():
+    # During startup the model and workers may not exist yet; report what there is without waiting for them
+    pools = await frame_executor.run_on_all(tracker_stats) if startup.ready else []
+    trackers = {key: sum(pool[key] for pool in pools) for key in pools[0]} if pools else None
+    totals = metrics_totals()
+    model = active_model()
+    
     return {
-        "status": "healthy",
-        "model_loaded": asl_model.model_loaded,
-        "active_connections": len(manager.active_connections)
+        "status": "healthy" if startup.ready else startup.state,
+        "startup": startup.status(),
+        "model_loaded": model.model_loaded if model is not None else False,
+        "model_backend": model.backend if model is not None else None,
+        "model": registry.status(),
+        "cascade": model.cascade.stats() if model is not None and model.cascade is not None else None,
+        "active_connections": int(pipeline_metrics.get("active_connections", totals)),
+        "worker": {
+            "pid": os.getpid(),
+            "active_connections": len(manager.active_connections),
+            "max_connections": config.MAX_CONNECTIONS_PER_WORKER or None
+        },
+        "workers": shared_stats.workers({
+            key: pipeline_metrics.layout.index[key]
+            for key in ("active_connections", "frames_processed", "connections_rejected")
+        }) if shared_stats is not None else None,
+        "batching": batcher.stats.to_dict() if batcher is not None else None,
+        "trackers": trackers,
+        "recording": {
+            "mode": config.RECORDING,
+            "sessions": sum(1 for session in manager.sessions.values() if session.recorder is not None)
+        },
+        "stages": pipeline_metrics.stage_summary(totals),
+        "prediction_cache": {
+            "scope": config.CACHE_SCOPE,
+            "step": config.CACHE_STEP,
+            **cache_counters.to_dict(),
+            "global_entries": len(global_cache) if global_cache is not None else None
+        }
     }
 
-@app.get("/")
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint; totals over all server workers"""
+    model = active_model()
+    extra = {
+        "model_loaded": ("1 when a trained model is serving predictions", int(model is not None and model.model_loaded)),
+        "ready": ("1 once startup (model loading and warm-up) has finished", int(startup.ready)),
+    }
+    return PlainTextResponse(
+        pipeline_metrics.render(metrics_totals(), extra), media_type="text/plain; version=0.0.4"
+    )
+
+async def stream_recognition(recognizer: BatchRecognizer, start: dict):
+    """NDJSON lines of a /recognize job, one chunk of frames at a time"""
+    try:
+        yield json.dumps(start) + "\n"
+        while True:
+            frames = await asyncio.to_thread(recognizer.read_chunk)
+            if not frames:
+                break
+            # MediaPipe runs on the bounded frame pool; the job's key keeps a video on one worker's tracker
+            found = await frame_executor.run(
+                extract_batch, [image for _, image in frames], recognizer.job_id if recognizer.tracking else None,
+                key=recognizer.job_id
+            )
+            results = await asyncio.to_thread(recognizer.recognize, frames, found)
+            pipeline_metrics.add("batch_frames", len(results))
+            yield "".join(json.dumps(result) + "\n" for result in results)
+        yield json.dumps(recognizer.summary()) + "\n"
+    except Exception as e:
+        logger.error(f"Batch recognition error: {e}")
+        yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+
+class RecognitionResponse(StreamingResponse):
+    """Streams a /recognize job and frees its slot however the response ends, even before the body starts"""
+    
+    def __init__(self, recognizer: BatchRecognizer, start: dict):
+        super().__init__(stream_recognition(recognizer, start), media_type="application/x-ndjson")
+        self.recognizer = recognizer
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Also runs when the client disconnects or a send fails
+            self.recognizer.close()
+            recognize_slots.release()
+            if self.recognizer.tracking:
+                await frame_executor.run(close_session, self.recognizer.job_id, key=self.recognizer.job_id)
+
+@router.post("/recognize")
+async def recognize(request: Request, every: int = 1, chunk: int = config.RECOGNIZE_CHUNK_SIZE,
+                    landmarks: bool = False):
+    """Recognize an uploaded video (raw body) or a multipart batch of images, streamed back as NDJSON"""
+    if not startup.ready:
+        raise HTTPException(status_code=503, detail="Server is starting up", headers={"Retry-After": "5"})
+    if recognize_slots.locked():
+        raise HTTPException(status_code=503, detail="Too many recognition jobs in progress",
+                            headers={"Retry-After": "5"})
+    await recognize_slots.acquire()
+    recognizer = None
+    try:
+        upload = await spool_upload(
+            request.stream(), request.headers.get("content-type", ""), config.RECOGNIZE_MAX_UPLOAD_MB << 20
+        )
+        recognizer = BatchRecognizer(upload, max(1, every), min(max(1, chunk), 256), landmarks, config.DECODE_MAX_SIDE)
+        start = await asyncio.to_thread(recognizer.open)
+    except BaseException as e:
+        if recognizer is not None:
+            recognizer.close()
+        recognize_slots.release()
+        if isinstance(e, UploadError):
+            raise HTTPException(status_code=e.status, detail=str(e))
+        raise
+    return RecognitionResponse(recognizer, start)
+
+@router.get("/")
 async def root():
     return {
         "message": "ASL Translation Server",
         "endpoints": {
             "websocket": "/asl-ws",
-            "health": "/health"
+            "recognize": "/recognize",
+            "health": "/health",
+            "live": "/live",
+            "ready": "/ready",
+            "metrics": "/metrics",
+            "models": "/admin/models"
         }
     }
 
+def serve_workers():
+    """Pre-fork config.SERVER_WORKERS uvicorn workers that share one metrics table"""
+    import uvicorn
+    stats = SharedStats.create(SHARED_STATS_ROWS, pipeline_metrics.layout.size)
+    # Spawned workers inherit the environment, and with it the segment's name
+    os.environ["ASL_SHARED_STATS"] = stats.name
+    try:
+        uvicorn.run(
+            "main:create_app",
+            factory=True,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host=config.HOST,
+            port=config.PORT,
+            workers=config.SERVER_WORKERS,
+            log_level="info",
+            access_log=True
+        )
+    finally:
+        stats.close()
+
 if __name__ == "__main__":
     import uvicorn
     logger.info("🚀 Starting ASL Translation Server...")
-    uvicorn.run(
-        app, 
-        host="0.0.0.0", 
-        port=8000,
-        log_level="info",
-        access_log=True
-    )
\ No newline at end of file
+    if config.SERVER_WORKERS > 1:
+        logger.info(f"🧩 {config.SERVER_WORKERS} server workers, up to "
+                    f"{config.MAX_CONNECTIONS_PER_WORKER or 'unlimited'} connections each")
+        serve_workers()
+    else:
+        uvicorn.run(
+            create_app(), 
+            host=config.HOST, 
+            port=config.PORT,
+            log_level="info",
+            access_log=True
+        )
\ No newline at end of file
@@ -0,0 +1,233 @@
+# metrics.py
+"""Fixed-bucket latency histograms and counters for the frame pipeline, rendered for Prometheus"""
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Upper bounds in seconds; anything slower lands in the +Inf bucket
+LATENCY_BUCKETS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Pipeline stages in the order a frame passes through them
+STAGES = (
+    "queue_wait",   # waiting in the session's latest-frame slot
+    "parse",        # binary header / JSON + base64 decoding
+    "dispatch",     # worker pool queueing and transfer
+    "signature",    # frame thumbnail for motion gating
+    "decode",       # cv2.imdecode
+    "mediapipe",    # hand landmark extraction
+    "predict",      # cache lookup, batching queue and forward pass
+    "sequence",     # sliding-window classification (sequence mode)
+    "send",         # send_json
+    "total",        # received -> response sent
+)
+
+_PREFIX = "asl"
+
+
+class FrameTimer:
+    """Collects stage durations for one frame"""
+    
+    __slots__ = ("durations", "_start")
+    
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self._start = time.perf_counter()
+    
+    def lap(self, stage: str) -> float:
+        """Attribute the time since the previous lap to stage"""
+        now = time.perf_counter()
+        self.record(stage, now - self._start)
+        self._start = now
+        return now
+    
+    def record(self, stage: str, seconds: float):
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+    
+    def reset(self):
+        """Start the next lap now, leaving the time since the previous one unattributed"""
+        self._start = time.perf_counter()
+    
+    def add_remote(self, durations: Optional[Dict[str, float]]):
+        """Merge stages timed inside a worker and count the rest of the round trip as dispatch"""
+        remote = 0.0
+        for stage, seconds in (durations or {}).items():
+            self.record(stage, seconds)
+            remote += seconds
+        now = time.perf_counter()
+        self.record("dispatch", max(0.0, now - self._start - remote))
+        self._start = now
+    
+    def to_ms(self) -> Dict[str, float]:
+        return {stage: round(seconds * 1000, 3) for stage, seconds in self.durations.items()}
+
+
+# Counters and gauges kept for every worker; "name:label" keys share one Prometheus metric
+COUNTERS = (
+    "frames_received", "frames_processed", "dropped:superseded", "dropped:stale",
+    "reused:frame", "reused:landmarks", "hand_detections", "connections_rejected", "batch_frames",
+    "extra_hands", "sequence_events",
+)
+GAUGES = ("frames_in_flight", "active_connections", "pending_frames", "batch_queue_depth")
+ERROR_STAGES = ("protocol", "parse", "decode", "pipeline")
+OTHER_GESTURE = "other"
+
+_HELP = {
+    "frames_received": ("counter", "Frames received over WebSocket"),
+    "frames_processed": ("counter", "Frames that produced a response"),
+    "dropped": ("counter", "Frames dropped before processing"),
+    "reused": ("counter", "Responses served by motion gating"),
+    "hand_detections": ("counter", "Frames with a detected hand"),
+    "connections_rejected": ("counter", "Connections closed because the worker was at capacity"),
+    "batch_frames": ("counter", "Frames recognized through POST /recognize"),
+    "extra_hands": ("counter", "Hands detected beyond the first one of a frame"),
+    "sequence_events": ("counter", "Gesture events fired by sequence mode"),
+    "gesture": ("counter", "Classified gestures by label"),
+    "error": ("counter", "Frames answered with an error"),
+    "frames_in_flight": ("gauge", "Frames currently being processed"),
+    "active_connections": ("gauge", "Open WebSocket connections"),
+    "pending_frames": ("gauge", "Sessions with a frame waiting to be processed"),
+    "batch_queue_depth": ("gauge", "Feature vectors waiting for the next prediction batch"),
+}
+# Prometheus metric name and label name for each "name:label" group
+_FAMILIES = {
+    "dropped": ("frames_dropped_total", "reason"),
+    "reused": ("frames_reused_total", "level"),
+    "gesture": ("gestures_total", "gesture"),
+    "error": ("errors_total", "stage"),
+}
+
+
+class MetricsLayout:
+    """Position of every counter, gauge and histogram bucket in one flat float64 array.
+    
+    A flat array lets each server worker keep its metrics in a row of a
+    shared-memory table (see shared_stats.py) that any worker can sum.
+    """
+    
+    def __init__(self, labels: Iterable[str], buckets: Iterable[float] = LATENCY_BUCKETS_S):
+        self.buckets = tuple(buckets)
+        self.gestures = tuple(labels) + ("Unknown", OTHER_GESTURE)
+        keys = list(COUNTERS) + list(GAUGES)
+        keys += [f"gesture:{gesture}" for gesture in self.gestures]
+        keys += [f"error:{stage}" for stage in ERROR_STAGES]
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.gauge_columns = [self.index[key] for key in GAUGES]
+        # Per stage: one count per bucket (+Inf last), then the sum and the count
+        self.histogram_width = len(self.buckets) + 3
+        self.histograms = {stage: len(keys) + i * self.histogram_width for i, stage in enumerate(STAGES)}
+        self.size = len(keys) + len(STAGES) * self.histogram_width
+
+
+class PipelineMetrics:
+    """Counters and per-stage histograms of one worker; only updated from its event loop"""
+    
+    def __init__(self, labels: Iterable[str], values: Optional[np.ndarray] = None):
+        self.layout = MetricsLayout(labels)
+        self.values = values if values is not None else np.zeros(self.layout.size)
+        self._index = self.layout.index
+    
+    def add(self, key: str, amount: float = 1):
+        self.values[self._index[key]] += amount
+    
+    def set(self, key: str, value: float):
+        self.values[self._index[key]] = value
+    
+    def observe(self, stage: str, seconds: float):
+        base = self.layout.histograms.get(stage)
+        if base is None:
+            return
+        buckets = len(self.layout.buckets)
+        self.values[base + bisect_left(self.layout.buckets, seconds)] += 1
+        self.values[base + buckets + 1] += seconds
+        self.values[base + buckets + 2] += 1
+    
+    def observe_frame(self, timer: FrameTimer):
+        for stage, seconds in timer.durations.items():
+            self.observe(stage, seconds)
+    
+    def record_result(self, result: Dict):
+        self.add("frames_processed")
+        reused = result.get("reused")
+        if reused:
+            self.add(f"reused:{reused}")
+        if result.get("hand_detected"):
+            self.add("hand_detections")
+            hands = result.get("hands") or [result]
+            if len(hands) > 1:
+                self.add("extra_hands", len(hands) - 1)
+            for hand in hands:
+                gesture = hand.get("gesture", "None")
+                self.add(f"gesture:{gesture}" if gesture in self.layout.gestures else f"gesture:{OTHER_GESTURE}")
+    
+    def record_error(self, stage: str):
+        self.add("frames_processed")
+        self.add(f"error:{stage}" if stage in ERROR_STAGES else "error:pipeline")
+    
+    def render(self, values: Optional[np.ndarray] = None,
+               extra_gauges: Optional[Dict[str, tuple[str, float]]] = None) -> str:
+        """Prometheus text exposition format (version 0.0.4) of values (default: this worker's)"""
+        values = self.values if values is None else values
+        families: Dict[str, List[tuple[str, float]]] = {}
+        for key, i in self._index.items():
+            name, _, label = key.partition(":")
+            families.setdefault(name, []).append((label, values[i]))
+        
+        lines: List[str] = []
+        for name, samples in families.items():
+            kind, help_text = _HELP[name]
+            metric, label_name = _FAMILIES.get(name, (f"{name}_total" if kind == "counter" else name, None))
+            lines.append(f"# HELP {_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {_PREFIX}_{metric} {kind}")
+            for label, value in samples:
+                labels = _labels(**{label_name: label}) if label_name else ""
+                lines.append(f"{_PREFIX}_{metric}{labels} {_format_value(value)}")
+        for name, (help_text, value) in (extra_gauges or {}).items():
+            lines.append(f"# HELP {_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {_PREFIX}_{name} gauge")
+            lines.append(f"{_PREFIX}_{name} {_format_value(value)}")
+        
+        buckets = len(self.layout.buckets)
+        lines.append(f"# HELP {_PREFIX}_stage_seconds Time spent per pipeline stage")
+        lines.append(f"# TYPE {_PREFIX}_stage_seconds histogram")
+        for stage, base in self.layout.histograms.items():
+            cumulative = np.cumsum(values[base:base + buckets + 1])
+            for bound, count in zip(self.layout.buckets + (float("inf"),), cumulative):
+                lines.append(f"{_PREFIX}_stage_seconds_bucket{_labels(stage=stage, le=_format_value(bound))} "
+                             f"{_format_value(count)}")
+            lines.append(f"{_PREFIX}_stage_seconds_sum{_labels(stage=stage)} {_format_value(values[base + buckets + 1])}")
+            lines.append(f"{_PREFIX}_stage_seconds_count{_labels(stage=stage)} {_format_value(values[base + buckets + 2])}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def get(self, key: str, values: Optional[np.ndarray] = None) -> float:
+        return float((self.values if values is None else values)[self._index[key]])
+    
+    def stage_summary(self, values: Optional[np.ndarray] = None) -> Dict[str, Dict[str, float]]:
+        """Count and mean per stage, for /health"""
+        values = self.values if values is None else values
+        buckets = len(self.layout.buckets)
+        summary = {}
+        for stage, base in self.layout.histograms.items():
+            total, count = values[base + buckets + 1], values[base + buckets + 2]
+            if count:
+                summary[stage] = {"count": int(count), "mean_ms": round(1000 * float(total) / float(count), 3)}
+        return summary
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
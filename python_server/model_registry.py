@@ -0,0 +1,199 @@
+# model_registry.py
+"""Versioned model directories and hot-swapping of the active ASLModel.
+
+Each version lives in models/versions/<version>/ and holds the same files the
+models/ directory does (asl_model.npz, asl_model_tf, asl_model.pkl and the
+sequence model, asl_sequence.npz). The active version is the one named in
+models/versions/CURRENT, or the newest directory when that file doesn't exist. Without any versions the server falls back to
+the files directly in models/.
+
+A new version is loaded and warmed up next to the running one and then swapped
+in with a single reference assignment, so in-flight predictions are never
+blocked and never see a half-loaded model.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+from dataset import LandmarkDataset, default_data_path
+from recognition import MODELS_DIR, ASLModel, active_model, set_model
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIR = os.path.join(MODELS_DIR, 'versions')
+BASE_VERSION = "base"  # the unversioned files directly in models/
+MODEL_FILES = ("asl_model.npz", "asl_model_tf", "asl_model.pkl", "asl_sequence.npz", "asl_sequence_tf")
+
+
+def list_versions(versions_dir: str = VERSIONS_DIR) -> List[str]:
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(versions_dir)
+        if os.path.isdir(os.path.join(versions_dir, name))
+    )
+
+
+def resolve_version(versions_dir: str = VERSIONS_DIR) -> str:
+    """The version that should be active according to the files on disk"""
+    current_file = os.path.join(versions_dir, 'CURRENT')
+    if os.path.exists(current_file):
+        with open(current_file) as f:
+            version = f.read().strip()
+        if version:
+            return version
+    versions = list_versions(versions_dir)
+    return versions[-1] if versions else BASE_VERSION
+
+
+def version_dir(version: str, versions_dir: str = VERSIONS_DIR) -> str:
+    return MODELS_DIR if version == BASE_VERSION else os.path.join(versions_dir, version)
+
+
+def publish_version(source_dir: str = MODELS_DIR, version: Optional[str] = None,
+                    versions_dir: str = VERSIONS_DIR, make_current: bool = True) -> str:
+    """Copy freshly trained model files into a new version directory"""
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    target = os.path.join(versions_dir, version)
+    os.makedirs(target, exist_ok=False)
+    for name in MODEL_FILES:
+        source = os.path.join(source_dir, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(target, name))
+        elif os.path.exists(source):
+            shutil.copy2(source, os.path.join(target, name))
+    if make_current:
+        # Write then rename so a watching server never reads a partial name
+        tmp_file = os.path.join(versions_dir, 'CURRENT.tmp')
+        with open(tmp_file, 'w') as f:
+            f.write(version)
+        os.replace(tmp_file, os.path.join(versions_dir, 'CURRENT'))
+    return version
+
+
+def _warmup_samples(count: int = 32) -> np.ndarray:
+    """Realistic landmark vectors for warm-up, synthetic ones when no dataset exists"""
+    try:
+        path = default_data_path()
+        if os.path.isdir(path):
+            return np.array(LandmarkDataset(path).features[:count])
+        return np.loadtxt(path, delimiter=",", skiprows=1, max_rows=count,
+                          usecols=range(63), dtype=np.float32).reshape(-1, 63)
+    except Exception:
+        rng = np.random.default_rng(0)
+        return rng.uniform(0.2, 0.8, size=(count, 63)).astype(np.float32)
+
+
+class ModelRegistry:
+    """Tracks the active model version of this process and swaps in new ones"""
+    
+    def __init__(self, versions_dir: str = VERSIONS_DIR):
+        self.versions_dir = versions_dir
+        self.active_info: Dict = {}
+        self.last_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._watched_state = None
+    
+    def load(self, version: str) -> tuple[ASLModel, Dict]:
+        """Load and warm up a version without touching the active model"""
+        path = version_dir(version, self.versions_dir)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Model version '{version}' not found in {self.versions_dir}")
+        
+        start = time.perf_counter()
+        model = ASLModel(model_dir=path, version=version)
+        loaded = time.perf_counter()
+        
+        # Run the shapes live traffic uses so the first real frames don't pay for tracing
+        samples = _warmup_samples(config.BATCH_MAX_SIZE)
+        model.predict(samples[0])
+        model.predict_batch(samples)
+        if model.sequence_model is not None:
+            model.predict_sequence(np.repeat(samples[:1], model.sequence_window or 2, axis=0))
+        warmed = time.perf_counter()
+        
+        info = {
+            "version": version,
+            "backend": model.backend,
+            "model_loaded": model.model_loaded,
+            "classifier": "cascade" if model.cascade is not None else "single",
+            "sequence_model": model.sequence_model is not None,
+            "load_ms": round(1000 * (loaded - start), 1),
+            "warmup_ms": round(1000 * (warmed - loaded), 1),
+            "activated_at": None,
+        }
+        return model, info
+    
+    def activate(self, version: Optional[str] = None) -> Dict:
+        """Load, warm up and atomically swap in a version (blocking; call off the event loop)"""
+        with self._reload_lock:
+            version = version or resolve_version(self.versions_dir)
+            # Taken before loading, so files that change meanwhile still count as a change
+            state = self._disk_state()
+            try:
+                model, info = self.load(version)
+            except Exception as e:
+                self._record_failure(version, state, str(e))
+                raise
+            if not model.model_loaded and self.active_info.get("model_loaded"):
+                self._record_failure(version, state, "no loadable model files")
+                raise RuntimeError(f"Model version '{version}' has no loadable model files")
+            
+            info["activated_at"] = time.time()
+            set_model(model)
+            self.active_info = info
+            self.last_error = None
+            self._watched_state = state
+            logger.info(f"🔁 Model version {version} active "
+                        f"(load {info['load_ms']} ms, warm-up {info['warmup_ms']} ms)")
+            return info
+    
+    def ensure_active(self) -> Dict:
+        """Activate the version on disk, falling back to the unversioned models in models/"""
+        try:
+            return self.activate()
+        except Exception:
+            logger.warning(f"⚠️ Falling back to the unversioned models in {MODELS_DIR}")
+            return self.activate(BASE_VERSION)
+    
+    def _record_failure(self, version: str, state: tuple, error: str):
+        self.last_error = f"{version}: {error}"
+        logger.error(f"❌ Failed to load model version {version}: {error}")
+        if version == state[0]:
+            # The watcher retries once CURRENT or the version's directory changes, not every interval
+            self._watched_state = state
+    
+    def _disk_state(self) -> tuple:
+        """The version on disk, CURRENT's mtime and the version directory's mtime"""
+        current_file = os.path.join(self.versions_dir, 'CURRENT')
+        version = resolve_version(self.versions_dir)
+        path = version_dir(version, self.versions_dir)
+        return (
+            version,
+            os.path.getmtime(current_file) if os.path.exists(current_file) else None,
+            os.path.getmtime(path) if os.path.isdir(path) else None,
+        )
+    
+    def has_pending_change(self) -> bool:
+        """Whether the versions on disk point somewhere other than the active model"""
+        return self._watched_state is not None and self._disk_state() != self._watched_state
+    
+    def status(self) -> Dict:
+        # Status is reported during startup too, so it must not trigger the first load
+        model = active_model()
+        return {
+            **self.active_info,
+            "model_loaded": model.model_loaded if model is not None else False,
+            "available_versions": list_versions(self.versions_dir),
+            "last_error": self.last_error,
+        }
+
+
+# The registry of this process (each worker process has its own)
+registry = ModelRegistry()
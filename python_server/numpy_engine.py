@@ -0,0 +1,209 @@
+# numpy_engine.py
+"""TensorFlow-free forward pass for the trained gesture network.
+
+The Keras model from train_model.py is a small MLP (Dense/BatchNorm/Dropout).
+export_numpy_model() turns it into a compact .npz of dense layers with every
+BatchNormalization folded into the Dense layer that follows it and Dropout
+dropped, and NumpyMLP runs that stack with plain vectorized float32 NumPy.
+
+Usage:
+    python numpy_engine.py export [--int8]   # models/asl_model_tf -> models/asl_model.npz
+    python numpy_engine.py check             # parity against Keras on the landmark dataset
+"""
+import argparse
+import json
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TF_MODEL = os.path.join(BASE_DIR, "models", "asl_model_tf")
+DEFAULT_NUMPY_MODEL = os.path.join(BASE_DIR, "models", "asl_model.npz")
+
+FORMAT_VERSION = 1
+_ACTIVATIONS = ("linear", "relu", "softmax")
+
+
+def _fold_keras_layers(model) -> List[dict]:
+    """Collapse a Sequential Dense/BatchNorm/Dropout stack into dense layers"""
+    layers = []
+    pending_scale = None  # BatchNorm seen since the last Dense, as x * scale + shift
+    pending_shift = None
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == "Dense":
+            kernel, bias = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+            if pending_scale is not None:
+                # Dense(x * s + t) == x @ (s[:, None] * W) + (t @ W + b)
+                bias = bias + pending_shift @ kernel
+                kernel = pending_scale[:, None] * kernel
+                pending_scale = pending_shift = None
+            activation = layer.get_config()["activation"]
+            if activation not in _ACTIVATIONS:
+                raise ValueError(f"Unsupported activation {activation!r} in layer {layer.name}")
+            layers.append({"kernel": kernel, "bias": bias, "activation": activation})
+        elif kind == "BatchNormalization":
+            gamma = np.asarray(layer.gamma) if layer.scale else 1.0
+            beta = np.asarray(layer.beta) if layer.center else 0.0
+            mean = np.asarray(layer.moving_mean, dtype=np.float64)
+            variance = np.asarray(layer.moving_variance, dtype=np.float64)
+            scale = gamma / np.sqrt(variance + layer.epsilon)
+            shift = beta - mean * scale
+            if pending_scale is not None:
+                scale, shift = pending_scale * scale, pending_shift * scale + shift
+            pending_scale, pending_shift = scale, shift
+        elif kind in ("Dropout", "InputLayer"):
+            continue
+        else:
+            raise ValueError(f"Unsupported layer type {kind} ({layer.name})")
+    
+    if pending_scale is not None:
+        # A trailing BatchNorm becomes its own diagonal dense layer
+        layers.append({"kernel": np.diag(pending_scale), "bias": pending_shift, "activation": "linear"})
+    return layers
+
+
+def export_numpy_model(tf_model_dir: str = DEFAULT_TF_MODEL, out_path: str = DEFAULT_NUMPY_MODEL,
+                       int8: bool = False, extra_meta: Optional[dict] = None) -> str:
+    """Export a saved Keras model as a folded NumPy weight file; extra_meta is stored with it"""
+    import tensorflow as tf
+    
+    model = tf.keras.models.load_model(tf_model_dir)
+    layers = _fold_keras_layers(model)
+    
+    arrays = {}
+    for i, layer in enumerate(layers):
+        kernel = layer["kernel"].astype(np.float32)
+        if int8:
+            # Symmetric per-output-column quantization
+            scale = np.abs(kernel).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            arrays[f"kernel_{i}"] = np.round(kernel / scale).astype(np.int8)
+            arrays[f"kernel_scale_{i}"] = scale.astype(np.float32)
+        else:
+            arrays[f"kernel_{i}"] = kernel
+        arrays[f"bias_{i}"] = layer["bias"].astype(np.float32)
+    
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "activations": [layer["activation"] for layer in layers],
+        "int8": int8,
+        "source": os.path.basename(os.path.normpath(tf_model_dir)),
+        **(extra_meta or {}),
+    }
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+    
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    np.savez(out_path, **arrays)
+    return out_path
+
+
+class NumpyMLP:
+    """Vectorized float32 forward pass over an exported weight file.
+    
+    Mirrors the parts of the Keras model API that ASLModel uses. Int8 weights
+    are dequantized once at load time, so they only shrink the file on disk.
+    """
+    
+    def __init__(self, path: str = DEFAULT_NUMPY_MODEL):
+        self.path = path
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes().decode())
+            if meta.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported weight file version {meta.get('format_version')}")
+            self.int8 = bool(meta.get("int8"))
+            self.kernels = []
+            self.biases = []
+            for i, activation in enumerate(meta["activations"]):
+                kernel = data[f"kernel_{i}"]
+                if kernel.dtype == np.int8:
+                    kernel = kernel.astype(np.float32) * data[f"kernel_scale_{i}"]
+                self.kernels.append(np.ascontiguousarray(kernel, dtype=np.float32))
+                self.biases.append(np.ascontiguousarray(data[f"bias_{i}"], dtype=np.float32))
+            self.activations = meta["activations"]
+            self.meta = meta
+    
+    @property
+    def input_dim(self) -> int:
+        return self.kernels[0].shape[0]
+    
+    def predict_on_batch(self, features: np.ndarray) -> np.ndarray:
+        """Class probabilities for a (N, input_dim) batch"""
+        x = np.asarray(features, dtype=np.float32).reshape(-1, self.input_dim)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            x = x @ kernel
+            x += bias
+            if activation == "relu":
+                np.maximum(x, 0.0, out=x)
+            elif activation == "softmax":
+                x -= x.max(axis=1, keepdims=True)
+                np.exp(x, out=x)
+                x /= x.sum(axis=1, keepdims=True)
+        return x
+    
+    def predict(self, features: np.ndarray, verbose: int = 0) -> np.ndarray:
+        return self.predict_on_batch(features)
+
+
+def check_parity(tf_model_dir: str = DEFAULT_TF_MODEL, numpy_path: str = DEFAULT_NUMPY_MODEL,
+                 data_path: Optional[str] = None, limit: Optional[int] = None) -> dict:
+    """Compare NumpyMLP against the Keras model it was exported from"""
+    import tensorflow as tf
+    from dataset import read_landmarks
+    
+    features, _ = read_landmarks(data_path)
+    if limit:
+        features = features[:limit]
+    
+    keras_model = tf.keras.models.load_model(tf_model_dir)
+    engine = NumpyMLP(numpy_path)
+    
+    keras_probs = np.asarray(keras_model.predict_on_batch(features))
+    numpy_probs = engine.predict_on_batch(features)
+    
+    def per_frame_ms(fn, repeats: int = 200) -> float:
+        row = features[:1]
+        fn(row)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn(row)
+        return 1000 * (time.perf_counter() - start) / repeats
+    
+    return {
+        "samples": len(features),
+        "int8": engine.int8,
+        "max_abs_diff": float(np.abs(keras_probs - numpy_probs).max()),
+        "argmax_agreement": float((keras_probs.argmax(axis=1) == numpy_probs.argmax(axis=1)).mean()),
+        "keras_predict_ms": per_frame_ms(lambda row: keras_model.predict(row, verbose=0)),
+        "keras_predict_on_batch_ms": per_frame_ms(keras_model.predict_on_batch),
+        "numpy_predict_ms": per_frame_ms(engine.predict_on_batch),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and verify the NumPy gesture engine")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    export = sub.add_parser("export", help="Fold and export the Keras model to a .npz weight file")
+    export.add_argument("--model", default=DEFAULT_TF_MODEL)
+    export.add_argument("--out", default=DEFAULT_NUMPY_MODEL)
+    export.add_argument("--int8", action="store_true", help="Store int8 weights with per-column scales")
+    
+    check = sub.add_parser("check", help="Check numerical parity against Keras")
+    check.add_argument("--model", default=DEFAULT_TF_MODEL)
+    check.add_argument("--weights", default=DEFAULT_NUMPY_MODEL)
+    check.add_argument("--data", help="Dataset directory or CSV (default: asl_dataset, else asl_data.csv)")
+    check.add_argument("--limit", type=int, default=None)
+    
+    args = parser.parse_args()
+    if args.command == "export":
+        path = export_numpy_model(args.model, args.out, args.int8)
+        print(f"💾 NumPy weights saved to '{path}' ({os.path.getsize(path) / 1024:.1f} KB)")
+    else:
+        print(json.dumps(check_parity(args.model, args.weights, args.data, args.limit), indent=2))
+
+
+if __name__ == "__main__":
+    main()
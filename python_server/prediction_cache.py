@@ -0,0 +1,145 @@
+# prediction_cache.py
+"""Quantized-landmark cache in front of the gesture classifier.
+
+A held sign produces long runs of nearly identical landmark vectors. They are
+normalized (wrist-relative, scaled by hand size) and snapped to a grid, so
+frames that differ only by jitter or hand position share one cache key and one
+(gesture, confidence) answer.
+
+Tune the grid step against the recorded landmark dataset with:
+    python prediction_cache.py evaluate --steps 0.05 0.1 0.15 0.2 0.25
+
+The cache is off unless ASL_CACHE_SCOPE enables it; ASL_CACHE_STEP defaults to
+0.25, the largest step of that sweep.
+"""
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+import numpy as np
+
+WRIST = 0
+MIDDLE_MCP = 9
+
+
+def normalize_landmarks(features: np.ndarray) -> np.ndarray:
+    """Wrist-relative landmarks scaled so the wrist to middle-knuckle distance is 1"""
+    points = np.asarray(features, dtype=np.float32).reshape(21, 3)
+    points = points - points[WRIST]
+    scale = float(np.linalg.norm(points[MIDDLE_MCP, :2]))
+    if scale < 1e-6:
+        scale = float(np.abs(points).max()) or 1.0
+    return points / scale
+
+
+def quantize_landmarks(features: np.ndarray, step: float) -> bytes:
+    """Cache key for a landmark vector on a grid of the given step"""
+    return np.round(normalize_landmarks(features) / step).astype(np.int16).tobytes()
+
+
+class CacheCounters:
+    """Hit/miss counters, shared by all caches of one scope"""
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def to_dict(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class PredictionCache:
+    """Bounded LRU map from quantized landmarks to (gesture, confidence)"""
+    
+    def __init__(self, max_entries: int, step: float, counters: Optional[CacheCounters] = None):
+        self.max_entries = max(1, max_entries)
+        self.step = step
+        self.counters = counters or CacheCounters()
+        self._entries: "OrderedDict[Hashable, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def key(self, features: np.ndarray, namespace: Hashable = None) -> Hashable:
+        """Build the lookup key; namespace separates e.g. different model versions"""
+        return namespace, quantize_landmarks(features, self.step)
+    
+    def get(self, key: Hashable) -> Optional[tuple[str, float]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.counters.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters.hits += 1
+            return value
+    
+    def put(self, key: Hashable, value: tuple[str, float]):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def evaluate(data_path: Optional[str], steps: list, max_entries: int) -> list:
+    """Replay the landmark dataset in recording order through caches of several grid steps"""
+    from dataset import read_landmarks
+    from recognition import LABELS, get_model
+    
+    features, labels = read_landmarks(data_path)
+    
+    model = get_model()
+    direct = [gesture for gesture, _ in model.predict_batch(features)]
+    truth = [LABELS[int(label)] for label in labels]
+    
+    report = []
+    for step in steps:
+        cache = PredictionCache(max_entries, step)
+        answers = []
+        for row in features:
+            key = cache.key(row)
+            value = cache.get(key)
+            if value is None:
+                value = model.predict_batch(row.reshape(1, -1))[0]
+                cache.put(key, value)
+            answers.append(value[0])
+        report.append({
+            "step": step,
+            **cache.counters.to_dict(),
+            "entries": len(cache),
+            "agreement_with_model": round(float(np.mean([a == d for a, d in zip(answers, direct)])), 4),
+            "accuracy": round(float(np.mean([a == t for a, t in zip(answers, truth)])), 4),
+            "model_accuracy": round(float(np.mean([d == t for d, t in zip(direct, truth)])), 4),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the prediction cache quantization step")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ev = sub.add_parser("evaluate", help="Hit rate and accuracy per grid step on a dataset")
+    ev.add_argument("--data", help="Dataset directory or CSV (default: asl_dataset, else asl_data.csv)")
+    ev.add_argument("--steps", type=float, nargs="+", default=[0.05, 0.1, 0.15, 0.2, 0.25])
+    ev.add_argument("--max-entries", type=int, default=4096)
+    args = parser.parse_args()
+    print(json.dumps(evaluate(args.data, args.steps, args.max_entries), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# preprocess.py
+"""Adaptive frame preprocessing before MediaPipe: reduced-scale decode and hand-ROI cropping.
+
+Frames larger than the target size are decoded at 1/2, 1/4 or 1/8 scale by
+libjpeg itself, which is cheaper than decoding in full and resizing. When a
+session's previous frame had a hand, only an expanded box around it is handed
+to MediaPipe; landmarks found in the crop are mapped back to full-frame
+normalized coordinates, and a miss falls back to searching the whole frame.
+"""
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# cv2.imdecode flags for each libjpeg scale factor
+_REDUCED_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                  4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+# Start-of-frame markers carry the image size (SOF0-SOF15 minus DHT, JPG and DAC)
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_dimensions(data: np.ndarray) -> Optional[tuple[int, int]]:
+    """(width, height) from the JPEG header without decoding, or None if it isn't a baseline JPEG"""
+    buf = memoryview(data).cast("B")
+    if len(buf) < 4 or buf[0] != 0xFF or buf[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 < len(buf):
+        if buf[i] != 0xFF:
+            return None
+        marker = buf[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in _SOF_MARKERS:
+            height = (buf[i + 5] << 8) | buf[i + 6]
+            width = (buf[i + 7] << 8) | buf[i + 8]
+            return width, height
+        if marker == 0xD9 or marker == 0xDA:  # end of image / start of scan before any SOF
+            return None
+        i += 2 + ((buf[i + 2] << 8) | buf[i + 3])
+    return None
+
+
+def decode_scale(dimensions: Optional[tuple[int, int]], max_side: int) -> int:
+    """Largest libjpeg scale factor that keeps the longest side at or above max_side"""
+    if dimensions is None or max_side <= 0:
+        return 1
+    longest = max(dimensions)
+    scale = 1
+    while scale < 8 and longest / (scale * 2) >= max_side:
+        scale *= 2
+    return scale
+
+
+def decode_frame(data: np.ndarray, max_side: int) -> tuple[Optional[np.ndarray], int]:
+    """Decode a JPEG buffer at reduced scale when it is larger than max_side; returns (image, scale)"""
+    scale = decode_scale(jpeg_dimensions(data), max_side)
+    return cv2.imdecode(data, _REDUCED_FLAGS[scale]), scale
+
+
+def landmark_roi(features: np.ndarray) -> tuple[float, float, float, float]:
+    """Normalized (x0, y0, x1, y1) bounding box of 21 landmarks"""
+    points = features.reshape(-1, 3)
+    x0, y0 = points[:, :2].min(axis=0)
+    x1, y1 = points[:, :2].max(axis=0)
+    return float(x0), float(y0), float(x1), float(y1)
+
+
+def crop_box(roi: tuple[float, float, float, float], width: int, height: int, margin: float = 0.5,
+             min_fraction: float = 0.2, max_fraction: float = 0.9) -> Optional[tuple[int, int, int, int]]:
+    """Square pixel box (x, y, w, h) around a normalized ROI, expanded by margin on every side.
+    
+    The side is at least min_fraction of the frame's shorter side; None is
+    returned when it would reach max_fraction, since cropping then saves little.
+    """
+    x0, y0, x1, y1 = roi
+    center_x, center_y = (x0 + x1) / 2 * width, (y0 + y1) / 2 * height
+    side = max((x1 - x0) * width, (y1 - y0) * height) * (1 + 2 * margin)
+    side = max(side, min_fraction * min(width, height))
+    if side >= max_fraction * min(width, height):
+        return None
+    side = int(round(side))
+    # Shift the box back inside the frame instead of shrinking it
+    left = int(round(min(max(center_x - side / 2, 0), width - side)))
+    top = int(round(min(max(center_y - side / 2, 0), height - side)))
+    return left, top, side, side
+
+
+def to_full_frame(features: np.ndarray, box: tuple[int, int, int, int], width: int, height: int) -> np.ndarray:
+    """Map landmarks normalized to a crop back to full-frame normalized coordinates"""
+    left, top, crop_width, crop_height = box
+    points = features.reshape(-1, 3).astype(np.float64)
+    points[:, 0] = (points[:, 0] * crop_width + left) / width
+    points[:, 1] = (points[:, 1] * crop_height + top) / height
+    # MediaPipe's z uses roughly the same scale as x
+    points[:, 2] = points[:, 2] * crop_width / width
+    return points.reshape(-1)
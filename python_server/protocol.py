@@ -0,0 +1,114 @@
+# protocol.py
+"""Wire formats accepted on /asl-ws and per-connection protocol negotiation.
+
+Clients pick a format with the WebSocket subprotocol header:
+
+* ``asl.json`` (or no subprotocol) - legacy text messages:
+  ``{"frame": "data:image/jpeg;base64,...", "timestamp": ...}``
+* ``asl.binary.v1`` - binary messages carrying a raw JPEG, either bare
+  (starting with the JPEG SOI marker) or prefixed with a 16-byte header::
+
+      offset  size  field
+      0       2     magic b"AS"
+      2       1     version (1)
+      3       1     payload kind (0 = JPEG, 1 = landmarks)
+      4       4     frame id, uint32 little-endian
+      8       8     client timestamp in ms, float64 little-endian
+
+A landmarks payload is the 21x3 hand landmarks as 63 packed little-endian
+float32 values (x0, y0, z0, x1, ...), the layout extract_hand_landmarks
+produces and asl_data.csv stores. Those frames skip image decode and
+MediaPipe and go straight to the classifier.
+
+Responses are JSON text in both cases; binary frames get their frame id
+and client timestamp echoed back.
+"""
+import struct
+from typing import NamedTuple, Optional
+
+import numpy as np
+from fastapi import WebSocket
+
+JSON_SUBPROTOCOL = "asl.json"
+BINARY_SUBPROTOCOL = "asl.binary.v1"
+
+FRAME_HEADER = struct.Struct("<2sBBId")
+FRAME_MAGIC = b"AS"
+FRAME_VERSION = 1
+KIND_JPEG = 0
+KIND_LANDMARKS = 1
+
+NUM_LANDMARKS = 21
+LANDMARK_FEATURES = NUM_LANDMARKS * 3
+LANDMARK_DTYPE = np.dtype("<f4")
+# MediaPipe normalizes x/y to the image, but they overshoot when the hand leaves the frame
+LANDMARK_XY_RANGE = (-0.5, 1.5)
+LANDMARK_Z_RANGE = (-1.0, 1.0)
+
+JPEG_SOI = b"\xff\xd8"
+
+
+class BinaryFrame(NamedTuple):
+    kind: int
+    frame_id: Optional[int]
+    timestamp_ms: Optional[float]
+    payload: np.ndarray  # view into the received message, not a copy
+
+
+def negotiate_protocol(websocket: WebSocket) -> Optional[str]:
+    """Pick the subprotocol for a connection from the ones the client offered"""
+    offered = websocket.scope.get("subprotocols") or []
+    for protocol in (BINARY_SUBPROTOCOL, JSON_SUBPROTOCOL):
+        if protocol in offered:
+            return protocol
+    return None
+
+
+def decode_binary_frame(data: bytes) -> BinaryFrame:
+    """Parse a binary message without copying its payload"""
+    if data[:2] == JPEG_SOI:
+        return BinaryFrame(KIND_JPEG, None, None, np.frombuffer(data, np.uint8))
+    
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError(f"Binary frame too short ({len(data)} bytes)")
+    magic, version, kind, frame_id, timestamp_ms = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Binary frame is neither a JPEG nor has a valid header")
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported binary frame version {version}")
+    
+    if kind == KIND_JPEG:
+        payload = np.frombuffer(data, np.uint8, offset=FRAME_HEADER.size)
+    elif kind == KIND_LANDMARKS:
+        payload = validate_landmarks(np.frombuffer(data, np.uint8, offset=FRAME_HEADER.size))
+    else:
+        raise ValueError(f"Unsupported payload kind {kind}")
+    return BinaryFrame(kind, frame_id, timestamp_ms, payload)
+
+
+def validate_landmarks(payload: np.ndarray) -> np.ndarray:
+    """Check a packed landmarks payload and return it as a (63,) float32 view"""
+    if payload.nbytes != LANDMARK_FEATURES * LANDMARK_DTYPE.itemsize:
+        raise ValueError(f"Landmarks payload must be {LANDMARK_FEATURES} float32 values "
+                         f"({LANDMARK_FEATURES * LANDMARK_DTYPE.itemsize} bytes), got {payload.nbytes} bytes")
+    features = payload.view(LANDMARK_DTYPE)
+    if not np.isfinite(features).all():
+        raise ValueError("Landmarks contain NaN or infinite values")
+    
+    points = features.reshape(NUM_LANDMARKS, 3)
+    if points[:, :2].min() < LANDMARK_XY_RANGE[0] or points[:, :2].max() > LANDMARK_XY_RANGE[1]:
+        raise ValueError(f"Landmark x/y out of range {LANDMARK_XY_RANGE}")
+    if points[:, 2].min() < LANDMARK_Z_RANGE[0] or points[:, 2].max() > LANDMARK_Z_RANGE[1]:
+        raise ValueError(f"Landmark z out of range {LANDMARK_Z_RANGE}")
+    return features
+
+
+def encode_binary_frame(payload: bytes, frame_id: int, timestamp_ms: float, kind: int = KIND_JPEG) -> bytes:
+    """Build a headered binary message (used by clients and test tooling)"""
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, kind, frame_id, timestamp_ms) + bytes(payload)
+
+
+def encode_landmarks_frame(features: np.ndarray, frame_id: int, timestamp_ms: float) -> bytes:
+    """Pack 63 landmark values into a headered binary message"""
+    packed = np.ascontiguousarray(features, dtype=LANDMARK_DTYPE).reshape(-1)
+    return encode_binary_frame(packed.tobytes(), frame_id, timestamp_ms, KIND_LANDMARKS)
@@ -0,0 +1,288 @@
+# recognition.py
+"""Hand landmark extraction and ASL gesture classification shared by the server and its workers"""
+import cv2
+import numpy as np
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import config
+from sequences import WINDOW_STEPS, window_features
+
+logger = logging.getLogger(__name__)
+
+# ASL Labels
+LABELS = ["Yes", "No", "I Love You", "Hello", "Thank You"]
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+
+def create_hands(static_image_mode: bool = False, max_num_hands: int = 1):
+    """Create a MediaPipe Hands instance with optimized settings"""
+    # Importing MediaPipe takes seconds, so it waits for the first graph (the server's startup phase)
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(
+        static_image_mode=static_image_mode,
+        max_num_hands=max_num_hands,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.5,
+        model_complexity=1  # 0=lite, 1=full, 2=heavy
+    )
+
+
+class ASLModel:
+    def __init__(self, backend: str = config.MODEL_BACKEND, model_dir: str = MODELS_DIR,
+                 version: Optional[str] = None):
+        self.model = None
+        self.model_loaded = False
+        self.backend = backend
+        self.model_dir = model_dir
+        self.version = version
+        self.cascade = None
+        self.sequence_model = None
+        self.load_model()
+        if config.CLASSIFIER_MODE == "cascade":
+            self.load_cascade()
+        self.load_sequence_model()
+    
+    def load_model(self):
+        """Load the NumPy engine or TensorFlow model with fallback to rule-based"""
+        numpy_path = os.path.join(self.model_dir, 'asl_model.npz')
+        model_path = os.path.join(self.model_dir, 'asl_model_tf')
+        
+        backend = self.backend
+        if backend == "auto":
+            backend = "numpy" if os.path.exists(numpy_path) else "keras"
+        try:
+            if backend == "numpy" and os.path.exists(numpy_path):
+                from numpy_engine import NumpyMLP
+                self.model = NumpyMLP(numpy_path)
+                self.model_loaded = True
+                logger.info("✅ NumPy model loaded successfully")
+            elif backend == "keras" and os.path.exists(model_path):
+                # Imported here so the NumPy backend never pays for TensorFlow
+                import tensorflow as tf
+                self.model = tf.keras.models.load_model(model_path)
+                self.model_loaded = True
+                logger.info("✅ TensorFlow model loaded successfully")
+            else:
+                logger.warning(f"⚠️ Model not found for '{backend}' backend, using rule-based classification")
+        except Exception as e:
+            logger.error(f"❌ Failed to load model: {e}")
+            self.model_loaded = False
+        self.backend = backend
+    
+    def load_cascade(self):
+        """Put the rules and RandomForest tiers in front of the neural network"""
+        from cascade import CascadeClassifier, load_forest
+        forest = None
+        forest_path = os.path.join(self.model_dir, 'asl_model.pkl')
+        try:
+            if os.path.exists(forest_path):
+                forest = load_forest(forest_path, config.CASCADE_FOREST_TREES)
+        except Exception as e:
+            logger.error(f"❌ Failed to load RandomForest for the cascade: {e}")
+        nn_predict = self.model.predict_on_batch if self.model_loaded else None
+        self.cascade = CascadeClassifier(LABELS, config.CASCADE_TIERS, config.CASCADE_THRESHOLDS, forest, nn_predict)
+        logger.info(f"✅ Cascade classifier: {' -> '.join(self.cascade.tiers)}")
+    
+    def load_sequence_model(self):
+        """Load the temporal model for sequence mode when one has been trained"""
+        path = os.path.join(self.model_dir, 'asl_sequence.npz')
+        if not os.path.exists(path):
+            return
+        try:
+            from numpy_engine import NumpyMLP
+            self.sequence_model = NumpyMLP(path)
+            logger.info(f"✅ Sequence model loaded ({self.sequence_model.meta.get('window')}-frame windows)")
+        except Exception as e:
+            logger.error(f"❌ Failed to load sequence model: {e}")
+    
+    @property
+    def sequence_window(self) -> Optional[int]:
+        """Frames per window the sequence model was trained on"""
+        return self.sequence_model.meta.get("window") if self.sequence_model is not None else None
+    
+    def predict_sequence(self, window: np.ndarray) -> Optional[tuple[str, float]]:
+        """Classify a (frames, 63) landmark window, NaN rows for frames without a hand; None if too empty"""
+        features = window_features(window, self.sequence_model.meta.get("steps", WINDOW_STEPS))
+        if features is None:
+            return None
+        probabilities = self.sequence_model.predict_on_batch(features)[0]
+        labels = self.sequence_model.meta.get("labels", LABELS)
+        predicted_class = int(np.argmax(probabilities))
+        return labels[predicted_class], float(probabilities[predicted_class])
+    
+    def predict(self, features: np.ndarray) -> tuple[str, float]:
+        """Predict ASL gesture from hand landmarks"""
+        if self.cascade is not None:
+            return self.cascade.predict_batch(features.reshape(1, -1))[0]
+        if self.model_loaded and self.model is not None:
+            try:
+                features_reshaped = features.reshape(1, -1)
+                predictions = self.model.predict(features_reshaped, verbose=0)
+                confidence = float(np.max(predictions))
+                predicted_class = int(np.argmax(predictions))
+                gesture = LABELS[predicted_class] if predicted_class < len(LABELS) else "Unknown"
+                return gesture, confidence
+            except Exception as e:
+                logger.error(f"Model prediction error: {e}")
+                return self.rule_based_prediction(features)
+        else:
+            return self.rule_based_prediction(features)
+
+    def predict_batch(self, features: np.ndarray) -> List[tuple[str, float]]:
+        """Predict ASL gestures for a (N, 63) batch of hand landmarks in one forward pass"""
+        features = features.reshape(len(features), -1)
+        if self.cascade is not None:
+            return self.cascade.predict_batch(features)
+        if self.model_loaded and self.model is not None:
+            try:
+                # predict_on_batch skips the per-call dataset setup that predict() pays
+                predictions = np.asarray(self.model.predict_on_batch(features))
+                confidences = predictions.max(axis=1)
+                predicted_classes = predictions.argmax(axis=1)
+                return [
+                    (LABELS[int(c)] if int(c) < len(LABELS) else "Unknown", float(conf))
+                    for c, conf in zip(predicted_classes, confidences)
+                ]
+            except Exception as e:
+                logger.error(f"Model batch prediction error: {e}")
+        return [self.rule_based_prediction(row) for row in features]
+
+    def rule_based_prediction(self, features: np.ndarray) -> tuple[str, float]:
+        """Fallback rule-based gesture recognition"""
+        # Convert flattened features back to landmarks
+        landmarks = features.reshape(21, 3)
+        
+        # Extract key points
+        wrist = landmarks[0]
+        thumb_tip = landmarks[4]
+        index_tip = landmarks[8]
+        middle_tip = landmarks[12]
+        ring_tip = landmarks[16]
+        pinky_tip = landmarks[20]
+        
+        # Simple rule-based classification
+        fingers_up = []
+        fingers_up.append(thumb_tip[1] < landmarks[3][1])  # Thumb
+        fingers_up.append(index_tip[1] < landmarks[6][1])  # Index
+        fingers_up.append(middle_tip[1] < landmarks[10][1])  # Middle
+        fingers_up.append(ring_tip[1] < landmarks[14][1])  # Ring
+        fingers_up.append(pinky_tip[1] < landmarks[18][1])  # Pinky
+        
+        fingers_up_count = sum(fingers_up)
+        
+        if fingers_up_count == 5:
+            return "Hello", 0.8
+        elif fingers_up_count == 2 and fingers_up[1] and fingers_up[4]:
+            return "I Love You", 0.8
+        elif fingers_up_count == 1 and fingers_up[0]:
+            return "Yes", 0.7
+        elif fingers_up_count == 2 and fingers_up[1] and fingers_up[2]:
+            return "No", 0.7
+        elif fingers_up_count == 0:
+            return "Thank You", 0.6
+        else:
+            return "Unknown", 0.3
+
+
+_model: Optional[ASLModel] = None
+_model_lock = threading.Lock()
+
+
+def get_model() -> ASLModel:
+    """Return this process's active ASLModel, loading it on first use"""
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                # model_registry imports this module, so it can't be imported at the top
+                from model_registry import registry
+                registry.ensure_active()
+    return _model
+
+
+def active_model() -> Optional[ASLModel]:
+    """The active ASLModel, or None while none has been loaded; never loads one"""
+    return _model
+
+
+def set_model(model: ASLModel):
+    """Swap the active model; predictions already running keep the model they started with"""
+    global _model
+    _model = model
+
+
+def predict_batch(features: np.ndarray) -> List[tuple[str, float]]:
+    """Batched prediction against whichever model is active when the batch runs"""
+    return get_model().predict_batch(features)
+
+
+def predict_batch_versioned(features: np.ndarray) -> tuple[Optional[str], List[tuple[str, float]]]:
+    """Batched prediction and the version of the model that made it (read once, so a swap can't split them)"""
+    model = get_model()
+    return model.version, model.predict_batch(features)
+
+
+def landmarks_to_dicts(features: np.ndarray) -> List[Dict]:
+    """Convert 63 flattened landmark values into the response's {x, y, z} list"""
+    return [{"x": float(x), "y": float(y), "z": float(z)} for x, y, z in features.reshape(-1, 3)]
+
+
+def extract_hands(image: np.ndarray, hands) -> List[Dict]:
+    """Every hand MediaPipe found, as {"features": (63,) array, "handedness": "Left"/"Right", "score"}.
+    
+    Handedness follows MediaPipe's convention of a mirrored (selfie) image.
+    """
+    try:
+        results = hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        if not results.multi_hand_landmarks:
+            return []
+        found = []
+        for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
+            features = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark]).reshape(-1)
+            handedness = None
+            if results.multi_handedness and i < len(results.multi_handedness):
+                handedness = results.multi_handedness[i].classification[0]
+            found.append({
+                "features": features,
+                "handedness": handedness.label if handedness is not None else "Unknown",
+                "score": float(handedness.score) if handedness is not None else 0.0,
+            })
+        return found
+    except Exception as e:
+        logger.error(f"Landmark extraction error: {e}")
+        return []
+
+
+def extract_hand_landmarks(image: np.ndarray, hands) -> tuple[Optional[np.ndarray], List[Dict], bool]:
+    """Extract hand landmarks from image using MediaPipe"""
+    try:
+        # Convert BGR to RGB
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        results = hands.process(rgb_image)
+        
+        if results.multi_hand_landmarks:
+            # Get first hand landmarks
+            hand_landmarks = results.multi_hand_landmarks[0]
+            
+            # Extract landmark coordinates
+            landmarks = []
+            features = []
+            
+            for landmark in hand_landmarks.landmark:
+                landmarks.append({
+                    "x": landmark.x,
+                    "y": landmark.y, 
+                    "z": landmark.z
+                })
+                features.extend([landmark.x, landmark.y, landmark.z])
+            
+            return np.array(features), landmarks, True
+        
+        return None, [], False
+        
+    except Exception as e:
+        logger.error(f"Landmark extraction error: {e}")
+        return None, [], False
@@ -0,0 +1,219 @@
+# recording.py
+"""Opt-in recording of /asl-ws sessions into fixed-size, memory-mapped ring files.
+
+Every processed message is stored exactly as it was received (binary frame or
+JSON text), together with the server's result and stage timings, so replay.py
+can feed a session back through the pipeline later. A ring file never grows:
+once it is full the oldest records are overwritten.
+
+File layout (little-endian):
+
+    0      header: magic, version, capacity, head, tail, count, next seq, created at, info length
+    ...    session info as JSON (model version, protocol, preprocessing settings)
+    4096   data region of `capacity` bytes holding records, each 8-byte aligned:
+               length u32, kind u8, 3 pad, seq u64, received at f64 (unix), payload length u32,
+               meta length u32, payload, meta JSON
+           a record with length 0 (or no room left for one) means "continue at the start"
+
+Appending is a memcpy into the mapping plus two header updates: the tail is
+advanced past evicted records before the new bytes land and the head is moved
+after, so the header always describes complete records even if the process
+dies mid-append.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+import uuid
+from typing import Dict, Iterator, NamedTuple, Optional
+
+MAGIC = b"ASLRING1"
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096
+KIND_BINARY = 1  # a binary WebSocket message (protocol.py frame)
+KIND_TEXT = 2    # a JSON text message, UTF-8
+
+# magic, version, capacity, head, tail, count, next seq, created at, info length
+_HEADER = struct.Struct("<8sIQQQQQdI")
+# length, kind, seq, received at, payload length, meta length
+_RECORD = struct.Struct("<IBxxxQdII")
+_ALIGN = 8
+
+
+class Record(NamedTuple):
+    seq: int
+    kind: int
+    received_at: float
+    payload: bytes
+    meta: Dict
+
+
+class RingWriter:
+    """Appends records to a new ring file; only used from one thread"""
+    
+    def __init__(self, path: str, capacity: int, info: Optional[Dict] = None):
+        info_bytes = json.dumps(info or {}).encode()
+        if _HEADER.size + len(info_bytes) > HEADER_SIZE:
+            raise ValueError("Recording info does not fit in the header")
+        self.path = path
+        self.capacity = capacity - capacity % _ALIGN
+        self.head = self.tail = self.count = self.next_seq = 0
+        self.dropped = 0
+        self.created_at = time.time()
+        # "x": an existing recording is never truncated
+        with open(path, "xb") as f:
+            f.truncate(HEADER_SIZE + self.capacity)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), HEADER_SIZE + self.capacity)
+        self._map[_HEADER.size:_HEADER.size + len(info_bytes)] = info_bytes
+        self._info_length = len(info_bytes)
+        self._write_header()
+    
+    def _write_header(self):
+        _HEADER.pack_into(self._map, 0, MAGIC, FORMAT_VERSION, self.capacity, self.head, self.tail,
+                          self.count, self.next_seq, self.created_at, self._info_length)
+    
+    def append(self, kind: int, received_at: float, payload: bytes, meta: Dict) -> bool:
+        """Store one record, evicting the oldest ones as needed; False if it can never fit"""
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+        length = _RECORD.size + len(payload) + len(meta_bytes)
+        length += -length % _ALIGN
+        if length > self.capacity:
+            self.dropped += 1
+            return False
+        
+        if self.head + length > self.capacity:
+            # No contiguous room before the end: give it up and continue at the start
+            self._evict_until(self.capacity)
+            if self.capacity - self.head >= _RECORD.size:
+                struct.pack_into("<I", self._map, HEADER_SIZE + self.head, 0)
+            self.head = 0
+        self._evict_until(self.head + length)
+        self._write_header()
+        
+        start = HEADER_SIZE + self.head
+        _RECORD.pack_into(self._map, start, length, kind, self.next_seq, received_at, len(payload), len(meta_bytes))
+        offset = start + _RECORD.size
+        self._map[offset:offset + len(payload)] = payload
+        offset += len(payload)
+        self._map[offset:offset + len(meta_bytes)] = meta_bytes
+        
+        self.head += length
+        self.count += 1
+        self.next_seq += 1
+        self._write_header()
+        return True
+    
+    def _evict_until(self, end: int):
+        """Drop the oldest records while they start inside [head, end)"""
+        while self.count > 0 and self.head <= self.tail < end:
+            length = _record_length(self._map, self.tail, self.capacity)
+            if length == 0:
+                self.tail = 0
+                break
+            self.tail += length
+            self.count -= 1
+            if self.count == 0:
+                self.tail = self.head
+            elif _record_length(self._map, self.tail, self.capacity) == 0:
+                self.tail = 0
+    
+    def close(self):
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+        self._map = None
+
+
+def _record_length(buffer, offset: int, capacity: int) -> int:
+    """Length of the record at a data offset, 0 for a wrap marker or the end of the region"""
+    if capacity - offset < _RECORD.size:
+        return 0
+    return struct.unpack_from("<I", buffer, HEADER_SIZE + offset)[0]
+
+
+class RingReader:
+    """Reads the records of a ring file, oldest first"""
+    
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.capacity, self.head, self.tail, self.count, self.next_seq, self.created_at, \
+            info_length = _HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an ASL recording")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording format {version} in {path}")
+        self.info = json.loads(self._data[_HEADER.size:_HEADER.size + info_length] or b"{}")
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def close(self):
+        self._data.close()
+    
+    def __iter__(self) -> Iterator[Record]:
+        offset = self.tail
+        for _ in range(self.count):
+            length = _record_length(self._data, offset, self.capacity)
+            if length == 0:
+                offset = 0
+                length = _record_length(self._data, offset, self.capacity)
+            if length < _RECORD.size or offset + length > self.capacity:
+                raise ValueError(f"Corrupt record at offset {offset}")
+            _, kind, seq, received_at, payload_length, meta_length = _RECORD.unpack_from(
+                self._data, HEADER_SIZE + offset
+            )
+            start = HEADER_SIZE + offset + _RECORD.size
+            payload = self._data[start:start + payload_length]
+            meta = json.loads(self._data[start + payload_length:start + payload_length + meta_length])
+            yield Record(seq, kind, received_at, payload, meta)
+            offset += length
+
+
+def recordings_size(directory: str) -> int:
+    """Bytes taken by the ring files in a recording directory"""
+    if not os.path.isdir(directory):
+        return 0
+    with os.scandir(directory) as entries:
+        return sum(entry.stat().st_size for entry in entries if entry.name.endswith(".ring") and entry.is_file())
+
+
+class SessionRecorder:
+    """Records one WebSocket session; called from the event loop after each response"""
+    
+    # Response fields worth keeping; landmarks can be recomputed from the frame
+    RESULT_FIELDS = ("frame_id", "hand_detected", "handedness", "gesture", "confidence", "reused", "sequence_event",
+                     "error")
+    
+    def __init__(self, directory: str, session_id: str, capacity: int, info: Dict, max_total_bytes: int = 0):
+        os.makedirs(directory, exist_ok=True)
+        if max_total_bytes:
+            used = recordings_size(directory)
+            if used + HEADER_SIZE + capacity > max_total_bytes:
+                raise ValueError(f"Recording storage is full ({used >> 20} of {max_total_bytes >> 20} MB in use)")
+        # The random suffix keeps recordings started within the same second apart
+        self.path = os.path.join(
+            directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{session_id[:12]}-{uuid.uuid4().hex[:8]}.ring"
+        )
+        self.writer = RingWriter(self.path, capacity, info)
+    
+    def record(self, message: Dict, received_at_monotonic: float, response: Dict, timings_ms: Dict[str, float]):
+        if message.get("bytes") is not None:
+            kind, payload = KIND_BINARY, message["bytes"]
+        else:
+            kind, payload = KIND_TEXT, message["text"].encode()
+        meta = {key: response[key] for key in self.RESULT_FIELDS if key in response}
+        meta["timings_ms"] = timings_ms
+        # Wall-clock arrival time, so recordings can be lined up with logs
+        received_at = time.time() - (time.monotonic() - received_at_monotonic)
+        self.writer.append(kind, received_at, payload, meta)
+    
+    def stats(self) -> Dict:
+        return {"path": self.path, "records": self.writer.count, "dropped": self.writer.dropped}
+    
+    def close(self):
+        self.writer.close()
@@ -0,0 +1,203 @@
+# replay.py
+"""Replay a recorded /asl-ws session through the current pipeline.
+
+    python replay.py session_recordings/<recording>.ring [--static] [--version V] [--out report.json]
+
+Sessions are recorded with ASL_RECORDING=opt-in (clients connect with
+?record=1) or ASL_RECORDING=all. Every recorded message is parsed the way
+main.py parses it, JPEG frames are decoded and run through
+extract_hand_landmarks (one tracking graph, like a live session; --static for
+detection only), and all hands are classified with ASLModel.predict_batch in
+chunks - back to back, without the recording's pacing. The report has the
+replay's throughput and stage percentiles next to the timings recorded live,
+and every frame whose result differs from what the server answered at the
+time, so a recording doubles as a regression benchmark for model and pipeline
+changes.
+"""
+import argparse
+import base64
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+from benchmark import percentiles
+from preprocess import decode_frame
+from protocol import KIND_LANDMARKS, decode_binary_frame
+from recording import KIND_BINARY, Record, RingReader
+
+STAGES = ("parse", "decode", "mediapipe", "predict")
+
+
+def parse_record(record: Record) -> tuple[str, np.ndarray]:
+    """("jpeg" | "landmarks", payload) of a recorded message, parsed like main.handle_message"""
+    if record.kind == KIND_BINARY:
+        frame = decode_binary_frame(record.payload)
+        return ("landmarks" if frame.kind == KIND_LANDMARKS else "jpeg"), frame.payload
+    data = json.loads(record.payload)
+    image = data["frame"]
+    if "," in image:
+        image = image.split(",")[1]
+    return "jpeg", np.frombuffer(base64.b64decode(image), np.uint8)
+
+
+def compare(result: Dict) -> Optional[Dict]:
+    """How a replayed frame differs from the recorded response, or None when it matches"""
+    recorded = result["recorded"]
+    if "error" in recorded or "error" in result:
+        if ("error" in recorded) == ("error" in result):
+            return None
+        kind = "error"
+    elif bool(recorded.get("hand_detected")) != result["hand_detected"]:
+        kind = "detection"
+    elif result["hand_detected"] and recorded.get("gesture") != result["gesture"]:
+        kind = "gesture"
+    else:
+        return None
+    return {
+        "seq": result["seq"],
+        "type": kind,
+        "recorded": {key: recorded.get(key) for key in ("frame_id", "hand_detected", "gesture", "confidence",
+                                                        "reused", "error") if key in recorded},
+        "replayed": {key: result.get(key) for key in ("hand_detected", "gesture", "confidence", "error")
+                     if key in result},
+    }
+
+
+def replay(path: str, static: bool = False, chunk_size: int = 64, version: Optional[str] = None,
+           max_diffs: int = 50) -> Dict:
+    from recognition import create_hands, extract_hand_landmarks, get_model
+    
+    if version is not None:
+        from model_registry import registry
+        model, _ = registry.load(version)
+    else:
+        model = get_model()
+    reader = RingReader(path)
+    # The recorded answers describe the first of up to max_hands hands
+    hands = create_hands(static_image_mode=static, max_num_hands=reader.info.get("max_hands", 1))
+    decode_max_side = reader.info.get("decode_max_side", config.DECODE_MAX_SIDE)
+    
+    results: List[Dict] = []
+    pending: List[int] = []  # results waiting for the next predict_batch
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    recorded_timings: Dict[str, List[float]] = {}
+    
+    def classify_pending():
+        started = time.perf_counter()
+        predictions = model.predict_batch(np.stack([results[i]["features"] for i in pending]))
+        # Amortized over the batch, like the server's batched predictions
+        per_frame = (time.perf_counter() - started) / len(pending)
+        for i, (gesture, confidence) in zip(pending, predictions):
+            results[i]["gesture"], results[i]["confidence"] = gesture, confidence
+            timings["predict"].append(per_frame)
+        pending.clear()
+    
+    started = time.perf_counter()
+    try:
+        for record in reader:
+            for stage, ms in record.meta.get("timings_ms", {}).items():
+                recorded_timings.setdefault(stage, []).append(ms / 1000)
+            result = {"seq": record.seq, "recorded": record.meta}
+            results.append(result)
+            
+            lap = time.perf_counter()
+            try:
+                kind, payload = parse_record(record)
+            except (ValueError, KeyError, TypeError) as e:
+                result["error"] = f"Parse failed: {e}"
+                continue
+            now = time.perf_counter()
+            timings["parse"].append(now - lap)
+            lap = now
+            
+            features = None
+            if kind == "landmarks":
+                features = payload
+            else:
+                image, _ = decode_frame(payload, decode_max_side)
+                now = time.perf_counter()
+                timings["decode"].append(now - lap)
+                lap = now
+                if image is None:
+                    result["error"] = "Failed to decode image"
+                    continue
+                found, _, hand_detected = extract_hand_landmarks(image, hands)
+                timings["mediapipe"].append(time.perf_counter() - lap)
+                if hand_detected:
+                    features = found
+            
+            result["hand_detected"] = features is not None
+            if features is not None:
+                result["features"] = features
+                pending.append(len(results) - 1)
+                if len(pending) >= chunk_size:
+                    classify_pending()
+        if pending:
+            classify_pending()
+    finally:
+        hands.close()
+        reader.close()
+    seconds = time.perf_counter() - started
+    
+    diffs = [diff for diff in map(compare, results) if diff is not None]
+    counts = {kind: sum(1 for diff in diffs if diff["type"] == kind) for kind in ("gesture", "detection", "error")}
+    matched = [
+        abs(result["confidence"] - result["recorded"]["confidence"]) for result in results
+        if result.get("hand_detected") and "confidence" in result["recorded"]
+        and result["recorded"].get("gesture") == result.get("gesture")
+    ]
+    return {
+        "recording": path,
+        "info": reader.info,
+        "frames": len(results),
+        "replay": {
+            "model_version": model.version,
+            "model_backend": model.backend,
+            "hand_mode": "detection" if static else "tracking",
+            "seconds": round(seconds, 3),
+            "fps": round(len(results) / seconds, 2) if seconds > 0 else None,
+            "stages": {stage: percentiles(values) for stage, values in timings.items() if values},
+        },
+        "recorded_stages": {stage: percentiles(values) for stage, values in recorded_timings.items()},
+        "differences": {
+            "total": len(diffs),
+            **counts,
+            # Recorded answers that came from motion gating rather than a fresh pass
+            "recorded_reused": sum(1 for diff in diffs if diff["recorded"].get("reused")),
+        },
+        "max_confidence_delta": round(max(matched), 6) if matched else None,
+        "diffs": diffs[:max_diffs],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded /asl-ws session and report differences")
+    parser.add_argument("recording", help="A .ring file from ASL_RECORD_DIR")
+    parser.add_argument("--static", action="store_true", help="Detect hands in every frame instead of tracking")
+    parser.add_argument("--version", help="Model version to replay against (default: the active one)")
+    parser.add_argument("--chunk", type=int, default=64, help="Hands per predict_batch call")
+    parser.add_argument("--max-diffs", type=int, default=50, help="Differing frames listed in the report")
+    parser.add_argument("--fail-on-diff", action="store_true", help="Exit with status 1 when any result differs")
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    
+    report = replay(args.recording, args.static, max(1, args.chunk), args.version, args.max_diffs)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+        print(f"📝 Report written to {args.out}")
+    else:
+        print(text)
+    print(f"🔁 {report['frames']} frames in {report['replay']['seconds']} s "
+          f"({report['replay']['fps']} fps), {report['differences']['total']} differences", file=sys.stderr)
+    if args.fail_on_diff and report["differences"]["total"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
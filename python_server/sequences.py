@@ -0,0 +1,167 @@
+# sequences.py
+"""Sliding-window recognition of motion signs.
+
+A session in sequence mode keeps the landmarks of its last `window` frames in
+a preallocated ring (rows of NaN where no hand was seen). Every `stride`-th
+frame the window is described by window_features() and classified by the
+temporal model that train_model.py exports next to the per-frame network
+(asl_sequence.npz). A GestureDebouncer turns those classifications into
+events: a gesture is reported once, after it won `confirmations` windows in a
+row, and again only after something else (or nothing) was stable in between.
+
+window_features() is used for training and serving alike, so both see exactly
+the same description of a window:
+
+    shape    the hand at `steps` evenly spaced moments, relative to the wrist
+    motion   the wrist's path over those moments, relative to where it started
+    present  the share of the window's frames that had a hand
+
+Both are scaled by the hand's size, so distance to the camera doesn't matter.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+FEATURE_DIMS = 63
+WINDOW_STEPS = 8  # moments a window is resampled to
+MIN_PRESENT = 4   # frames with a hand a window needs before it is classified
+_WRIST, _MIDDLE_MCP = 0, 9
+
+
+def window_feature_dims(steps: int = WINDOW_STEPS) -> int:
+    return steps * FEATURE_DIMS + steps * 3 + 1
+
+
+def window_features(window: np.ndarray, steps: int = WINDOW_STEPS) -> Optional[np.ndarray]:
+    """Fixed-size description of a (frames, 63) window, None when too few frames had a hand"""
+    present = ~np.isnan(window[:, 0])
+    frames = np.flatnonzero(present)
+    if len(frames) < min(MIN_PRESENT, len(window)):
+        return None
+    # Evenly spaced over the part of the window with a hand; gaps take the last hand seen
+    moments = np.linspace(frames[0], frames[-1], steps)
+    picked = frames[np.searchsorted(frames, moments, side="right") - 1]
+    points = window[picked].reshape(steps, 21, 3).astype(np.float64)
+    wrist = points[:, _WRIST]
+    size = float(np.linalg.norm(points[:, _MIDDLE_MCP] - wrist, axis=1).mean()) or 1.0
+    shape = (points - wrist[:, None]) / size
+    motion = (wrist - wrist[0]) / size
+    return np.concatenate([shape.ravel(), motion.ravel(), [present.mean()]]).astype(np.float32)
+
+
+def clip_windows(clip: np.ndarray, window: int, stride: int) -> List[np.ndarray]:
+    """Features of every `window`-frame slice of a recorded clip (the whole clip when it is shorter)"""
+    starts = range(0, max(1, len(clip) - window + 1), max(1, stride))
+    found = (window_features(clip[start:start + window]) for start in starts)
+    return [features for features in found if features is not None]
+
+
+class SequenceWindow:
+    """The last `size` landmark vectors in a preallocated ring; nothing is allocated per frame"""
+    
+    def __init__(self, size: int, dims: int = FEATURE_DIMS):
+        self.size = max(2, size)
+        self._ring = np.full((self.size, dims), np.nan, dtype=np.float32)
+        # ordered() copies into this, so classifying doesn't allocate either
+        self._ordered = np.empty_like(self._ring)
+        self.head = 0  # the slot the next frame goes into
+        self.frames = 0
+    
+    def push(self, features: Optional[np.ndarray]):
+        """Add a frame's landmarks, or None for a frame without a hand"""
+        if features is None:
+            self._ring[self.head] = np.nan
+        else:
+            self._ring[self.head] = features.reshape(-1)
+        self.head = (self.head + 1) % self.size
+        self.frames += 1
+    
+    def repeat(self):
+        """Add a frame identical to the previous one (a frame skipped by motion gating)"""
+        self._ring[self.head] = self._ring[self.head - 1]
+        self.head = (self.head + 1) % self.size
+        self.frames += 1
+    
+    def ordered(self) -> np.ndarray:
+        """The window oldest first; the array is reused by the next call"""
+        tail = self.size - self.head
+        self._ordered[:tail] = self._ring[self.head:]
+        self._ordered[tail:] = self._ring[:self.head]
+        return self._ordered
+    
+    def clear(self):
+        self._ring.fill(np.nan)
+        self.head = 0
+        self.frames = 0
+
+
+class GestureDebouncer:
+    """Turns window classifications into stable gesture events"""
+    
+    def __init__(self, min_confidence: float = 0.8, confirmations: int = 2):
+        self.min_confidence = min_confidence
+        self.confirmations = max(1, confirmations)
+        self.candidate: Optional[str] = None
+        # Windows the candidate has won in a row and their summed confidence; constant size however long it lasts
+        self.streak = 0
+        self.streak_confidence = 0.0
+        self.stable: Optional[str] = None
+    
+    def update(self, prediction: Optional[tuple[str, float]]) -> Optional[Dict]:
+        """Feed one classification (None: window without enough hand); returns an event when one fires"""
+        gesture = None
+        if prediction is not None and prediction[1] >= self.min_confidence:
+            gesture = prediction[0]
+        if gesture != self.candidate:
+            self.candidate, self.streak, self.streak_confidence = gesture, 0, 0.0
+        if self.streak >= self.confirmations:
+            # Already confirmed; nothing left to decide until the candidate changes
+            return None
+        self.streak += 1
+        self.streak_confidence += prediction[1] if gesture is not None else 0.0
+        if self.streak < self.confirmations or gesture == self.stable:
+            return None
+        # Nothing stable in between re-arms the same gesture
+        self.stable = gesture
+        if gesture is None:
+            return None
+        return {"gesture": gesture, "confidence": round(self.streak_confidence / self.streak, 4)}
+
+
+class SequenceRecognizer:
+    """Sequence-mode state of one session: the window, the classification cadence and the debouncer"""
+    
+    def __init__(self, window: int, stride: int, min_confidence: float, confirmations: int):
+        self.window = SequenceWindow(window)
+        self.stride = max(1, stride)
+        self.debouncer = GestureDebouncer(min_confidence, confirmations)
+        self.classifications = 0
+        self.events = 0
+    
+    def observe(self, features: Optional[np.ndarray], repeat: bool = False) -> bool:
+        """Add one frame; True when the window is due to be classified"""
+        if repeat:
+            self.window.repeat()
+        else:
+            self.window.push(features)
+        return self.window.frames % self.stride == 0
+    
+    def decide(self, prediction: Optional[tuple[str, float]]) -> Optional[Dict]:
+        """Debounce the classification of the current window; returns an event when one fires"""
+        self.classifications += 1
+        event = self.debouncer.update(prediction)
+        if event is not None:
+            self.events += 1
+            event["frame"] = self.window.frames
+        return event
+    
+    def settings(self) -> Dict:
+        return {
+            "window": self.window.size,
+            "stride": self.stride,
+            "min_confidence": self.debouncer.min_confidence,
+            "confirmations": self.debouncer.confirmations,
+        }
+    
+    def stats(self) -> Dict:
+        return {"frames": self.window.frames, "classifications": self.classifications, "events": self.events}
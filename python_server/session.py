@@ -0,0 +1,135 @@
+# session.py
+"""Per-connection state for /asl-ws: latest-frame-wins ingestion and rate hints"""
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from gating import MotionGate
+
+# Smoothing factor for the arrival-interval and processing-time averages
+_EWMA_ALPHA = 0.2
+
+
+class LatestFrameSlot:
+    """Holds at most one pending message; a newer message replaces the one still waiting"""
+    
+    def __init__(self):
+        self._pending: Optional[tuple[float, Any]] = None
+        self._closed = False
+        self._ready = asyncio.Event()
+    
+    def put(self, message: Any) -> bool:
+        """Store a message, returning True if it superseded an unprocessed one"""
+        superseded = self._pending is not None
+        self._pending = (time.monotonic(), message)
+        self._ready.set()
+        return superseded
+    
+    @property
+    def pending(self) -> bool:
+        return self._pending is not None
+    
+    def close(self):
+        self._closed = True
+        self._ready.set()
+    
+    async def get(self) -> Optional[tuple[float, Any]]:
+        """Wait for the newest (received_at, message), or None once closed and drained"""
+        while self._pending is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        item, self._pending = self._pending, None
+        return item
+
+
+class ASLSession:
+    """State for one WebSocket connection"""
+    
+    def __init__(self, protocol: Optional[str], max_frame_age_ms: float, include_timings: bool = False,
+                 max_hands: int = 1):
+        self.session_id = uuid.uuid4().hex
+        self.protocol = protocol
+        self.max_frame_age = max_frame_age_ms / 1000.0
+        self.slot = LatestFrameSlot()
+        self.cache = None  # PredictionCache (shared or per-session), set by the endpoint
+        self.gate = MotionGate()
+        # Normalized box around the hand in the last processed frame, for ROI cropping
+        self.roi: Optional[tuple[float, float, float, float]] = None
+        # Hands detected and classified per frame
+        self.max_hands = max_hands
+        # SequenceRecognizer while the session is in sequence mode (see sequences.py)
+        self.sequence = None
+        # Add a per-stage "timings_ms" breakdown to every response (debugging)
+        self.include_timings = include_timings
+        # SessionRecorder while this session is being recorded (see recording.py)
+        self.recorder = None
+        # A session gets at most one recording file, however often it toggles recording
+        self.recorded = False
+        # The reader (config acks) and the processing loop both send
+        self.send_lock = asyncio.Lock()
+        
+        self.received = 0
+        self.processed = 0
+        self.dropped_superseded = 0
+        self.dropped_stale = 0
+        
+        self._last_arrival: Optional[float] = None
+        self._arrival_interval: Optional[float] = None
+        self._processing_time: Optional[float] = None
+    
+    def on_message(self, message: Any) -> bool:
+        """Called by the reader for every incoming message; True if it superseded a pending one"""
+        now = time.monotonic()
+        self.received += 1
+        if self._last_arrival is not None:
+            self._arrival_interval = _ewma(self._arrival_interval, now - self._last_arrival)
+        self._last_arrival = now
+        if self.slot.put(message):
+            self.dropped_superseded += 1
+            return True
+        return False
+    
+    def is_stale(self, received_at: float) -> bool:
+        if self.max_frame_age > 0 and time.monotonic() - received_at > self.max_frame_age:
+            self.dropped_stale += 1
+            return True
+        return False
+    
+    def on_processed(self, received_at: float):
+        self.processed += 1
+        self._processing_time = _ewma(self._processing_time, time.monotonic() - received_at)
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped_superseded + self.dropped_stale,
+            "dropped_superseded": self.dropped_superseded,
+            "dropped_stale": self.dropped_stale,
+            "frames_reused": self.gate.frames_reused,
+            "classifications_skipped": self.gate.classifications_skipped,
+        }
+        if self.sequence is not None:
+            stats["sequence"] = self.sequence.stats()
+        return stats
+    
+    def rate_hint(self) -> Optional[Dict[str, Any]]:
+        """Advise the client whether to send frames slower or faster"""
+        if self._arrival_interval is None or self._processing_time is None:
+            return None
+        # Aim slightly above the time a frame spends in the server
+        target_ms = round(self._processing_time * 1.2 * 1000)
+        if self._arrival_interval < self._processing_time:
+            action = "slow_down"
+        elif self._arrival_interval > 3 * self._processing_time:
+            action = "speed_up"
+        else:
+            action = "steady"
+        return {"action": action, "suggested_interval_ms": target_ms}
+
+
+def _ewma(current: Optional[float], sample: float) -> float:
+    return sample if current is None else current + _EWMA_ALPHA * (sample - current)
@@ -0,0 +1,152 @@
+# shared_stats.py
+"""Shared-memory metrics table for the multi-worker server.
+
+main.py creates one named segment before uvicorn forks its workers and passes
+the name on in ASL_SHARED_STATS. Every worker claims a row and is its only
+writer (no locks on the hot path); /health and /metrics in any worker sum the
+rows, so they report totals across all workers. A row left behind by a dead
+worker keeps its counters for the worker that replaces it, but its gauges no
+longer count.
+"""
+import os
+import tempfile
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: rows are claimed without a lock
+    fcntl = None
+
+# Column 0 of every row holds the owning worker's pid (0 = free)
+_PID = 0
+_HEADER = 1
+
+
+def _alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedStats:
+    """rows x (1 + width) float64 table in a named shared-memory segment"""
+    
+    def __init__(self, shm: shared_memory.SharedMemory, rows: int, width: int, owner: bool):
+        self.shm = shm
+        self.rows = rows
+        self.width = width
+        self.owner = owner
+        self.table = np.ndarray((rows, _HEADER + width), dtype=np.float64, buffer=shm.buf)
+        self.row: Optional[int] = None
+    
+    @classmethod
+    def create(cls, rows: int, width: int) -> "SharedStats":
+        """Allocate a zeroed table (in the parent, before the workers start)"""
+        size = rows * (_HEADER + width) * 8
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        stats = cls(shm, rows, width, owner=True)
+        stats.table[:] = 0
+        return stats
+    
+    @classmethod
+    def attach(cls, name: str, rows: int, width: int) -> "SharedStats":
+        # Workers spawned by main.py share its resource tracker, so attaching here
+        # never unlinks the segment behind the parent's back
+        shm = shared_memory.SharedMemory(name=name)
+        if shm.size < rows * (_HEADER + width) * 8:
+            shm.close()
+            raise ValueError(f"Shared stats segment '{name}' is too small for {rows} x {width} values")
+        return cls(shm, rows, width, owner=False)
+    
+    @property
+    def name(self) -> str:
+        return self.shm.name
+    
+    def claim(self, reset_columns: Iterable[int] = ()) -> np.ndarray:
+        """Take a free row (or one whose worker died) and return a writable view of its values"""
+        with self._lock():
+            pid = os.getpid()
+            for row in range(self.rows):
+                owner = int(self.table[row, _PID])
+                if owner == pid or not _alive(owner):
+                    # A replaced worker's counters carry on; its gauges are stale
+                    for column in reset_columns:
+                        self.table[row, _HEADER + column] = 0
+                    self.table[row, _PID] = pid
+                    self.row = row
+                    return self.table[row, _HEADER:]
+        raise RuntimeError(f"All {self.rows} shared stats rows are in use")
+    
+    def release(self):
+        if self.row is not None and int(self.table[self.row, _PID]) == os.getpid():
+            self.table[self.row, _PID] = 0
+        self.row = None
+    
+    def totals(self, gauge_columns: Iterable[int] = ()) -> np.ndarray:
+        """Sum of all rows; gauges only from rows whose worker is still running"""
+        values = self.table[:, _HEADER:]
+        totals = values.sum(axis=0)
+        gauge_columns = list(gauge_columns)
+        if gauge_columns:
+            live = np.array([_alive(int(pid)) for pid in self.table[:, _PID]], dtype=bool)
+            totals[gauge_columns] = values[live][:, gauge_columns].sum(axis=0)
+        return totals
+    
+    def workers(self, columns: Dict[str, int]) -> List[Dict]:
+        """Selected values of every claimed row"""
+        result = []
+        for row in self.table:
+            pid = int(row[_PID])
+            if pid:
+                result.append({
+                    "pid": pid,
+                    "alive": _alive(pid),
+                    **{key: float(row[_HEADER + column]) for key, column in columns.items()},
+                })
+        return result
+    
+    def close(self):
+        """Give up this process's row; the creating process also removes the segment"""
+        self.release()
+        self.table = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a metrics view into the row is still alive; the mapping goes with the process
+        if self.owner:
+            self.shm.unlink()
+            try:
+                os.remove(self._lock().path)
+            except OSError:
+                pass
+    
+    def _lock(self):
+        return _FileLock(os.path.join(tempfile.gettempdir(), f"{self.shm.name.lstrip('/')}.lock"))
+
+
+class _FileLock:
+    """Exclusive advisory lock on a file, so two starting workers never claim the same row"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+    
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
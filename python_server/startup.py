@@ -0,0 +1,74 @@
+# startup.py
+"""Phase-by-phase startup of a server worker, behind the /live and /ready probes.
+
+Importing main.py only wires the app together. The expensive parts run in a
+task the lifespan handler starts, one phase after the other:
+
+    imports  MediaPipe (several seconds on its own)
+    model    loading the active model version and its forward-pass warm-up
+    warmup   synthetic frames through decode, MediaPipe and predict in every worker
+
+so the worker answers /live right away while /ready stays 503 (and new
+WebSocket sessions are turned away) until every phase has finished.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTracker:
+    """Phase timings and readiness of one worker's startup"""
+    
+    def __init__(self):
+        self.state = "starting"  # then "ready" or "failed"
+        self.phase: Optional[str] = None
+        self.phases_ms: Dict[str, float] = {}
+        self.details: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.ready_after_ms: Optional[float] = None
+        self._started = time.perf_counter()
+    
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+    
+    @contextmanager
+    def track(self, phase: str):
+        """Time one phase; an exception fails the startup"""
+        self.phase = phase
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.fail(f"{phase}: {e}")
+            logger.error(f"❌ Startup failed in phase '{phase}': {e}")
+            raise
+        finally:
+            self.phases_ms[phase] = round(1000 * (time.perf_counter() - started), 1)
+            self.phase = None
+        logger.info(f"⏱️ Startup phase '{phase}' took {self.phases_ms[phase]} ms")
+    
+    def fail(self, error: str):
+        """Startup can't finish; /live and /ready answer 503 from now on"""
+        self.state = "failed"
+        self.error = error
+    
+    def mark_ready(self):
+        self.state = "ready"
+        self.ready_after_ms = round(1000 * (time.perf_counter() - self._started), 1)
+        logger.info(f"✅ Ready for traffic {self.ready_after_ms} ms after import "
+                    f"({', '.join(f'{name} {ms} ms' for name, ms in self.phases_ms.items())})")
+    
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "phase": self.phase,
+            "phases_ms": dict(self.phases_ms),
+            "ready_after_ms": self.ready_after_ms,
+            "elapsed_ms": round(1000 * (time.perf_counter() - self._started), 1),
+            "error": self.error,
+            **self.details,
+        }
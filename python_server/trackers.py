@@ -0,0 +1,163 @@
+# trackers.py
+"""Bounded pool of per-session MediaPipe hand trackers"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from recognition import create_hands
+
+logger = logging.getLogger(__name__)
+
+
+class _Lease:
+    __slots__ = ("hands", "max_hands", "last_used", "in_use", "needs_reset", "closing")
+    
+    def __init__(self, hands, max_hands: int):
+        self.hands = hands  # None until acquire() has built the graph outside the pool's lock
+        self.max_hands = max_hands
+        self.last_used = time.monotonic()
+        self.in_use = False
+        self.needs_reset = False
+        self.closing = False  # the session ended mid-frame; release() closes the graph
+
+
+class TrackerPool:
+    """Leases each session its own tracking-mode Hands instance.
+    
+    A tracker only keeps its fast tracking path when it sees consecutive frames
+    of the same hand, so trackers are never shared between sessions. Trackers
+    idle for longer than idle_timeout_s are closed; when the pool is full the
+    least recently used idle tracker is reset and handed to the new session.
+    If every tracker is busy, acquire() returns None and the caller falls back
+    to detection-only processing. max_num_hands is fixed when a graph is built,
+    so a session that changes its max_hands gets a new tracker. Graphs are
+    built, reset and closed outside the pool's lock, on a lease reserved for
+    the session, so one session's slow graph setup never stalls the others.
+    """
+    
+    def __init__(self, max_size: int, idle_timeout_s: float,
+                 factory: Callable = create_hands):
+        self.max_size = max(0, max_size)
+        self.idle_timeout_s = idle_timeout_s
+        self.factory = factory
+        self._leases: "OrderedDict[str, _Lease]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.created = 0
+        self.evictions = 0
+        self.fallbacks = 0
+    
+    def acquire(self, session_id: str, max_hands: int = 1):
+        """Mark the session's tracker busy and return it, or None when the pool is exhausted"""
+        stale = []
+        with self._lock:
+            now = time.monotonic()
+            lease = self._leases.get(session_id)
+            if lease is not None:
+                self._leases.move_to_end(session_id)
+                self.hits += 1
+            else:
+                stale = self._expire_idle(now)
+                lease = self._lease_for_new_session(session_id)
+                if lease is None:
+                    self.fallbacks += 1
+            if lease is not None:
+                # Reserved: nobody else hands out or evicts a busy lease, so its graph can be
+                # built, reset or closed below without holding up every other session's frame
+                lease.in_use = True
+                lease.last_used = now
+                build = lease.hands is None or lease.max_hands != max_hands
+                if build:
+                    self.created += 1
+        for hands in stale:
+            hands.close()
+        if lease is None:
+            return None
+        
+        if build:
+            if lease.hands is not None:
+                lease.hands.close()
+                lease.hands = None
+            try:
+                lease.hands = self.factory(max_num_hands=max_hands)
+            except Exception:
+                with self._lock:
+                    if self._leases.get(session_id) is lease:
+                        del self._leases[session_id]
+                raise
+            lease.max_hands = max_hands
+            lease.needs_reset = False
+        elif lease.needs_reset:
+            lease.hands.reset()
+            lease.needs_reset = False
+        return lease.hands
+    
+    def release(self, session_id: str):
+        """Return the session's tracker to the pool after a frame"""
+        with self._lock:
+            lease = self._leases.get(session_id)
+            if lease is None:
+                return
+            lease.in_use = False
+            lease.last_used = time.monotonic()
+            if not lease.closing:
+                return
+            del self._leases[session_id]
+        if lease.hands is not None:
+            lease.hands.close()
+    
+    def close_session(self, session_id: str):
+        """Drop the session's tracker when its connection ends; a tracker mid-frame is closed on release"""
+        with self._lock:
+            lease = self._leases.get(session_id)
+            if lease is None:
+                return
+            if lease.in_use:
+                # The frame keeps running after its caller gave up (e.g. a disconnect); don't close under it
+                lease.closing = True
+                return
+            del self._leases[session_id]
+        if lease.hands is not None:
+            lease.hands.close()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._leases),
+                "max_size": self.max_size,
+                "busy": sum(1 for lease in self._leases.values() if lease.in_use),
+                "hits": self.hits,
+                "created": self.created,
+                "evictions": self.evictions,
+                "fallbacks": self.fallbacks,
+            }
+    
+    def _lease_for_new_session(self, session_id: str) -> Optional[_Lease]:
+        """Reserve a slot for a new session (called with the lock held); acquire() fills in its graph"""
+        if len(self._leases) < self.max_size:
+            lease = _Lease(None, 0)
+        else:
+            # Reuse the least recently used tracker that isn't mid-frame
+            victim = next((sid for sid, lease in self._leases.items() if not lease.in_use), None)
+            if victim is None:
+                return None
+            lease = self._leases.pop(victim)
+            # The previous session's hand must not carry over into the new one
+            lease.needs_reset = True
+            self.evictions += 1
+        self._leases[session_id] = lease
+        return lease
+    
+    def _expire_idle(self, now: float) -> list:
+        """Drop idle trackers (called with the lock held) and return their graphs for the caller to close"""
+        expired = [
+            sid for sid, lease in self._leases.items()
+            if not lease.in_use and now - lease.last_used > self.idle_timeout_s
+        ]
+        stale = [self._leases.pop(sid).hands for sid in expired]
+        self.evictions += len(expired)
+        if expired:
+            logger.info(f"🧹 Closed {len(expired)} idle hand trackers")
+        return [hands for hands in stale if hands is not None]
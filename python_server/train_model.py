@@ -1,29 +1,54 @@
+import argparse
+import json
+import multiprocessing
 import cv2
-import mediapipe as mp
 import numpy as np
-import pandas as pd
 import pickle
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-import tensorflow as tf
-from tensorflow.keras import layers, models
 import time
 import os
+from typing import Dict, List, Optional, Sequence
 
-# Initialize MediaPipe Hands
-mp_hands = mp.solutions.hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.7,  # Higher confidence for better detection
-    min_tracking_confidence=0.7
-)
+import config
+from config import available_cores
+from dataset import DATASET_DIR, SEQUENCE_DATASET_DIR, LandmarkDataset
+from numpy_engine import export_numpy_model
+from sequences import WINDOW_STEPS, clip_windows, window_feature_dims
+
+# MediaPipe Hands, created on first use: the training worker processes import
+# this module too and have no use for a camera pipeline (or TensorFlow, for the RF)
+mp_hands = None
 
 # Define labels - REAL ASL GESTURES
 LABELS = ["Yes", "No", "I Love You", "Hello", "Thank You"]
 
+# Candidate models trained by train_models()
+MODEL_KINDS = ("rf", "nn", "seq")
+# Frames between the starts of two training windows cut from the same clip
+SEQUENCE_TRAIN_STRIDE = 2
+# Fine-tuning from the previous weights starts at a lower learning rate than a fresh model
+WARM_START_LEARNING_RATE = 0.0003
+
+def get_hands():
+    """The MediaPipe Hands instance used for recording."""
+    global mp_hands
+    if mp_hands is None:
+        import mediapipe as mp
+        mp_hands = mp.solutions.hands.Hands(
+            static_image_mode=False,
+            max_num_hands=1,
+            min_detection_confidence=0.7,  # Higher confidence for better detection
+            min_tracking_confidence=0.7
+        )
+    return mp_hands
+
 def collect_data_for_sign(sign: str, num_samples: int = 120):
     """Fast data collection with manual control - closer to original speed."""
+    import mediapipe as mp
+    hands = get_hands()
     cap = cv2.VideoCapture(0)
     print(f"\n🎯 Collecting '{sign}' - Press ENTER when ready, then 'E' to start!")
     input("Press ENTER to begin...")
@@ -42,7 +67,7 @@ def collect_data_for_sign(sign: str, num_samples: int = 120):
         # Flip for mirror effect
         frame = cv2.flip(frame, 1)
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = mp_hands.process(frame_rgb)
+        results = hands.process(frame_rgb)
         
         # Show status
         status = "🔴 RECORDING" if collecting else "⏸️ PAUSED"
@@ -95,16 +120,92 @@ def collect_data_for_sign(sign: str, num_samples: int = 120):
     print(f"✅ Completed '{sign}' - {len(features)} samples collected")
     return features
 
-def save_data_to_csv(X: np.ndarray, y: np.ndarray, filename: str = "asl_data.csv"):
-    """Save features and labels to a CSV file."""
-    columns = [f"landmark_{i}_{dim}" for i in range(21) for dim in ["x", "y", "z"]]
-    df = pd.DataFrame(X, columns=columns)
-    df["label"] = y
-    df.to_csv(filename, index=False)
-    print(f"💾 Data saved to {filename}")
+def collect_sequences_for_sign(sign: str, clips: int = 10,
+                               frames: int = config.SEQUENCE_WINDOW) -> List[tuple[np.ndarray, np.ndarray]]:
+    """Record clips of a motion sign: each press of 'E' captures the next `frames` frames, hand or not."""
+    import mediapipe as mp
+    hands = get_hands()
+    cap = cv2.VideoCapture(0)
+    print(f"\n🎬 Recording {clips} clips of '{sign}' ({frames} frames each)")
+    input("Press ENTER to begin...")
+    print(f"🔴 Press 'E' to record each clip of '{sign}', 'Q' to finish early")
+    
+    recorded = []
+    current = None  # rows of the clip being recorded
+    times = []
+    while len(recorded) < clips:
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        
+        # Flip for mirror effect, like the single-frame samples
+        frame = cv2.flip(frame, 1)
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        
+        if current is not None:
+            # Frames without a hand are kept (as NaN), so a clip keeps its timing
+            if results.multi_hand_landmarks:
+                landmarks = results.multi_hand_landmarks[0].landmark
+                current.append(np.array([[lm.x, lm.y, lm.z] for lm in landmarks]).flatten())
+            else:
+                current.append(np.full(63, np.nan))
+            times.append(time.time())
+            if len(current) == frames:
+                clip = np.array(current)
+                recorded.append((clip, np.array(times)))
+                missing = int(np.isnan(clip[:, 0]).sum())
+                print(f"✅ Clip {len(recorded)}/{clips} of '{sign}' ({missing} frames without a hand)")
+                current = None
+        
+        status = f"🔴 RECORDING {len(current)}/{frames}" if current is not None else "⏸️ PAUSED"
+        color = (0, 255, 0) if current is not None else (0, 0, 255)
+        cv2.putText(frame, f"{sign}: {status} - clip {len(recorded) + 1}/{clips}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+        cv2.putText(frame, "Press 'E' to record a clip, 'Q' to finish early", (10, 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        if results.multi_hand_landmarks:
+            mp.solutions.drawing_utils.draw_landmarks(
+                frame, results.multi_hand_landmarks[0],
+                mp.solutions.hands.HAND_CONNECTIONS)
+        cv2.imshow(f"ASL Sequences - {sign}", frame)
+        
+        key = cv2.waitKey(1) & 0xFF
+        if key in (ord('e'), ord('E')) and current is None:
+            current, times = [], []
+        elif key in (ord('q'), ord('Q')):
+            print(f"⏭️ Finished '{sign}' early - {len(recorded)} clips")
+            break
+    
+    cap.release()
+    cv2.destroyAllWindows()
+    return recorded
+
+def save_data_to_dataset(X: np.ndarray, y: np.ndarray, path: str = DATASET_DIR) -> LandmarkDataset:
+    """Append this run's samples to the binary dataset as a new session."""
+    # The first run imports the old asl_data.csv so no recorded samples are lost
+    dataset = LandmarkDataset.open_or_create(LABELS, path)
+    if dataset.labels != LABELS:
+        raise ValueError(f"Dataset labels {dataset.labels} don't match {LABELS}")
+    session = dataset.append(X, y, source="camera")
+    print(f"💾 Session {session} ({len(X)} samples) appended to {dataset.path} - {len(dataset)} samples in total")
+    return dataset
+
+def save_sequences_to_dataset(clips: Sequence[tuple[np.ndarray, np.ndarray]], label: int,
+                              path: str = SEQUENCE_DATASET_DIR) -> LandmarkDataset:
+    """Append recorded clips of one sign to the sequence dataset, one session per clip."""
+    dataset = LandmarkDataset.open_or_create(LABELS, path, legacy_csv=None)
+    if dataset.labels != LABELS:
+        raise ValueError(f"Dataset labels {dataset.labels} don't match {LABELS}")
+    for clip, times in clips:
+        dataset.append(clip, np.full(len(clip), label), source="camera-sequence", timestamps=times)
+    print(f"💾 {len(clips)} clips appended to {dataset.path} - {len(dataset.sessions)} clips in total")
+    return dataset
 
 def create_tensorflow_model(input_shape: tuple, num_classes: int):
     """Create an improved TensorFlow neural network model."""
+    import tensorflow as tf
+    from tensorflow.keras import layers, models
+    
     model = models.Sequential([
         layers.Input(shape=input_shape),
         layers.Dense(256, activation="relu"),
@@ -124,6 +225,27 @@ def create_tensorflow_model(input_shape: tuple, num_classes: int):
     )
     return model
 
+def create_sequence_model(input_dims: int, num_classes: int):
+    """A small network over window_features(); exported to the NumPy engine for serving."""
+    import tensorflow as tf
+    from tensorflow.keras import layers, models
+    
+    model = models.Sequential([
+        layers.Input(shape=(input_dims,)),
+        layers.Dense(128, activation="relu"),
+        layers.BatchNormalization(),
+        layers.Dropout(0.3),
+        layers.Dense(64, activation="relu"),
+        layers.Dropout(0.2),
+        layers.Dense(num_classes, activation="softmax")
+    ])
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
+        loss="sparse_categorical_crossentropy",
+        metrics=["accuracy"]
+    )
+    return model
+
 def clean_old_models():
     """SAFELY remove only ASL model files - nothing else."""
     import shutil
@@ -137,7 +259,7 @@ def clean_old_models():
     safe_targets = [
         "models/asl_model.pkl",     # Our pickle model  
         "models/asl_model_tf",      # Our TensorFlow model directory
-        "asl_data.csv",             # Our training data CSV
+        "models/asl_model.npz",     # Our exported NumPy weights
         "asl_model_tf",             # DUPLICATE in root (wrong location)
         "asl_model.pkl",            # DUPLICATE in root (wrong location)
         "models"                    # Our models directory (only if empty or contains our files)
@@ -147,11 +269,12 @@ def clean_old_models():
     models_contents = []
     if os.path.exists("models"):
         try:
-            models_contents = os.listdir("models")
+            # Published versions are kept so running servers can keep serving or roll back
+            models_contents = [item for item in os.listdir("models") if item != "versions"]
             print(f"📁 Models directory contains: {models_contents}")
             
             # Only delete if it contains our ASL files or is empty
-            our_files = ["asl_model.pkl", "asl_model_tf"]
+            our_files = ["asl_model.pkl", "asl_model_tf", "asl_model.npz"]
             safe_to_delete = all(item in our_files or item.startswith("asl_") for item in models_contents)
             
             if len(models_contents) == 0:
@@ -182,7 +305,7 @@ def clean_old_models():
             print(f"⚠️ Could not delete {target}: {e}")
     
     # Only delete models directory if it's safe
-    if safe_to_delete and os.path.exists("models"):
+    if safe_to_delete and os.path.exists("models") and not os.path.exists("models/versions"):
         try:
             shutil.rmtree("models")
             print("🗑️ Safely deleted models directory")
@@ -209,48 +332,39 @@ def clean_old_models():
     
     print("✅ SAFE cleanup complete - only ASL files affected!")
 
-def train_model():
-    """Fast training with improved model architecture."""
-    print("🚀 Starting FRESH ASL Model Training")
-    print("=" * 50)
-    
-    # Clean old models first
-    clean_old_models()
-    
-    X, y = [], []
-    
-    # Fast data collection for each sign
-    for i, sign in enumerate(LABELS):
-        print(f"\n📋 [{i+1}/{len(LABELS)}] Training '{sign}'")
-        features = collect_data_for_sign(sign, num_samples=120)
-        if len(features) > 0:
-            X.extend(features)
-            y.extend([i] * len(features))
-            print(f"✅ Added {len(features)} samples for '{sign}'")
-        else:
-            print(f"⚠️ No samples for '{sign}'")
-    
-    if len(X) == 0:
-        print("❌ No training data collected!")
-        return
-    
-    X = np.array(X)
-    y = np.array(y)
-    
-    print(f"\n📊 Total dataset: {len(X)} samples across {len(LABELS)} gestures")
-    
-    # Save training data
-    save_data_to_csv(X, y)
-    
-    # Split data with stratification to ensure balanced classes
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+def load_previous_model(tf_model_dir: str, input_dims: int, num_classes: int):
+    """The saved Keras model recompiled for fine-tuning, or None when there is no compatible one."""
+    import tensorflow as tf
+    
+    if not os.path.exists(tf_model_dir):
+        print(f"⚠️ No previous model at '{tf_model_dir}' - training from scratch")
+        return None
+    model = tf.keras.models.load_model(tf_model_dir)
+    if model.input_shape[-1] != input_dims or model.output_shape[-1] != num_classes:
+        print(f"⚠️ Previous model has shape {model.input_shape} -> {model.output_shape}, "
+              f"expected {input_dims} -> {num_classes} - training from scratch")
+        return None
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=WARM_START_LEARNING_RATE),
+        loss="sparse_categorical_crossentropy",
+        metrics=["accuracy"]
     )
+    return model
+
+def per_label_accuracy(y_true: np.ndarray, y_pred: np.ndarray, labels: Sequence[str]) -> Dict[str, float]:
+    """Share of each label's test samples that were classified correctly."""
+    return {
+        label: round(float((y_pred[y_true == i] == i).mean()), 4)
+        for i, label in enumerate(labels) if (y_true == i).any()
+    }
+
+def train_random_forest(dataset_path: str, train_rows: np.ndarray, test_rows: np.ndarray,
+                        output_dir: str = "models", n_jobs: int = -1) -> Dict:
+    """Train and save the Random Forest on some rows of the dataset; returns its report."""
+    started = time.perf_counter()
+    dataset = LandmarkDataset(dataset_path)
+    X, y = dataset.load()
     
-    print(f"🔄 Training: {len(X_train)} samples")
-    print(f"🧪 Testing: {len(X_test)} samples")
-    
-    # Train Random Forest with better parameters
     print("\n🌳 Training Random Forest...")
     rf_model = RandomForestClassifier(
         n_estimators=300,  # More trees
@@ -258,73 +372,408 @@ def train_model():
         min_samples_split=5,
         min_samples_leaf=2,
         random_state=42,
-        n_jobs=-1  # Use all CPU cores
+        n_jobs=n_jobs
     )
-    rf_model.fit(X_train, y_train)
-    rf_predictions = rf_model.predict(X_test)
-    rf_accuracy = accuracy_score(y_test, rf_predictions)
+    fit_started = time.perf_counter()
+    rf_model.fit(X[train_rows], y[train_rows])
+    fit_seconds = time.perf_counter() - fit_started
+    rf_predictions = rf_model.predict(X[test_rows])
+    rf_accuracy = accuracy_score(y[test_rows], rf_predictions)
     print(f"✅ Random Forest accuracy: {rf_accuracy:.3f}")
     
-    # Create models directory
-    os.makedirs("models", exist_ok=True)
-    
-    # Save Random Forest model
-    with open("models/asl_model.pkl", "wb") as f:
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, "asl_model.pkl")
+    with open(path, "wb") as f:
         pickle.dump(rf_model, f)
-    print("💾 Random Forest saved to 'models/asl_model.pkl'")
-    
-    # Train improved TensorFlow model
-    print("\n🧠 Training Neural Network...")
-    tf_model = create_tensorflow_model(input_shape=(X.shape[1],), num_classes=len(LABELS))
+    print(f"💾 Random Forest saved to '{path}'")
+    
+    return {
+        "accuracy": round(float(rf_accuracy), 4),
+        "per_label": per_label_accuracy(y[test_rows], rf_predictions, dataset.labels),
+        "fit_seconds": round(fit_seconds, 2),
+        "seconds": round(time.perf_counter() - started, 2),
+        "n_jobs": n_jobs,
+        "path": path,
+    }
+
+def train_neural_network(dataset_path: str, train_rows: np.ndarray, test_rows: np.ndarray,
+                         output_dir: str = "models", epochs: int = 100, batch_size: int = 64,
+                         warm_start: bool = False, threads: int = 0) -> Dict:
+    """Train, save and export the neural network on some rows of the dataset; returns its report."""
+    import tensorflow as tf
+    
+    started = time.perf_counter()
+    if threads:
+        # Leave the other cores to the Random Forest training next to us
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+    dataset = LandmarkDataset(dataset_path)
+    X, y = dataset.load()
+    X_train, y_train = np.asarray(X[train_rows]), np.asarray(y[train_rows])
+    X_test, y_test = np.asarray(X[test_rows]), np.asarray(y[test_rows])
+    tf_model_dir = os.path.join(output_dir, "asl_model_tf")
+    
+    tf_model = load_previous_model(tf_model_dir, X.shape[1], len(dataset.labels)) if warm_start else None
+    warm_started = tf_model is not None
+    if warm_started:
+        print(f"\n🧠 Fine-tuning Neural Network from '{tf_model_dir}'...")
+    else:
+        print("\n🧠 Training Neural Network...")
+        tf_model = create_tensorflow_model(input_shape=(X.shape[1],), num_classes=len(dataset.labels))
     
-    # Train with better parameters
+    fit_started = time.perf_counter()
     history = tf_model.fit(
         X_train, y_train,
-        epochs=100,  # More epochs
-        batch_size=16,  # Smaller batches
+        epochs=epochs,
+        batch_size=batch_size,
         validation_split=0.2,
-        verbose=1,
+        verbose=2,
         callbacks=[
             tf.keras.callbacks.EarlyStopping(patience=10, restore_best_weights=True),
             tf.keras.callbacks.ReduceLROnPlateau(patience=5, factor=0.5)
         ]
     )
+    fit_seconds = time.perf_counter() - fit_started
     
     # Evaluate TensorFlow model
-    tf_loss, tf_accuracy = tf_model.evaluate(X_test, y_test, verbose=0)
+    tf_predictions = np.argmax(tf_model.predict(X_test, verbose=0), axis=1)
+    tf_accuracy = accuracy_score(y_test, tf_predictions)
     print(f"✅ Neural Network accuracy: {tf_accuracy:.3f}")
     
     # Save TensorFlow model - ONLY in models directory
-    tf_model.save("models/asl_model_tf")
-    print("💾 Neural Network saved to 'models/asl_model_tf'")
-    
-    # Verify no duplicate models in root directory
-    if os.path.exists("asl_model_tf"):
-        try:
-            shutil.rmtree("asl_model_tf")
-            print("🗑️ Removed duplicate model from root directory")
-        except:
-            pass
+    tf_model.save(tf_model_dir)
+    print(f"💾 Neural Network saved to '{tf_model_dir}'")
+    
+    # Export TensorFlow-free weights for the server's NumPy engine
+    numpy_path = os.path.join(output_dir, "asl_model.npz")
+    export_numpy_model(tf_model_dir, numpy_path)
+    print(f"💾 NumPy weights saved to '{numpy_path}'")
+    
+    return {
+        "accuracy": round(float(tf_accuracy), 4),
+        "per_label": per_label_accuracy(y_test, tf_predictions, dataset.labels),
+        "fit_seconds": round(fit_seconds, 2),
+        "seconds": round(time.perf_counter() - started, 2),
+        "epochs_run": len(history.epoch),
+        "batch_size": batch_size,
+        "warm_started": warm_started,
+        "best_val_loss": round(float(min(history.history["val_loss"])), 4),
+        "path": tf_model_dir,
+    }
+
+def load_sequence_clips(path: str = SEQUENCE_DATASET_DIR) -> tuple[List[np.ndarray], np.ndarray]:
+    """Every clip of the sequence dataset (one session each) and its label index."""
+    dataset = LandmarkDataset(path)
+    features, targets = dataset.load()
+    clips, labels = [], []
+    for session in dataset.sessions:
+        if session["rows"] == 0:
+            continue
+        start = session["first_row"]
+        clips.append(np.asarray(features[start:start + session["rows"]]))
+        labels.append(int(targets[start]))
+    return clips, np.array(labels, dtype=np.int64)
+
+def train_sequence_model(sequence_path: str = SEQUENCE_DATASET_DIR, output_dir: str = "models",
+                         window: int = config.SEQUENCE_WINDOW, epochs: int = 100, batch_size: int = 64,
+                         test_size: float = 0.2, threads: int = 0) -> Dict:
+    """Train, save and export the temporal model on sliding windows of the recorded clips; returns its report."""
+    import tensorflow as tf
+    
+    started = time.perf_counter()
+    if threads:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+    labels = LandmarkDataset(sequence_path).labels
+    clips, clip_labels = load_sequence_clips(sequence_path)
+    if len(clips) < 2:
+        raise ValueError(f"Need at least 2 recorded clips in {sequence_path}, found {len(clips)}")
+    
+    # Split whole clips, so no test window overlaps a training window
+    _, counts = np.unique(clip_labels, return_counts=True)
+    train_clips, test_clips = train_test_split(
+        np.arange(len(clips)), test_size=test_size, random_state=42,
+        stratify=clip_labels if counts.min() >= 2 else None
+    )
     
-    if os.path.exists("asl_model.pkl"):
-        try:
-            os.remove("asl_model.pkl")
-            print("🗑️ Removed duplicate .pkl from root directory")
-        except:
-            pass
+    def windows(indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        X, y = [], []
+        for i in indices:
+            found = clip_windows(clips[i], window, SEQUENCE_TRAIN_STRIDE)
+            X.extend(found)
+            y.extend([clip_labels[i]] * len(found))
+        return np.array(X, dtype=np.float32).reshape(-1, window_feature_dims()), np.array(y, dtype=np.int64)
+    
+    X_train, y_train = windows(train_clips)
+    X_test, y_test = windows(test_clips)
+    print(f"\n🎬 Training Sequence Model on {len(X_train)} windows from {len(train_clips)} clips...")
+    
+    model = create_sequence_model(X_train.shape[1], len(labels))
+    fit_started = time.perf_counter()
+    history = model.fit(
+        X_train, y_train,
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_split=0.2,
+        verbose=2,
+        callbacks=[tf.keras.callbacks.EarlyStopping(patience=10, restore_best_weights=True)]
+    )
+    fit_seconds = time.perf_counter() - fit_started
+    
+    predictions = np.argmax(model.predict(X_test, verbose=0), axis=1) if len(X_test) else np.empty(0, np.int64)
+    accuracy = accuracy_score(y_test, predictions) if len(X_test) else 0.0
+    print(f"✅ Sequence Model accuracy: {accuracy:.3f} ({len(X_test)} test windows)")
+    
+    tf_model_dir = os.path.join(output_dir, "asl_sequence_tf")
+    model.save(tf_model_dir)
+    numpy_path = os.path.join(output_dir, "asl_sequence.npz")
+    # The server reads the window layout from the weight file
+    export_numpy_model(tf_model_dir, numpy_path, extra_meta={
+        "kind": "sequence", "window": window, "steps": WINDOW_STEPS, "labels": labels,
+    })
+    print(f"💾 Sequence Model saved to '{tf_model_dir}' and '{numpy_path}'")
+    
+    return {
+        "accuracy": round(float(accuracy), 4),
+        "per_label": per_label_accuracy(y_test, predictions, labels),
+        "clips": {"train": len(train_clips), "test": len(test_clips)},
+        "windows": {"train": len(X_train), "test": len(X_test)},
+        "window": window,
+        "fit_seconds": round(fit_seconds, 2),
+        "seconds": round(time.perf_counter() - started, 2),
+        "epochs_run": len(history.epoch),
+        "path": numpy_path,
+    }
+
+# Models the server can run without; their failure doesn't block publishing the others
+OPTIONAL_MODELS = {"sequence"}
+
+def default_model_kinds(sequence_path: str = SEQUENCE_DATASET_DIR) -> List[str]:
+    """rf and nn, plus the sequence model once enough clips have been recorded to train it."""
+    try:
+        clips = sum(1 for session in LandmarkDataset(sequence_path).sessions if session["rows"] > 0)
+    except FileNotFoundError:
+        clips = 0
+    return ["rf", "nn"] + (["seq"] if clips >= 2 else [])
+
+def write_report(report: Dict, output_dir: str = "models") -> str:
+    """Save a training run's report as models/reports/<run>.json."""
+    reports_dir = os.path.join(output_dir, "reports")
+    os.makedirs(reports_dir, exist_ok=True)
+    path = os.path.join(reports_dir, f"{report['run']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+def train_models(dataset_path: str = DATASET_DIR, output_dir: str = "models", kinds: Optional[Sequence[str]] = None,
+                 parallel: bool = True, warm_start: bool = False, epochs: int = 100, batch_size: int = 64,
+                 test_size: float = 0.2, publish: bool = True, sequence_path: str = SEQUENCE_DATASET_DIR,
+                 window: int = config.SEQUENCE_WINDOW) -> Dict:
+    """Train the candidate models on the whole dataset, each in its own process, and write a run report."""
+    kinds = kinds or default_model_kinds(sequence_path)
+    run = time.strftime("%Y%m%d-%H%M%S")
+    started = time.perf_counter()
+    # The first run imports the old asl_data.csv
+    dataset = LandmarkDataset.open_or_create(LABELS, dataset_path)
+    _, y = dataset.load()
+    print(f"📊 Training on {len(dataset)} samples from {len(dataset.sessions)} sessions")
+    
+    # Split row indices once, so every model is trained and tested on the same samples
+    train_rows, test_rows = train_test_split(
+        np.arange(len(y)), test_size=test_size, random_state=42, stratify=y
+    )
+    print(f"🔄 Training: {len(train_rows)} samples")
+    print(f"🧪 Testing: {len(test_rows)} samples")
+    
+    parallel = parallel and len(kinds) > 1
+    cores = available_cores()
+    rf_jobs = max(1, cores // 2) if parallel and "rf" in kinds else -1
+    # The TensorFlow models share whatever the forest leaves
+    tf_threads = max(1, (cores - max(0, rf_jobs)) // max(1, len(set(kinds) & {"nn", "seq"}))) if parallel else 0
+    common = (dataset_path, train_rows, test_rows, output_dir)
+    tasks = {
+        "rf": (train_random_forest, common, {"n_jobs": rf_jobs}),
+        "nn": (train_neural_network, common, {
+            "epochs": epochs, "batch_size": batch_size, "warm_start": warm_start, "threads": tf_threads,
+        }),
+        "seq": (train_sequence_model, (sequence_path, output_dir), {
+            "window": window, "epochs": epochs, "batch_size": batch_size, "test_size": test_size,
+            "threads": tf_threads,
+        }),
+    }
+    names = {"rf": "random_forest", "nn": "neural_network", "seq": "sequence"}
+    results: Dict[str, Dict] = {}
+    os.makedirs(output_dir, exist_ok=True)
+    if parallel:
+        # spawn: each model trains in a fresh interpreter, so TensorFlow and the forest never share a process
+        with ProcessPoolExecutor(max_workers=len(kinds), mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {kind: pool.submit(tasks[kind][0], *tasks[kind][1], **tasks[kind][2]) for kind in kinds}
+            for kind, future in futures.items():
+                try:
+                    results[names[kind]] = future.result()
+                except Exception as e:
+                    print(f"❌ {names[kind]} failed: {e}")
+                    results[names[kind]] = {"error": str(e)}
+    else:
+        for kind in kinds:
+            function, args, options = tasks[kind]
+            try:
+                results[names[kind]] = function(*args, **options)
+            except Exception as e:
+                print(f"❌ {names[kind]} failed: {e}")
+                results[names[kind]] = {"error": str(e)}
+    
+    report = {
+        "run": run,
+        "dataset": dataset.info(),
+        "split": {"train": len(train_rows), "test": len(test_rows), "test_size": test_size},
+        "parallel": parallel,
+        "models": results,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    failed = [name for name, result in results.items() if "error" in result and name not in OPTIONAL_MODELS]
+    # A failed optional model doesn't hold back the ones that trained; it is reported as skipped
+    skipped = [name for name, result in results.items() if "error" in result and name in OPTIONAL_MODELS]
+    report["skipped"] = skipped
+    if publish and not failed:
+        # Publish as a new version; running servers swap it in without a restart
+        from model_registry import publish_version
+        report["version"] = publish_version(output_dir, version=run, versions_dir=os.path.join(output_dir, "versions"))
+    report_path = write_report(report, output_dir)
     
     # Print detailed results
-    print("\n🎉 Training Complete!")
+    print("\n🎉 Training Complete!" if not failed else f"\n⚠️ Training finished with failures: {failed}")
+    if skipped:
+        print(f"⏭️ Skipped optional models: {skipped}")
     print("=" * 50)
     print(f"📊 Dataset Summary:")
-    for i, label in enumerate(LABELS):
-        count = sum(1 for val in y if val == i)
+    for label, count in report["dataset"]["labels"].items():
         print(f"  • {label}: {count} samples")
     print(f"\n🎯 Model Performance:")
-    print(f"  • Random Forest: {rf_accuracy:.3f}")
-    print(f"  • Neural Network: {tf_accuracy:.3f}")
-    print(f"\n🚀 Models saved to 'models/' directory")
-    print("🔄 Restart your Python server to load new models!")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"  • {name}: {'skipped' if name in skipped else 'failed'} ({result['error']})")
+        else:
+            print(f"  • {name}: {result['accuracy']:.3f} ({result['seconds']:.1f} s)")
+    print(f"\n⏱️ Total: {report['seconds']:.1f} s ({'parallel' if parallel else 'sequential'})")
+    print(f"📝 Report saved to '{report_path}'")
+    if "version" in report:
+        print(f"🔄 Published model version '{report['version']}' - running servers will load it automatically")
+    return report
+
+def record_signs(signs: Sequence[str], num_samples: int = 120, dataset_path: str = DATASET_DIR) -> int:
+    """Record samples for some signs with the webcam and append them to the dataset as one session."""
+    X, y = [], []
+    
+    # Fast data collection for each sign
+    for i, sign in enumerate(signs):
+        print(f"\n📋 [{i+1}/{len(signs)}] Training '{sign}'")
+        features = collect_data_for_sign(sign, num_samples=num_samples)
+        if len(features) > 0:
+            X.extend(features)
+            y.extend([LABELS.index(sign)] * len(features))
+            print(f"✅ Added {len(features)} samples for '{sign}'")
+        else:
+            print(f"⚠️ No samples for '{sign}'")
+    
+    if len(X) == 0:
+        print("❌ No training data collected!")
+        return 0
+    
+    print(f"\n📊 Collected: {len(X)} samples across {len(signs)} gestures")
+    save_data_to_dataset(np.array(X), np.array(y), dataset_path)
+    return len(X)
+
+def record_sequences(signs: Sequence[str], clips: int = 10, frames: int = config.SEQUENCE_WINDOW,
+                     sequence_path: str = SEQUENCE_DATASET_DIR) -> int:
+    """Record clips of some signs with the webcam for the sequence model; returns the number of clips."""
+    total = 0
+    for i, sign in enumerate(signs):
+        print(f"\n📋 [{i+1}/{len(signs)}] Recording clips of '{sign}'")
+        recorded = collect_sequences_for_sign(sign, clips, frames)
+        if recorded:
+            save_sequences_to_dataset(recorded, LABELS.index(sign), sequence_path)
+            total += len(recorded)
+        else:
+            print(f"⚠️ No clips for '{sign}'")
+    return total
+
+def train_model(signs: Optional[Sequence[str]] = None, num_samples: int = 120, **options):
+    """Record new samples (all signs by default), then retrain on every sample recorded so far."""
+    print("🚀 Starting ASL Model Training")
+    print("=" * 50)
+    if record_signs(signs or LABELS, num_samples, options.get("dataset_path", DATASET_DIR)) == 0:
+        return None
+    return train_models(**options)
+
+def main():
+    parser = argparse.ArgumentParser(description="Record ASL samples and train the models")
+    sub = parser.add_subparsers(dest="command")
+    
+    record = sub.add_parser("record", help="Record samples with the webcam (default: every sign), then train")
+    record.add_argument("--labels", nargs="+", choices=LABELS, help="Only record these signs")
+    record.add_argument("--samples", type=int, default=120, help="Samples per sign")
+    record.add_argument("--no-train", action="store_true", help="Only append the samples to the dataset")
+    
+    record_seq = sub.add_parser("record-sequences", help="Record clips of motion signs for the sequence model, then train")
+    record_seq.add_argument("--labels", nargs="+", choices=LABELS, help="Only record these signs")
+    record_seq.add_argument("--clips", type=int, default=10, help="Clips per sign")
+    record_seq.add_argument("--frames", type=int, default=config.SEQUENCE_WINDOW, help="Frames per clip")
+    record_seq.add_argument("--no-train", action="store_true", help="Only append the clips to the dataset")
+    
+    train = sub.add_parser("train", help="Retrain on the dataset without recording (non-interactive)")
+    train.add_argument("--ingest", metavar="DIR", help="First add landmarks from videos and images in DIR (see ingest.py)")
+    train.add_argument("--ingest-label", help="Label for everything in DIR instead of one sub-directory per label")
+    
+    for command in (record, record_seq, train):
+        command.add_argument("--models", nargs="+", choices=MODEL_KINDS,
+                             help="Models to train (default: rf nn, plus seq once clips have been recorded)")
+        command.add_argument("--sequential", action="store_true", help="Train the models one after the other")
+        command.add_argument("--warm-start", action="store_true", help="Fine-tune the previous neural network")
+        command.add_argument("--epochs", type=int, default=100)
+        command.add_argument("--batch-size", type=int, default=64)
+        command.add_argument("--dataset", default=DATASET_DIR)
+        command.add_argument("--sequences", default=SEQUENCE_DATASET_DIR, help="Clip dataset of the sequence model")
+        command.add_argument("--window", type=int, default=config.SEQUENCE_WINDOW,
+                             help="Frames per sequence-model window")
+        command.add_argument("--output", default="models", help="Directory for the models, versions and reports")
+        command.add_argument("--no-publish", action="store_true", help="Don't publish a new model version")
+        command.add_argument("--clean", action="store_true",
+                             help="Delete the unversioned models first (the old wipe-and-retrain)")
+    
+    # No command: the original interactive flow, recording every sign
+    args = parser.parse_args()
+    if args.command is None:
+        args = parser.parse_args(["record"])
+    
+    if args.clean:
+        clean_old_models()
+    options = {
+        "dataset_path": args.dataset,
+        "output_dir": args.output,
+        "kinds": args.models,
+        "parallel": not args.sequential,
+        "warm_start": args.warm_start and not args.clean,
+        "epochs": args.epochs,
+        "batch_size": args.batch_size,
+        "publish": not args.no_publish,
+        "sequence_path": args.sequences,
+        "window": args.window,
+    }
+    
+    if args.command == "record":
+        if args.no_train:
+            record_signs(args.labels or LABELS, args.samples, args.dataset)
+        else:
+            train_model(args.labels, args.samples, **options)
+        return
+    if args.command == "record-sequences":
+        if record_sequences(args.labels or LABELS, args.clips, args.frames, args.sequences) and not args.no_train:
+            train_models(**options)
+        return
+    
+    if args.ingest:
+        from ingest import ingest
+        print(json.dumps(ingest(args.ingest, args.dataset, args.ingest_label), indent=2))
+    train_models(**options)
 
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    main()
\ No newline at end of file
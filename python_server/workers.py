@@ -0,0 +1,328 @@
+# workers.py
+"""Execution backend that runs the per-frame pipeline (decode, MediaPipe, classify) off the event loop"""
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import numpy as np
+import threading
+import time
+import zlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import config
+from gating import frame_signature, signature_distance
+from preprocess import crop_box, decode_frame, landmark_roi, to_full_frame
+from recognition import create_hands, extract_hands, get_model, landmarks_to_dicts, predict_batch_versioned
+from trackers import TrackerPool
+
+logger = logging.getLogger(__name__)
+
+# Each pool thread (or process) owns its own detection-only MediaPipe graph
+_worker_state = threading.local()
+
+# Per-session tracking graphs, shared by the threads of this process
+_tracker_pool = TrackerPool(config.TRACKER_POOL_SIZE, config.TRACKER_IDLE_TIMEOUT_S)
+
+
+def _get_detection_hands(max_hands: int = 1):
+    graphs = getattr(_worker_state, "hands", None)
+    if graphs is None:
+        graphs = _worker_state.hands = {}
+    # max_num_hands is part of the graph, so there is one per setting in use
+    hands = graphs.get(max_hands)
+    if hands is None:
+        hands = graphs[max_hands] = create_hands(static_image_mode=True, max_num_hands=max_hands)
+    return hands
+
+
+def _init_process_worker():
+    """Warm a process-pool worker so its first frame doesn't pay for model loading"""
+    get_model()
+    _get_detection_hands()
+
+
+def process_frame(jpeg: Union[bytes, np.ndarray], classify: bool = True,
+                  session_id: Optional[str] = None, reference_signature: Optional[np.ndarray] = None,
+                  frame_threshold: float = 0.0, roi: Optional[tuple] = None, max_hands: int = 1) -> Dict[str, Any]:
+    """Decode a JPEG frame, extract hand landmarks and classify the gesture.
+    
+    Up to max_hands hands are detected. The top-level fields describe the
+    first one; with max_hands > 1 every hand is listed under "hands", and all
+    of them are classified in a single predict_batch call.
+    
+    With classify=False the raw features ((hands, 63) float32) are returned
+    under "features" so the caller can classify them in a cross-session batch
+    instead. With a positive
+    frame_threshold the frame's thumbnail is returned under "signature", and a
+    frame that barely differs from reference_signature comes back as just
+    {"reused": "frame"} without being decoded in full.
+    
+    roi is the normalized box of the session's hand in its previous frame; the
+    box of this frame's hand (or None) is returned under "roi" for the next one.
+    ROI cropping only applies to single-hand sessions.
+    
+    Every result carries the seconds spent per stage under "timings".
+    """
+    timings = {}
+    started = time.perf_counter()
+    np_arr = jpeg if isinstance(jpeg, np.ndarray) else np.frombuffer(jpeg, np.uint8)
+    
+    signature = None
+    if frame_threshold > 0:
+        signature = frame_signature(np_arr)
+        started = _lap(timings, "signature", started)
+        if (signature is not None and reference_signature is not None
+                and signature_distance(signature, reference_signature) < frame_threshold):
+            return {"reused": "frame", "timings": timings}
+    
+    # Landmarks are normalized, so a frame decoded at reduced scale gives the same coordinates
+    image, _ = decode_frame(np_arr, config.DECODE_MAX_SIDE)
+    started = _lap(timings, "decode", started)
+    if image is None:
+        return {"error": "Failed to decode image", "error_stage": "decode", "timings": timings}
+    
+    # Use the session's own tracker so MediaPipe can follow the hand between frames
+    hands = _tracker_pool.acquire(session_id, max_hands) if session_id is not None else None
+    try:
+        if hands is not None:
+            # Tracking already runs the landmark model on the hand's region only;
+            # feeding it moving crops would break its frame-to-frame ROI
+            found = extract_hands(image, hands)
+        else:
+            found = _detect_in_roi(image, roi if max_hands == 1 else None, max_hands)
+    finally:
+        if hands is not None:
+            _tracker_pool.release(session_id)
+    started = _lap(timings, "mediapipe", started)
+    
+    result = {
+        "hand_detected": bool(found),
+        "landmarks": landmarks_to_dicts(found[0]["features"]) if found else [],
+        "gesture": "None",
+        "confidence": 0.0,
+        "timings": timings
+    }
+    if found:
+        result["handedness"] = found[0]["handedness"]
+    if max_hands > 1:
+        result["hands"] = [
+            {
+                "handedness": hand["handedness"],
+                "handedness_score": hand["score"],
+                "landmarks": landmarks_to_dicts(hand["features"]) if i else result["landmarks"],
+                "gesture": "None",
+                "confidence": 0.0,
+            }
+            for i, hand in enumerate(found)
+        ]
+    if signature is not None:
+        result["signature"] = signature
+    result["roi"] = landmark_roi(found[0]["features"]) if found and max_hands == 1 else None
+    
+    if found and not classify:
+        result["features"] = np.stack([hand["features"] for hand in found]).astype(np.float32)
+    elif found:
+        if len(found) == 1:
+            predictions = [get_model().predict(found[0]["features"])]
+        else:
+            predictions = get_model().predict_batch(np.stack([hand["features"] for hand in found]))
+        apply_predictions(result, predictions)
+        _lap(timings, "predict", started)
+    
+    return result
+
+
+def apply_predictions(result: Dict[str, Any], predictions: List[tuple[str, float]]):
+    """Fill in the gesture of every hand of a frame result, the first one also at the top level"""
+    result["gesture"], result["confidence"] = predictions[0]
+    for hand, (gesture, confidence) in zip(result.get("hands", ()), predictions):
+        hand["gesture"], hand["confidence"] = gesture, confidence
+
+
+def _detect_in_roi(image: np.ndarray, roi: Optional[tuple], max_hands: int = 1) -> List[Dict]:
+    """Detection-only hands, searching around the previous hand before the whole frame"""
+    hands = _get_detection_hands(max_hands)
+    height, width = image.shape[:2]
+    box = crop_box(roi, width, height, config.ROI_MARGIN) if roi is not None and config.ROI_CROP else None
+    if box is not None:
+        left, top, side, _ = box
+        found = extract_hands(image[top:top + side, left:left + side], hands)
+        for hand in found:
+            hand["features"] = to_full_frame(hand["features"], box, width, height)
+        if found:
+            return found
+    # No previous hand, or it left the crop
+    return extract_hands(image, hands)
+
+
+def extract_batch(images: List[Optional[np.ndarray]], session_id: Optional[str] = None) -> List[Optional[np.ndarray]]:
+    """Landmarks ((63,) float32, or None) of the first hand in each decoded image of a /recognize chunk.
+    
+    With a session_id the images are consecutive video frames, tracked on a
+    tracker leased from this worker's pool under that key; otherwise (or when
+    the pool is exhausted) each one is a separate detection.
+    """
+    hands = _tracker_pool.acquire(session_id) if session_id is not None else None
+    try:
+        found = []
+        for image in images:
+            if image is None:
+                found.append(None)
+                continue
+            detected = extract_hands(image, hands if hands is not None else _get_detection_hands())
+            found.append(detected[0]["features"].astype(np.float32) if detected else None)
+        return found
+    finally:
+        if hands is not None:
+            _tracker_pool.release(session_id)
+
+
+def _lap(timings: Dict[str, float], stage: str, started: float) -> float:
+    now = time.perf_counter()
+    timings[stage] = now - started
+    return now
+
+
+def classify_features(features: np.ndarray) -> tuple[Optional[str], tuple[str, float]]:
+    """Classify one hand's landmarks; returns the version of the model used with the prediction"""
+    model = get_model()
+    return model.version, model.predict(features)
+
+
+def classify_batch(features: np.ndarray) -> tuple[Optional[str], List[tuple[str, float]]]:
+    """Classify the (N, 63) landmarks of several hands in one forward pass, with the model's version"""
+    return predict_batch_versioned(features)
+
+
+def classify_sequence(window: np.ndarray) -> Optional[tuple[str, float]]:
+    """Classify a sequence-mode window; None when it is too empty or no sequence model is active"""
+    model = get_model()
+    if model.sequence_model is None:
+        return None
+    return model.predict_sequence(window)
+
+
+def close_session(session_id: str):
+    """Free the per-session state a worker holds for a closed connection"""
+    _tracker_pool.close_session(session_id)
+
+
+def activate_model_version(version: str):
+    """Hot-swap this worker process's model in the background"""
+    from model_registry import registry
+    threading.Thread(target=registry.activate, args=(version,), daemon=True).start()
+
+
+def tracker_stats() -> Dict:
+    return _tracker_pool.stats()
+
+
+def warm_up_pipeline(frames: int = 2) -> Dict[str, float]:
+    """Push synthetic frames through decode, MediaPipe and predict in this worker; returns ms per stage.
+
+    The first frame pays for the model, the MediaPipe graphs and the codecs,
+    so real sessions don't. Nothing is detected in a synthetic frame, so
+    predict is warmed with a synthetic hand instead.
+    """
+    import cv2
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    model = get_model()
+    _lap(timings, "model", started)
+
+    # A gradient rather than a flat frame, so the JPEG decoder does real work
+    height, width = 480, 640
+    image = np.empty((height, width, 3), np.uint8)
+    image[..., 0] = np.linspace(0, 255, width, dtype=np.uint8)
+    image[..., 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    image[..., 2] = 128
+    jpeg = cv2.imencode(".jpg", image)[1].tobytes()
+    session_id = f"warm-up-{threading.get_ident()}"
+    try:
+        for i in range(frames):
+            # Tracking graph on even frames, detection graph (the ROI path) on odd ones
+            result = process_frame(jpeg, classify=False, session_id=None if i % 2 else session_id,
+                                   roi=(0.25, 0.25, 0.75, 0.75) if i % 2 else None)
+            for stage, seconds in result["timings"].items():
+                timings[stage] = timings.get(stage, 0.0) + seconds
+    finally:
+        _tracker_pool.close_session(session_id)
+
+    started = time.perf_counter()
+    hand = np.full((1, 63), 0.5, dtype=np.float32)
+    model.predict(hand[0])
+    model.predict_batch(np.repeat(hand, max(1, config.MAX_HANDS), axis=0))
+    _lap(timings, "predict", started)
+    return {stage: round(1000 * seconds, 1) for stage, seconds in timings.items()}
+
+
+def _run_after_barrier(barrier: threading.Barrier, fn: Callable, *args) -> Any:
+    # Each task holds its thread until all of them have one, so no thread runs two of them
+    barrier.wait(timeout=60)
+    return fn(*args)
+
+
+class FrameExecutor:
+    """Thread or process pool that frame work is dispatched to from async handlers.
+    
+    With the process backend every worker is its own single-process pool and
+    work carrying a session key always lands on the same worker, so per-session
+    state such as the hand tracker stays in one place.
+    """
+    
+    def __init__(self, backend: str = "thread", max_workers: int = 1):
+        self.backend = backend
+        self.max_workers = max(1, max_workers)
+        self._executors = self._create_executors()
+        self._round_robin = itertools.cycle(range(len(self._executors)))
+        logger.info(f"🧵 Frame executor: {self.backend} pool with {self.max_workers} workers")
+    
+    def _create_executors(self) -> List[Executor]:
+        if self.backend == "process":
+            # spawn, not fork: TensorFlow and MediaPipe are not fork-safe
+            return [
+                ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process_worker
+                )
+                for _ in range(self.max_workers)
+            ]
+        if self.backend == "thread":
+            return [ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="asl-frame")]
+        raise ValueError(f"Unknown executor backend: {self.backend!r} (expected 'thread' or 'process')")
+    
+    def _executor_for(self, key: Optional[str]) -> Executor:
+        if len(self._executors) == 1:
+            return self._executors[0]
+        if key is None:
+            return self._executors[next(self._round_robin)]
+        return self._executors[zlib.crc32(key.encode()) % len(self._executors)]
+    
+    async def run(self, fn: Callable, *args, key: Optional[str] = None) -> Any:
+        """Run fn(*args) on the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor_for(key), fn, *args)
+    
+    async def run_on_all(self, fn: Callable, *args) -> List[Any]:
+        """Run fn(*args) once in every worker process (once in total for threads)"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[loop.run_in_executor(ex, fn, *args) for ex in self._executors])
+    
+    async def run_on_every_thread(self, fn: Callable, *args) -> List[Any]:
+        """Run fn(*args) once on every pool thread, for per-thread state (once per process with processes)"""
+        if self.backend == "process":
+            return await self.run_on_all(fn, *args)
+        barrier = threading.Barrier(self.max_workers)
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(self._executors[0], _run_after_barrier, barrier, fn, *args)
+            for _ in range(self.max_workers)
+        ])
+    
+    def shutdown(self):
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)